@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+#
+# Benchmark DbusMonitor value-change delivery for bursts of ItemsChanged.
+#
+# Replays ItemsChanged signals with many entries into handler_item_changes and
+# drains the GLib main context, once with one idle callback per changed path
+# and once with batchValueChanges. Every burst is sent twice with different
+# values before draining, so the batched mode also shows the coalescing.
+#
+# Needs dbus-python, PyGObject and a session or system bus:
+#   dbus-run-session -- python3 benchmarks/bench_dbusmonitor_batch.py
+
+
+import os
+import sys
+import time
+
+import dbus
+from dbus.mainloop.glib import DBusGMainLoop
+from gi.repository import GLib
+
+sys.path.insert(
+    1, os.path.join(os.path.dirname(__file__), "..", "ext", "velib_python")
+)
+from dbusmonitor import DbusMonitor, MonitoredValue  # noqa: E402
+
+SERVICE_NAME = "com.victronenergy.benchmark.ttyBENCH"
+SENDER_ID = ":1.4711"
+BURSTS = 50
+
+delivered = [0]
+
+
+def valueChanged(serviceName, path, options, changes, deviceInstance):
+    delivered[0] += 1
+
+
+def valuesChanged(batch):
+    delivered[0] += len(batch)
+
+
+def createMonitor(paths: int, batch: bool) -> DbusMonitor:
+    """
+    create a monitor and register a scanned service with the given number of paths
+    """
+    monitor = DbusMonitor(
+        {},
+        valuesChanged if batch else valueChanged,
+        batchValueChanges=batch,
+    )
+    service = monitor.make_service(SENDER_ID, SERVICE_NAME, 0)
+    for i in range(paths):
+        service.paths[f"/Value/{i}"] = MonitoredValue(None, None, {})
+    monitor.servicesByName[SERVICE_NAME] = service
+    monitor.servicesById[SENDER_ID] = service
+    return monitor
+
+
+def burst(paths: int, value: int) -> dict:
+    return dbus.Dictionary(
+        {
+            f"/Value/{i}": {
+                "Value": dbus.Int32(value + i, variant_level=1),
+                "Text": dbus.String(str(value + i)),
+            }
+            for i in range(paths)
+        },
+        signature="sa{sv}",
+    )
+
+
+def run(paths: int, batch: bool) -> tuple:
+    monitor = createMonitor(paths, batch)
+    context = GLib.MainContext.default()
+    signals = [(burst(paths, n), burst(paths, n + 1)) for n in range(0, 2 * BURSTS, 2)]
+
+    delivered[0] = 0
+    start = time.perf_counter()
+    for first, second in signals:
+        monitor.handler_item_changes(first, SENDER_ID)
+        monitor.handler_item_changes(second, SENDER_ID)
+        while context.iteration(False):
+            pass
+    return time.perf_counter() - start, delivered[0]
+
+
+def main():
+    DBusGMainLoop(set_as_default=True)
+    for paths in (10, 100, 500):
+        for batch in (False, True):
+            seconds, count = run(paths, batch)
+            mode = "batched" if batch else "per path"
+            print(
+                f"{paths:4} paths, {mode:<8}: {seconds / BURSTS * 1e3:8.3f} ms/burst,"
+                + f" {count} changes delivered"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+#
+# Benchmark ItemsChanged handling for paths watched with DbusMonitor.track_value.
+#
+# Compares the shared per-service receiver with the previous approach of one
+# ItemsChanged closure per tracked path, which walked every signal once per
+# tracked path. The signals are delivered to the handlers directly.
+#
+# Needs dbus-python, PyGObject and a session or system bus:
+#   dbus-run-session -- python3 benchmarks/bench_dbusmonitor_track_value.py
+
+
+import os
+import sys
+import timeit
+
+import dbus
+from dbus.mainloop.glib import DBusGMainLoop
+
+sys.path.insert(
+    1, os.path.join(os.path.dirname(__file__), "..", "ext", "velib_python")
+)
+from dbusmonitor import DbusMonitor  # noqa: E402
+from ve_utils import unwrap_dbus_value  # noqa: E402
+
+SERVICE_NAME = "com.victronenergy.benchmark.ttyBENCH"
+SIGNALS = 200
+ITEMS_PER_SIGNAL = 20
+
+
+def tracked(changes):
+    pass
+
+
+def perPathTracker(objectPath: str, cb):
+    """
+    the ItemsChanged closure track_value used to create for every path
+    """
+
+    def root_tracker(items):
+        try:
+            v = items[objectPath]
+            _v = unwrap_dbus_value(v["Value"])
+        except (KeyError, TypeError):
+            return
+
+        try:
+            t = v["Text"]
+        except KeyError:
+            cb({"Value": _v})
+        else:
+            cb({"Value": _v, "Text": t})
+
+    return root_tracker
+
+
+def itemsChanged(paths: int) -> dict:
+    return dbus.Dictionary(
+        {
+            f"/Value/{i}": {
+                "Value": dbus.Double(i * 0.1, variant_level=1),
+                "Text": dbus.String(f"{i * 0.1:.1f}"),
+            }
+            for i in range(0, paths, max(1, paths // ITEMS_PER_SIGNAL))
+        },
+        signature="sa{sv}",
+    )
+
+
+def main():
+    DBusGMainLoop(set_as_default=True)
+    monitor = DbusMonitor({})
+
+    for paths in (10, 100, 1000):
+        for i in range(paths):
+            monitor.track_value(SERVICE_NAME, f"/Value/{i}", tracked)
+        shared = monitor._trackedPaths[SERVICE_NAME]
+        closures = [perPathTracker(f"/Value/{i}", tracked) for i in range(paths)]
+        items = itemsChanged(paths)
+
+        def perPath():
+            for closure in closures:
+                closure(items)
+
+        seconds = timeit.timeit(perPath, number=SIGNALS)
+        print(f"{paths:5} tracked paths, per path : {seconds / SIGNALS * 1e6:10.1f} us/signal")
+        seconds = timeit.timeit(
+            lambda: monitor._tracked_items_changed(shared, items), number=SIGNALS
+        )
+        print(f"{paths:5} tracked paths, shared   : {seconds / SIGNALS * 1e6:10.1f} us/signal")
+
+        for watch in monitor.serviceWatches.pop(SERVICE_NAME):
+            watch.remove()
+        del monitor._trackedPaths[SERVICE_NAME]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+#
+# Benchmark png.Reader decoding on a corpus of filtered PNGs: one image per
+# filter type plus an adaptively filtered one, in greyscale, RGB and RGBA.
+#
+# The per byte undo_filter_*() functions they replaced are included for
+# comparison and to check the decoded pixels are identical.
+#
+#   python3 benchmarks/bench_png_decode.py
+
+
+import io
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "..", "ext"))
+import png  # noqa: E402
+
+ROUNDS = 3
+WIDTH = 640
+HEIGHT = 240
+
+
+def undoFilterSubBytewise(filter_unit, scanline, previous, result):
+    ai = 0
+    for i in range(filter_unit, len(result)):
+        result[i] = (scanline[i] + result[ai]) & 0xFF
+        ai += 1
+
+
+def undoFilterUpBytewise(filter_unit, scanline, previous, result):
+    for i in range(len(result)):
+        result[i] = (scanline[i] + previous[i]) & 0xFF
+
+
+def undoFilterAverageBytewise(filter_unit, scanline, previous, result):
+    ai = -filter_unit
+    for i in range(len(result)):
+        a = 0 if ai < 0 else result[ai]
+        result[i] = (scanline[i] + ((a + previous[i]) >> 1)) & 0xFF
+        ai += 1
+
+
+def undoFilterPaethBytewise(filter_unit, scanline, previous, result):
+    ai = -filter_unit
+    for i in range(len(result)):
+        if ai < 0:
+            a = c = 0
+        else:
+            a = result[ai]
+            c = previous[ai]
+        b = previous[i]
+        p = a + b - c
+        pa = abs(p - a)
+        pb = abs(p - b)
+        pc = abs(p - c)
+        if pa <= pb and pa <= pc:
+            pr = a
+        elif pb <= pc:
+            pr = b
+        else:
+            pr = c
+        result[i] = (scanline[i] + pr) & 0xFF
+        ai += 1
+
+
+def useFilters(functions: tuple) -> None:
+    (
+        png.undo_filter_sub,
+        png.undo_filter_up,
+        png.undo_filter_average,
+        png.undo_filter_paeth,
+    ) = functions
+
+
+def encode(rows: list, planes: int, filter_type) -> bytes:
+    """
+    encode 8-bit packed rows with the given filter type, or adaptive if None
+    """
+    fu = planes
+    data = bytearray()
+    previous = None
+    for row in rows:
+        if filter_type is None:
+            used, filtered = png.choose_filter(fu, row, previous)
+        else:
+            used, filtered = filter_type, png.filter_scanline(filter_type, fu, row, previous)
+        data.append(used)
+        data.extend(filtered)
+        previous = row
+
+    color_type = {1: 0, 3: 2, 4: 6}[planes]
+    output = io.BytesIO()
+    png.write_chunks(
+        output,
+        [
+            (b"IHDR", struct.pack("!2I5B", WIDTH, HEIGHT, 8, color_type, 0, 0, 0)),
+            (b"IDAT", zlib.compress(bytes(data))),
+            (b"IEND", b""),
+        ],
+    )
+    return output.getvalue()
+
+
+def corpus() -> dict:
+    random.seed(0)
+    images = {}
+    for planes in (1, 3, 4):
+        rows = [
+            bytes(
+                min(255, (x + y) // 4 + random.randrange(16))
+                for x in range(WIDTH)
+                for _ in range(planes)
+            )
+            for y in range(HEIGHT)
+        ]
+        for filter_type in (0, 1, 2, 3, 4, None):
+            name = f"{planes} plane(s), filter {'adaptive' if filter_type is None else filter_type}"
+            images[name] = encode(rows, planes, filter_type)
+    return images
+
+
+def decode(data: bytes) -> list:
+    return [bytes(row) for row in png.Reader(bytes=data).read()[2]]
+
+
+def timed(data: bytes) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        decode(data)
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main():
+    vectorized = (
+        png.undo_filter_sub,
+        png.undo_filter_up,
+        png.undo_filter_average,
+        png.undo_filter_paeth,
+    )
+    bytewise = (
+        undoFilterSubBytewise,
+        undoFilterUpBytewise,
+        undoFilterAverageBytewise,
+        undoFilterPaethBytewise,
+    )
+
+    totals = [0.0, 0.0]
+    print(f"{WIDTH}x{HEIGHT}, 8-bit                 bytewise [ms]  whole row [ms]")
+    for name, data in corpus().items():
+        useFilters(bytewise)
+        expected = decode(data)
+        old = timed(data)
+
+        useFilters(vectorized)
+        if decode(data) != expected:
+            raise AssertionError(f"{name} decodes differently")
+        new = timed(data)
+
+        totals[0] += old
+        totals[1] += new
+        print(f"{name:<32} {old * 1e3:13.1f}  {new * 1e3:14.1f}")
+    print(f"{'total':<32} {totals[0] * 1e3:13.1f}  {totals[1] * 1e3:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
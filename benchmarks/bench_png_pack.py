@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+#
+# Benchmark png.pack_rows() and png.rescale_rows() on greyscale 1-bit and
+# 4-bit images, and png.Writer.write() which uses them.
+#
+# The generator based pack_rows() and the float multiply rescale_rows() they
+# replaced are included for comparison, tests/test_png.py checks the rows are
+# identical.
+# The 3-bit image is rescaled to 4 bits before it is packed.
+#
+#   python3 benchmarks/bench_png_pack.py
+
+
+import io
+import math
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "..", "ext"))
+import png  # noqa: E402
+
+ROUNDS = 5
+WIDTH = 1001
+HEIGHT = 600
+
+
+def packRowsGroup(rows, bitdepth):
+    """
+    pack_rows() packing each group of samples with a loop
+    """
+    spb = int(8 / bitdepth)
+
+    def make_byte(block):
+        res = 0
+        for v in block:
+            res = (res << bitdepth) + v
+        return res
+
+    for row in rows:
+        a = bytearray(row)
+        n = float(len(a))
+        extra = math.ceil(n / spb) * spb - n
+        a.extend([0] * int(extra))
+        blocks = png.group(a, spb)
+        yield bytearray(make_byte(block) for block in blocks)
+
+
+def rescaleRowsFloat(rows, rescale):
+    """
+    rescale_rows() multiplying every sample
+    """
+    fs = [float(2 ** s[1] - 1) / float(2 ** s[0] - 1) for s in rescale]
+    typecode = "BH"[rescale[0][1] > 8]
+    n_chans = len(rescale)
+
+    for row in rows:
+        rescaled_row = array(typecode, iter(row))
+        for i in range(n_chans):
+            channel = array(typecode, (int(round(fs[i] * x)) for x in row[i::n_chans]))
+            rescaled_row[i::n_chans] = channel
+        yield rescaled_row
+
+
+def image(bitdepth: int) -> list:
+    random.seed(bitdepth)
+    maximum = 2 ** bitdepth - 1
+    return [
+        [random.choice((0, maximum, random.randint(0, maximum))) for _ in range(WIDTH)]
+        for _ in range(HEIGHT)
+    ]
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        function()
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main():
+    for bitdepth in (1, 2, 4):
+        rows = image(bitdepth)
+        old = timed(lambda: list(packRowsGroup(rows, bitdepth)))
+        new = timed(lambda: list(png.pack_rows(rows, bitdepth)))
+        print(
+            f"pack_rows {bitdepth}-bit {WIDTH}x{HEIGHT}:"
+            + f" {old * 1e3:8.2f} ms -> {new * 1e3:8.2f} ms"
+        )
+
+    for rescale in ([(3, 4)], [(5, 8)], [(5, 8), (6, 8), (5, 8)], [(12, 16)]):
+        rows = image(rescale[0][0])
+        if len(rescale) > 1:
+            rows = [row * 3 for row in rows[: HEIGHT // 3]]
+        old = timed(lambda: list(rescaleRowsFloat(rows, rescale)))
+        new = timed(lambda: list(png.rescale_rows(rows, rescale)))
+        print(f"rescale_rows {rescale}: {old * 1e3:8.2f} ms -> {new * 1e3:8.2f} ms")
+
+    for bitdepth in (1, 3, 4):
+        rows = image(bitdepth)
+        writer = png.Writer(WIDTH, HEIGHT, greyscale=True, bitdepth=bitdepth)
+        seconds = timed(lambda: writer.write(io.BytesIO(), rows))
+        print(f"Writer.write {bitdepth}-bit greyscale: {seconds * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
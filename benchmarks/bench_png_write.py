@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+#
+# Benchmark png.Writer output size and encoding time for the filter and zlib
+# options: filter type 0 for every row (default), adaptive filtering, the
+# Z_RLE strategy and memLevel 9, on a QR code and two larger synthetic images.
+#
+#   python3 benchmarks/bench_png_write.py
+
+
+import io
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "..", "ext"))
+import png  # noqa: E402
+import qrcode  # noqa: E402
+from qrcode.image.pure import PyPNGImage  # noqa: E402
+
+ROUNDS = 5
+
+MODES = {
+    "default": {},
+    "adaptive": {"adaptive_filter": True},
+    "rle": {"compression_strategy": zlib.Z_RLE},
+    "adaptive, rle": {"adaptive_filter": True, "compression_strategy": zlib.Z_RLE},
+    "memLevel 9": {"compression_mem_level": 9},
+}
+
+
+def qrImage() -> tuple:
+    qr = qrcode.QRCode(image_factory=PyPNGImage)
+    qr.add_data("https://login.tailscale.com/a/1a2b3c4d5e6f7")
+    img = qr.make_image()
+    rows = [list(row) for row in img.rows_iter()]
+    return {"greyscale": True, "bitdepth": 1}, img.pixel_size, img.pixel_size, rows
+
+
+def gradientImage(planes: int) -> tuple:
+    random.seed(planes)
+    width, height = 640, 480
+    rows = [
+        [
+            min(255, (x + y * (channel + 1)) // 4 + random.randrange(8))
+            for x in range(width)
+            for channel in range(planes)
+        ]
+        for y in range(height)
+    ]
+    return {"greyscale": planes == 1, "bitdepth": 8}, width, height, rows
+
+
+def main():
+    images = {
+        "QR code, 1-bit": qrImage(),
+        "gradient, 8-bit grey": gradientImage(1),
+        "gradient, 8-bit RGB": gradientImage(3),
+    }
+    for name, (info, width, height, rows) in images.items():
+        print(f"{name}, {width}x{height}")
+        for mode, options in MODES.items():
+            writer = png.Writer(width, height, **info, **options)
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                output = io.BytesIO()
+                writer.write(output, rows)
+            seconds = (time.perf_counter() - start) / ROUNDS
+            print(f"  {mode:<14} {len(output.getvalue()):9} bytes {seconds * 1e3:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
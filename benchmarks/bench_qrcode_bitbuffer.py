@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+#
+# Micro-benchmark for qrcode data encoding: BitBuffer, QRData.write and
+# create_data() for 8-bit, alphanumeric and numeric payloads.
+#
+# The bit-per-bit BitBuffer and per-character QRData.write it replaced are
+# included for comparison and to check the encoded bytes are identical.
+#
+#   python3 benchmarks/bench_qrcode_bitbuffer.py
+
+
+import os
+import sys
+import timeit
+from bisect import bisect_left
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "..", "ext"))
+from qrcode import util  # noqa: E402
+
+NUMBER = 200
+
+PAYLOADS = {
+    "8-bit": (
+        util.MODE_8BIT_BYTE,
+        b"https://login.tailscale.com/a/1a2b3c4d5e6f7890abcdef?user=someone@example.com",
+    ),
+    "alphanumeric": (util.MODE_ALPHA_NUM, b"HTTPS://LOGIN.TAILSCALE.COM/A/1A2B3C4D5E6F" * 4),
+    "numeric": (util.MODE_NUMBER, b"0123456789" * 40),
+}
+
+
+class ListBitBuffer:
+    """
+    the list backed BitBuffer, appending one bit at a time
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.length = 0
+
+    def put(self, num, length):
+        for i in range(length):
+            self.put_bit(((num >> (length - i - 1)) & 1) == 1)
+
+    def put_bit(self, bit):
+        buf_index = self.length // 8
+        if len(self.buffer) <= buf_index:
+            self.buffer.append(0)
+        if bit:
+            self.buffer[buf_index] |= 0x80 >> (self.length % 8)
+        self.length += 1
+
+
+def writePerCharacter(data: util.QRData, buffer) -> None:
+    """
+    QRData.write as it was, with one put per character or character group
+    """
+    if data.mode == util.MODE_NUMBER:
+        for i in range(0, len(data.data), 3):
+            chars = data.data[i : i + 3]
+            buffer.put(int(chars), util.NUMBER_LENGTH[len(chars)])
+    elif data.mode == util.MODE_ALPHA_NUM:
+        for i in range(0, len(data.data), 2):
+            chars = data.data[i : i + 2]
+            if len(chars) > 1:
+                buffer.put(
+                    util.ALPHA_NUM.find(chars[0]) * 45 + util.ALPHA_NUM.find(chars[1]), 11
+                )
+            else:
+                buffer.put(util.ALPHA_NUM.find(chars), 6)
+    else:
+        for c in data.data:
+            buffer.put(c, 8)
+
+
+def listWrite(mode: int, payload: bytes) -> ListBitBuffer:
+    buffer = ListBitBuffer()
+    writePerCharacter(util.QRData(payload, mode=mode), buffer)
+    return buffer
+
+
+def intWrite(mode: int, payload: bytes) -> util.BitBuffer:
+    buffer = util.BitBuffer()
+    util.QRData(payload, mode=mode).write(buffer)
+    return buffer
+
+
+def main():
+    for name, (mode, payload) in PAYLOADS.items():
+        if listWrite(mode, payload).buffer != intWrite(mode, payload).buffer:
+            raise AssertionError(f"{name} payload encodes differently")
+
+        data_list = [util.QRData(payload, mode=mode)]
+        # smallest version the segment fits in, with the longest length field
+        version = bisect_left(
+            util.BIT_LIMIT_TABLE[0], 4 + 16 + intWrite(mode, payload).length, 1
+        )
+
+        print(f"{name} payload, {len(payload)} characters, version {version}")
+        for label, function in (
+            ("write, list", lambda: listWrite(mode, payload)),
+            ("write, int", lambda: intWrite(mode, payload)),
+            (
+                "create_data",
+                lambda: util.create_data(
+                    version, 0, [util.QRData(payload, mode=mode)]
+                ),
+            ),
+            (
+                "create_data, cached",
+                lambda: util.create_data(version, 0, data_list),
+            ),
+        ):
+            seconds = timeit.timeit(function, number=NUMBER)
+            print(f"  {label:<20} {seconds / NUMBER * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
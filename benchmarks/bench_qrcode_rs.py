@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+#
+# Benchmark Reed-Solomon encoding of qrcode.util.create_bytes() for every
+# version and error correction level.
+#
+# The table-driven encoder is compared with the previous Polynomial based
+# implementation, which is also used to check the output is identical.
+#
+#   python3 benchmarks/bench_qrcode_rs.py
+
+
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "..", "ext"))
+from qrcode import LUT, base, util  # noqa: E402
+
+ROUNDS = 3
+LEVELS = "LMQH"
+
+
+def createBytesPolynomial(buffer, rs_blocks):
+    """
+    create_bytes() as it was before the table-driven encoder
+    """
+    offset = 0
+    maxDcCount = 0
+    maxEcCount = 0
+    dcdata = []
+    ecdata = []
+
+    for rs_block in rs_blocks:
+        dcCount = rs_block.data_count
+        ecCount = rs_block.total_count - dcCount
+        maxDcCount = max(maxDcCount, dcCount)
+        maxEcCount = max(maxEcCount, ecCount)
+
+        current_dc = [0xFF & buffer.buffer[i + offset] for i in range(dcCount)]
+        offset += dcCount
+
+        rsPoly = base.Polynomial(LUT.rsPoly_LUT[ecCount], 0)
+        rawPoly = base.Polynomial(current_dc, len(rsPoly) - 1)
+        modPoly = rawPoly % rsPoly
+        current_ec = []
+        mod_offset = len(modPoly) - ecCount
+        for i in range(ecCount):
+            modIndex = i + mod_offset
+            current_ec.append(modPoly[modIndex] if (modIndex >= 0) else 0)
+
+        dcdata.append(current_dc)
+        ecdata.append(current_ec)
+
+    data = []
+    for i in range(maxDcCount):
+        for dc in dcdata:
+            if i < len(dc):
+                data.append(dc[i])
+    for i in range(maxEcCount):
+        for ec in ecdata:
+            if i < len(ec):
+                data.append(ec[i])
+    return data
+
+
+def filledBuffer(version: int, error_correction: int):
+    """
+    return a buffer filled with data codewords for the version and level
+    """
+    rs_blocks = base.rs_blocks(version, error_correction)
+    buffer = util.BitBuffer()
+    for i in range(sum(block.data_count for block in rs_blocks)):
+        buffer.put((i * 73 + version) % 256, 8)
+    return buffer, rs_blocks
+
+
+def main():
+    cases = [
+        (version, error_correction, *filledBuffer(version, error_correction))
+        for version in range(1, 41)
+        for error_correction in range(4)
+    ]
+
+    totals = {"polynomial": 0.0, "table": 0.0}
+    print("version  level  polynomial [ms]  table [ms]")
+    for version, error_correction, buffer, rs_blocks in cases:
+        expected = createBytesPolynomial(buffer, rs_blocks)
+        if util.create_bytes(buffer, rs_blocks) != expected:
+            raise AssertionError(f"version {version} level {error_correction} differs")
+
+        timings = {}
+        for name, function in (
+            ("polynomial", createBytesPolynomial),
+            ("table", util.create_bytes),
+        ):
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                function(buffer, rs_blocks)
+            timings[name] = (time.perf_counter() - start) / ROUNDS
+            totals[name] += timings[name]
+
+        print(
+            f"{version:7}  {LEVELS[base.RS_BLOCK_OFFSET[error_correction]]:>5}"
+            + f"  {timings['polynomial'] * 1e3:15.3f}  {timings['table'] * 1e3:10.3f}"
+        )
+
+    print(
+        f"total           {totals['polynomial'] * 1e3:15.3f}  {totals['table'] * 1e3:10.3f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
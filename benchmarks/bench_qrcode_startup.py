@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+#
+# Measure import time, time to the first rendered QR code and peak RSS of a
+# fresh interpreter for the default image factory, which tries PIL first, and
+# for the lightweight factories that never import PIL.
+#
+# Every case runs in its own python process, so the import cost is included.
+#
+#   python3 benchmarks/bench_qrcode_startup.py
+
+
+import json
+import os
+import subprocess
+import sys
+
+RUNS = 5
+EXT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ext")
+
+CHILD = """
+import resource, sys, time
+start = time.perf_counter()
+sys.path.insert(1, {ext!r})
+import qrcode
+from qrcode.image import get_lightweight_factory
+imported = time.perf_counter()
+factory = get_lightweight_factory({name!r}) if {name!r} else None
+qr = qrcode.QRCode(image_factory=factory)
+qr.add_data("https://login.tailscale.com/a/1a2b3c4d5e6f7")
+qr.make_image().save(open("/dev/null", "wb"))
+done = time.perf_counter()
+print(json.dumps([imported - start, done - start,
+    resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "PIL" in sys.modules]))
+"""
+
+
+def runChild(name: str) -> list:
+    code = "import json\n" + CHILD.format(ext=EXT_PATH, name=name)
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    print("factory    import [ms]  first code [ms]  max RSS [kB]  PIL imported")
+    for name in ("", "png", "svg-path", "packed"):
+        results = [runChild(name) for _ in range(RUNS)]
+        imported = min(result[0] for result in results)
+        done = min(result[1] for result in results)
+        rss = min(result[2] for result in results)
+        print(
+            f"{name or 'default':<9}  {imported * 1e3:11.1f}  {done * 1e3:15.1f}"
+            + f"  {rss:12}  {results[0][3]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
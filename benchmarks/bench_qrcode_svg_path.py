@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+#
+# Benchmark SvgPathImage generation with one subpath per horizontal run of
+# dark modules against one subpath per module, and the resulting SVG size.
+#
+#   python3 benchmarks/bench_qrcode_svg_path.py
+
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "..", "ext"))
+import qrcode  # noqa: E402
+from qrcode.image import svg  # noqa: E402
+from qrcode.image.styles.moduledrawers import svg as svg_drawers  # noqa: E402
+
+ROUNDS = 20
+
+
+class PerModuleDrawer(svg_drawers.SvgPathSquareDrawer):
+    """
+    the square drawer with one subpath per dark module, as before
+    """
+
+    def initialize(self, *args, **kwargs) -> None:
+        super().initialize(*args, **kwargs)
+        self.merge_runs = False
+
+
+def render(qr: qrcode.QRCode, perModule: bool) -> bytes:
+    kwargs = {}
+    if perModule:
+        kwargs = {"module_drawer": PerModuleDrawer(), "eye_drawer": PerModuleDrawer()}
+    img = qr.make_image(image_factory=svg.SvgPathImage, **kwargs)
+    stream = io.BytesIO()
+    img.save(stream)
+    return stream.getvalue()
+
+
+def main():
+    print("version  mode        subpaths     bytes  time [ms]")
+    for version in (4, 10, 20):
+        qr = qrcode.QRCode(version=version)
+        qr.add_data("https://login.tailscale.com/a/1a2b3c4d5e6f7")
+        qr.make(fit=False)
+        for perModule in (True, False):
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                output = render(qr, perModule)
+            seconds = (time.perf_counter() - start) / ROUNDS
+            mode = "per module" if perModule else "runs"
+            print(
+                f"{version:7}  {mode:<10}  {output.count(b'M'):8}  {len(output):8}"
+                + f"  {seconds * 1e3:9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+#
+# Benchmark QRCode.make() per code with the version template cache warm and
+# cold.
+#
+# Cold clears qrcode.main.precomputed_qr_templates before every code, so the
+# function patterns, data module order and mask bitmaps are built again.
+# The mask trials including the lost point evaluation are part of both.
+#
+#   python3 benchmarks/bench_qrcode_template.py
+
+
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "..", "ext"))
+import qrcode  # noqa: E402
+from qrcode import main as qrcode_main  # noqa: E402
+
+CODES = 10
+
+
+def makeCode(version: int) -> None:
+    qr = qrcode.QRCode(version=version)
+    qr.add_data("https://login.tailscale.com/a/1a2b3c4d5e6f7")
+    qr.make(fit=False)
+
+
+def run(version: int, cold: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(CODES):
+        if cold:
+            qrcode_main.precomputed_qr_templates.clear()
+        makeCode(version)
+    return (time.perf_counter() - start) / CODES
+
+
+def main():
+    print("version  cold [ms]  warm [ms]")
+    for version in (4, 6, 10, 20, 40):
+        makeCode(version)
+        cold = run(version, True)
+        warm = run(version, False)
+        print(f"{version:7}  {cold * 1e3:9.2f}  {warm * 1e3:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
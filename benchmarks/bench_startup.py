@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+#
+# Measure the time from starting tailscale-control.py until com.victronenergy.tailscale
+# answers GetValue on /State, and collect a -X importtime profile of the run.
+#
+# Modules imported before the first publish are listed separately from the
+# ones imported afterwards. The running service has to be stopped first:
+#   svc -d /service/tailscale-control
+#   python3 benchmarks/bench_startup.py [--cold] [--runs N]
+#   svc -u /service/tailscale-control
+#
+# --cold drops the page cache before every run (needs root), which is close to
+# the first start after boot.
+
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import dbus
+
+SERVICE_NAME = "com.victronenergy.tailscale"
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tailscale-control.py")
+TIMEOUT = 60
+TOP_IMPORTS = 15
+
+
+def dropCaches() -> None:
+    os.sync()
+    with open("/proc/sys/vm/drop_caches", "w") as f:
+        f.write("3\n")
+
+
+def waitForState(bus) -> None:
+    deadline = time.monotonic() + TIMEOUT
+    while time.monotonic() < deadline:
+        if bus.name_has_owner(SERVICE_NAME):
+            try:
+                bus.get_object(SERVICE_NAME, "/State", introspect=False).GetValue(
+                    dbus_interface="com.victronenergy.BusItem"
+                )
+                return
+            except dbus.exceptions.DBusException:
+                pass
+        time.sleep(0.005)
+    raise TimeoutError(f"{SERVICE_NAME} /State not published after {TIMEOUT} s")
+
+
+def parseImportTime(lines: list) -> list:
+    """
+    return (module, self [us], cumulative [us]) for every top level import
+    """
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        # nested imports are indented by two more spaces per level
+        if not name.startswith("  "):
+            imports.append((name.strip(), int(own), int(cumulative)))
+    return imports
+
+
+def run(bus, cold: bool) -> tuple:
+    if cold:
+        dropCaches()
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, "-X", "importtime", SCRIPT],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    # stderr is read while the controller runs, so the lines can be split
+    # into the ones written before and after the publish
+    lines = []
+
+    def readStderr():
+        for line in proc.stderr:
+            lines.append(line)
+
+    reader = threading.Thread(target=readStderr, daemon=True)
+    reader.start()
+    try:
+        waitForState(bus)
+        published = time.monotonic() - start
+        linesBefore = len(lines)
+        # give the lazily imported modules time to be loaded as well
+        time.sleep(2)
+    finally:
+        proc.terminate()
+        proc.wait()
+        reader.join()
+
+    return (
+        published,
+        parseImportTime(lines[:linesBefore]),
+        parseImportTime(lines[linesBefore:]),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cold", action="store_true", help="drop the page cache first")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    bus = dbus.SystemBus()
+    if bus.name_has_owner(SERVICE_NAME):
+        sys.exit(f"{SERVICE_NAME} is running, stop tailscale-control first")
+
+    results = [run(bus, args.cold) for _ in range(args.runs)]
+    for published, before, after in results:
+        print(f"time to first /State publish: {published * 1e3:8.1f} ms")
+
+    published, before, after = min(results, key=lambda result: result[0])
+    for title, imports in (("before publish", before), ("after publish", after)):
+        total = sum(entry[2] for entry in imports)
+        print(f"\nimports {title}: {total / 1e3:.1f} ms")
+        for name, own, cumulative in sorted(imports, key=lambda e: -e[2])[:TOP_IMPORTS]:
+            print(f"  {cumulative / 1e3:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
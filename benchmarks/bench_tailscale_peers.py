@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+#
+# Benchmark parsing the peer table of `tailscale status` once per mainLoop tick
+# for tailnets of 10, 100 and 1000 peers, where one peer connects or
+# disconnects every tick.
+#
+# The dict per peer parser of checkDeviceConnectionAndLog it replaced is
+# included for comparison and to check the transitions are identical.
+#
+#   python3 benchmarks/bench_tailscale_peers.py
+
+
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), ".."))
+from tailscale_status import PeerTable  # noqa: E402
+
+TICKS = 200
+
+
+def statusOutput(peers: int, active: int) -> str:
+    """
+    the output of tailscale status, with the peer at index active connected
+    """
+    lines = ["100.64.0.1       einstein-gx          someone@     linux   -"]
+    for i in range(peers):
+        if i == active:
+            status = "active; direct 192.168.1.23:41641, tx 52344 rx 98620"
+        else:
+            status = "idle, tx 1204 rx 3316"
+        lines.append(f"100.65.{i // 256}.{i % 256:<7} host-{i:<15} someone@     linux   {status}")
+    return "\n".join(lines)
+
+
+def parseDicts(stdout: str, previous: dict) -> tuple:
+    """
+    the previous parser, returns the devices and the names that connected or
+    disconnected
+    """
+    devicesList = {}
+    for line in stdout.strip().split("\n"):
+        components = line.split()
+        if len(components) <= 5:
+            continue
+        devicesList[components[0]] = {
+            "deviceName": components[1],
+            "userName": components[2],
+            "os": components[3],
+            "connected": True if "active" in " ".join(components[4:]) else False,
+        }
+
+    transitions = []
+    for ipAddress, properties in devicesList.items():
+        if ipAddress in previous:
+            if previous[ipAddress]["connected"] != properties["connected"]:
+                transitions.append(properties["deviceName"])
+        elif properties["connected"]:
+            transitions.append(properties["deviceName"])
+    return devicesList, transitions
+
+
+def main():
+    print("peers   dicts [us/tick]  PeerTable [us/tick]")
+    for peers in (10, 100, 1000):
+        outputs = [statusOutput(peers, tick % peers) for tick in range(TICKS)]
+
+        previous = {}
+        table = PeerTable()
+        for stdout in outputs:
+            previous, expected = parseDicts(stdout, previous)
+            transitions = [peer.name for peer in table.update(stdout)]
+            if sorted(transitions) != sorted(expected):
+                raise AssertionError(f"{peers} peers: transitions differ")
+
+        previous = {}
+        start = time.perf_counter()
+        for stdout in outputs:
+            previous, transitions = parseDicts(stdout, previous)
+        old = (time.perf_counter() - start) / TICKS
+
+        table = PeerTable()
+        start = time.perf_counter()
+        for stdout in outputs:
+            table.update(stdout)
+        new = (time.perf_counter() - start) / TICKS
+
+        print(f"{peers:5}  {old * 1e6:15.1f}  {new * 1e6:19.1f}")
+
+
+if __name__ == "__main__":
+    main()
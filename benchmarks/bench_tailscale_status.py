@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+#
+# Benchmark classifying `tailscale status` output with
+# tailscale_status.classifyStatus() on the fixture corpus and on peer tables of
+# growing size.
+#
+# The substring checks mainLoop used before are included for comparison. The
+# corpus also shows the outputs they classified wrongly.
+#
+#   python3 benchmarks/bench_tailscale_status.py
+
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), ".."))
+import tailscale_status  # noqa: E402
+from tailscale_status import classifyStatus  # noqa: E402
+
+NUMBER = 2000
+FIXTURES = os.path.join(
+    os.path.dirname(__file__), "..", "tests", "fixtures", "tailscale_status_synthetic.json"
+)
+
+
+def classifySubstrings(stdout: str, stderr: str, exitCode: int) -> tuple:
+    """
+    the substring checks of mainLoop, without the dependency on the previous state
+    """
+    if stdout is None or stderr is None:
+        return None, ""
+    elif "Failed to connect" in stderr:
+        return tailscale_status.STATE_CONNECTION_FAILED, ""
+    elif "Tailscale is stopped" in stdout:
+        return tailscale_status.STATE_STOPPED, ""
+    elif "Log in at" in stdout:
+        lines = stdout.splitlines()
+        return tailscale_status.STATE_WAIT_FOR_LOGIN, lines[1].replace("Log in at: ", "")
+    elif "Logged out" in stdout:
+        return tailscale_status.STATE_LOGGED_OUT, ""
+    elif "NoState" in stdout:
+        return tailscale_status.STATE_NO_STATE, ""
+    elif exitCode == 0:
+        return tailscale_status.STATE_CONNECTION_OK, ""
+    return None, ""
+
+
+def peerTable(peers: int) -> str:
+    return "\n".join(
+        f"100.64.{i // 256}.{i % 256}  host-{i:<12}  someone@  linux   idle, tx 1 rx 2"
+        for i in range(peers)
+    )
+
+
+def timed(function, *args) -> float:
+    return timeit.timeit(lambda: function(*args), number=NUMBER) / NUMBER
+
+
+def main():
+    with open(FIXTURES) as file:
+        cases = json.load(file)
+
+    print(f"{'fixture':<44} substrings [us]  classifier [us]")
+    for case in cases:
+        stdout = None if case["stdout"] is None else "\n".join(case["stdout"])
+        stderr = None if case["stderr"] is None else "\n".join(case["stderr"])
+        args = (stdout, stderr, case["exitCode"])
+        expected = (case["state"], case["loginLink"])
+
+        if tuple(classifyStatus(*args)) != expected:
+            raise AssertionError(f"{case['name']} ({case['modelledOn']}) classified wrongly")
+        wrong = " (wrong)" if classifySubstrings(*args) != expected else ""
+
+        name = f"{case['name']} ({case['modelledOn']})"
+        print(
+            f"{name:<44} {timed(classifySubstrings, *args) * 1e6:15.2f}"
+            + f"  {timed(classifyStatus, *args) * 1e6:15.2f}{wrong}"
+        )
+
+    for peers in (10, 100, 1000):
+        args = (peerTable(peers), "", 0)
+        name = f"connected, {peers} peers"
+        print(
+            f"{name:<44} {timed(classifySubstrings, *args) * 1e6:15.2f}"
+            + f"  {timed(classifyStatus, *args) * 1e6:15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+#
+# Micro-benchmark for ve_utils.wrap_dbus_value / unwrap_dbus_value.
+#
+# Every payload is first checked against the isinstance chain the dispatch
+# tables fall back to, so the fast path can not change the result: same
+# value, same type and same variant level.
+#
+#   python3 benchmarks/bench_ve_utils_wrap.py
+
+
+import os
+import sys
+import timeit
+
+import dbus
+
+sys.path.insert(
+    1, os.path.join(os.path.dirname(__file__), "..", "ext", "velib_python")
+)
+import ve_utils  # noqa: E402
+
+NUMBER = 100000
+
+# values as they are exported by tailscale-control and typical GX services
+PAYLOADS = {
+    "invalid": None,
+    "zero": 0,
+    "one": 1,
+    "int": 4711,
+    "int64": 2**40,
+    "float": 230.4,
+    "bool": True,
+    "empty string": "",
+    "string": "100.64.0.1",
+    "list": [1, 2, 3],
+    "dict": {"a": 1, "b": "x"},
+}
+
+
+def check(reference, fast, value) -> None:
+    """
+    raise if the dispatch result differs from the isinstance chain
+    """
+    expected = reference(value)
+    result = fast(value)
+    if (
+        type(result) is not type(expected)
+        or result != expected
+        or getattr(result, "variant_level", 0) != getattr(expected, "variant_level", 0)
+    ):
+        raise AssertionError(f"{fast.__name__}({value!r}): {result!r} != {expected!r}")
+
+
+def run(name: str, function, value) -> None:
+    seconds = timeit.timeit(lambda: function(value), number=NUMBER)
+    print(f"  {name:<16} {seconds / NUMBER * 1e9:8.0f} ns/call")
+
+
+def main():
+    wrapped = {}
+    for name, value in PAYLOADS.items():
+        check(ve_utils._wrap_dbus_value_chain, ve_utils.wrap_dbus_value, value)
+        wrapped[name] = ve_utils.wrap_dbus_value(value)
+        check(ve_utils._unwrap_dbus_value_chain, ve_utils.unwrap_dbus_value, wrapped[name])
+
+    # values coming from other services are dbus types without variant level too
+    wrapped["plain Int32"] = dbus.Int32(12)
+    wrapped["plain String"] = dbus.String("Running")
+    for name in ("plain Int32", "plain String"):
+        check(ve_utils._unwrap_dbus_value_chain, ve_utils.unwrap_dbus_value, wrapped[name])
+
+    print("wrap_dbus_value")
+    for name, value in PAYLOADS.items():
+        run(name, ve_utils.wrap_dbus_value, value)
+    print("wrap_dbus_value, isinstance chain")
+    for name, value in PAYLOADS.items():
+        run(name, ve_utils._wrap_dbus_value_chain, value)
+
+    print("unwrap_dbus_value")
+    for name, value in wrapped.items():
+        run(name, ve_utils.unwrap_dbus_value, value)
+    print("unwrap_dbus_value, isinstance chain")
+    for name, value in wrapped.items():
+        run(name, ve_utils._unwrap_dbus_value_chain, value)
+
+
+if __name__ == "__main__":
+    main()
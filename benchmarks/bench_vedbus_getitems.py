@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+#
+# Benchmark VeDbusRootExport.GetItems() on a large exported service.
+#
+# Measures repeated GetItems calls on an idle service (snapshot reused),
+# with a few changed paths between calls (snapshot rebuilt from the cached
+# entries) and the cost of a full rewrap of every path for comparison.
+#
+# Needs dbus-python and a session or system bus, like the service itself:
+#   dbus-run-session -- python3 benchmarks/bench_vedbus_getitems.py
+
+
+import os
+import sys
+import timeit
+
+import dbus
+from dbus.mainloop.glib import DBusGMainLoop
+
+sys.path.insert(
+    1, os.path.join(os.path.dirname(__file__), "..", "ext", "velib_python")
+)
+from vedbus import VeDbusService  # noqa: E402
+from ve_utils import wrap_dbus_value  # noqa: E402
+
+PATHS = 2000
+CALLS = 200
+
+
+def createService() -> VeDbusService:
+    """
+    create a service with PATHS exported paths of mixed types
+    """
+    service = VeDbusService("com.victronenergy.benchmark", register=False)
+    for i in range(PATHS):
+        if i % 3 == 0:
+            service.add_path(f"/Group{i % 20}/Value{i}", i)
+        elif i % 3 == 1:
+            service.add_path(f"/Group{i % 20}/Value{i}", i * 0.5)
+        else:
+            service.add_path(f"/Group{i % 20}/Value{i}", f"text {i}")
+    return service
+
+
+def fullRewrap(service: VeDbusService) -> dict:
+    """
+    the GetItems implementation without snapshot, for comparison
+    """
+    return {
+        path: {
+            "Value": wrap_dbus_value(item.local_get_value()),
+            "Text": item.GetText(),
+        }
+        for path, item in service._dbusobjects.items()
+    }
+
+
+def main():
+    DBusGMainLoop(set_as_default=True)
+    service = createService()
+    root = service._dbusnodes["/"]
+    paths = list(service._dbusobjects.keys())[::100]
+    counter = [0]
+
+    def changeSome():
+        counter[0] += 1
+        for path in paths:
+            service[path] = counter[0]
+        root.GetItems()
+
+    results = {
+        "full rewrap": timeit.timeit(lambda: fullRewrap(service), number=CALLS),
+        "snapshot, idle": timeit.timeit(root.GetItems, number=CALLS),
+        f"snapshot, {len(paths)} changes": timeit.timeit(changeSome, number=CALLS),
+    }
+
+    print(f"GetItems over {PATHS} paths, {CALLS} calls")
+    for name, seconds in results.items():
+        print(f"  {name:<24} {seconds / CALLS * 1e6:10.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#
+# Journal of peer connect and disconnect events, kept in a file of fixed size on /data
+#
+# The file is a ring of fixed-width records. The record with sequence number s is
+# stored in slot (s - 1) % capacity, so the newest record and the first record
+# since a timestamp are found with a binary search, and queries read only the
+# records they return. New records are kept in memory and written together by
+# flush(), to limit flash wear.
+
+
+import os
+import socket
+import struct
+import zlib
+from typing import List, NamedTuple
+
+JOURNAL_RECORDS = 4096
+# write when this many records are pending, even if flush() was not called
+JOURNAL_FLUSH_RECORDS = 64
+
+# bytes of UTF-8 kept of the peer name
+NAME_BYTES = 23
+# sequence number, unix timestamp, IPv4 address, event, name (zero padded)
+RECORD_BODY = struct.Struct(f"<Qq4sB{NAME_BYTES}s")
+# the body followed by its CRC-32
+RECORD = struct.Struct(RECORD_BODY.format + "I")
+SEQUENCE = struct.Struct("<Q")
+
+EVENT_DISCONNECTED = 0
+EVENT_CONNECTED = 1
+EVENT_NAMES = {EVENT_DISCONNECTED: "disconnected", EVENT_CONNECTED: "connected"}
+
+
+class JournalEvent(NamedTuple):
+    """
+    a journal record
+    """
+
+    timestamp: int
+    ipAddress: str
+    name: str
+    event: int
+
+
+class ConnectionJournal:
+    """
+    append-only journal of JournalEvent, the oldest records are overwritten
+    once capacity records were written
+
+    OSError is raised, if the file can't be opened, read or written
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = JOURNAL_RECORDS,
+        flushRecords: int = JOURNAL_FLUSH_RECORDS,
+    ):
+        self.path = path
+        self.capacity = capacity
+        self.flushRecords = flushRecords
+        # records not written yet, oldest first
+        self.pending = []
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        try:
+            size = capacity * RECORD.size
+            # a new file, or one with another capacity, starts empty
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+
+            # sequence number of the newest record in the file, 0 if it is empty
+            self.sequence = self._findSequence()
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def _readSequence(self, slot: int) -> int:
+        return SEQUENCE.unpack(os.pread(self._fd, SEQUENCE.size, slot * RECORD.size))[0]
+
+    def _findSequence(self) -> int:
+        """
+        returns the sequence number of the newest record, with a binary search
+        """
+        first = self._readSequence(0)
+        if first == 0:
+            return 0
+
+        # slot i holds first + i up to the newest record,
+        # the slots after it hold older records or are empty
+        low = 0
+        high = self.capacity - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._readSequence(middle) == first + middle:
+                low = middle
+            else:
+                high = middle - 1
+
+        return first + low
+
+    def append(self, timestamp: int, ipAddress: str, name: str, event: int) -> None:
+        """
+        # adds a record, it is written by the next flush()
+        #
+        # :param timestamp: unix timestamp
+        # :param ipAddress: tailscale IPv4 address of the peer
+        # :param name: name of the peer, cut to NAME_BYTES bytes
+        # :param event: EVENT_CONNECTED or EVENT_DISCONNECTED
+        """
+        self.pending.append(JournalEvent(int(timestamp), ipAddress, name, event))
+
+        if len(self.pending) >= self.flushRecords:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        writes the pending records with at most two writes and one fsync
+        """
+        if not self.pending:
+            return
+
+        # records that would be overwritten right away are not written at all
+        skipped = max(0, len(self.pending) - self.capacity)
+        sequence = self.sequence + skipped
+        data = bytearray()
+
+        for event in self.pending[skipped:]:
+            sequence += 1
+            try:
+                address = socket.inet_aton(event.ipAddress)
+            except OSError:
+                address = bytes(4)
+            body = RECORD_BODY.pack(
+                sequence,
+                event.timestamp,
+                address,
+                event.event,
+                event.name.encode("utf-8"),
+            )
+            data += body + struct.pack("<I", zlib.crc32(body))
+
+        slot = (self.sequence + skipped) % self.capacity
+        split = (self.capacity - slot) * RECORD.size
+        os.pwrite(self._fd, data[:split], slot * RECORD.size)
+        if len(data) > split:
+            os.pwrite(self._fd, data[split:], 0)
+        os.fsync(self._fd)
+
+        self.sequence = sequence
+        self.pending.clear()
+
+    def _read(self, sequence: int, count: int) -> List[JournalEvent]:
+        """
+        returns count records from the file, starting with sequence number sequence,
+        records that are damaged or were not written completely are left out
+        """
+        slot = (sequence - 1) % self.capacity
+        first = min(count, self.capacity - slot)
+        data = os.pread(self._fd, first * RECORD.size, slot * RECORD.size)
+        if count > first:
+            data += os.pread(self._fd, (count - first) * RECORD.size, 0)
+
+        events = []
+        offset = 0
+        for recordSequence, timestamp, address, event, name, crc in RECORD.iter_unpack(data):
+            if recordSequence == sequence and crc == zlib.crc32(
+                data[offset : offset + RECORD_BODY.size]
+            ):
+                events.append(
+                    JournalEvent(
+                        timestamp,
+                        socket.inet_ntoa(address),
+                        name.rstrip(b"\0").decode("utf-8", "ignore"),
+                        event,
+                    )
+                )
+            sequence += 1
+            offset += RECORD.size
+
+        return events
+
+    def _oldestSequence(self) -> int:
+        return max(1, self.sequence - self.capacity + 1)
+
+    def last(self, count: int) -> List[JournalEvent]:
+        """
+        returns the newest count records, oldest first
+        """
+        if count <= 0:
+            return []
+        if count <= len(self.pending):
+            return self.pending[-count:]
+
+        count = min(count - len(self.pending), self.sequence - self._oldestSequence() + 1)
+        events = self._read(self.sequence - count + 1, count) if count > 0 else []
+
+        return events + self.pending
+
+    def since(self, timestamp: int) -> List[JournalEvent]:
+        """
+        returns the records with a timestamp from timestamp on, oldest first
+
+        the records are searched assuming their timestamps increase, records from
+        before the clock was set on boot may be left out
+        """
+        # first sequence number with a timestamp from timestamp on, binary search
+        low = self._oldestSequence()
+        high = self.sequence + 1
+        while low < high:
+            middle = (low + high) // 2
+            slot = (middle - 1) % self.capacity
+            recordTimestamp = RECORD.unpack(
+                os.pread(self._fd, RECORD.size, slot * RECORD.size)
+            )[1]
+            if recordTimestamp < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+
+        count = self.sequence - low + 1
+        events = self._read(low, count) if count > 0 else []
+
+        return events + [event for event in self.pending if event.timestamp >= timestamp]
+
+    def close(self) -> None:
+        """
+        writes the pending records and closes the file
+        """
+        try:
+            self.flush()
+        finally:
+            os.close(self._fd)
@@ -175,6 +175,7 @@ import collections
 import io   # For io.BytesIO
 import itertools
 import math
+import mmap
 # http://www.python.org/doc/2.4.4/lib/module-operator.html
 import operator
 import re
@@ -371,7 +372,10 @@ class Writer:
                  chunk_limit=2**20,
                  x_pixels_per_unit=None,
                  y_pixels_per_unit=None,
-                 unit_is_meter=False):
+                 unit_is_meter=False,
+                 adaptive_filter=False,
+                 compression_strategy=None,
+                 compression_mem_level=None):
         """
         Create a PNG encoder object.
 
@@ -398,6 +402,15 @@ class Writer:
         compression
           zlib compression level: 0 (none) to 9 (more compressed);
           default: -1 or None.
+        compression_strategy
+          zlib compression strategy, e.g. ``zlib.Z_RLE``;
+          default: ``zlib.Z_DEFAULT_STRATEGY`` or None.
+        compression_mem_level
+          zlib memory level: 1 (least memory) to 9 (fastest);
+          default: 8 or None.
+        adaptive_filter
+          Choose the filter type of each row
+          (non-interlaced, 8- and 16-bit only).
         interlace
           Create an interlaced image.
         chunk_limit
@@ -501,6 +514,18 @@ class Writer:
         0 means no compression.
         -1 and ``None`` both mean that the ``zlib`` module uses
         the default level of compression (which is generally acceptable).
+        `compression_strategy` and `compression_mem_level` are passed to
+        ``zlib.compressobj`` as well.
+        ``zlib.Z_RLE`` is often both faster and smaller
+        for bitmaps with long runs, like 1-bit images.
+
+        If `adaptive_filter` is true, each row of a non-interlaced image
+        is written with the filter type (see :func:`filter_scanline`)
+        that gives the smallest sum of absolute differences,
+        the heuristic suggested by the PNG specification.
+        Otherwise, and for interlaced, colour mapped and
+        less than 8-bit images,
+        every row is written with filter type 0 (None).
 
         If `interlace` is true then an interlaced image is created
         (using PNG's so far only interlace method, *Adam7*).
@@ -543,6 +568,11 @@ class Writer:
             raise ProtocolError(
                 "transparent colour not allowed with alpha channel")
 
+        if (compression_mem_level is not None and
+                not 1 <= compression_mem_level <= 9):
+            raise ProtocolError(
+                "compression_mem_level must be between 1 and 9")
+
         # bitdepth is either single integer, or tuple of integers.
         # Convert to tuple.
         try:
@@ -602,6 +632,9 @@ class Writer:
         self.colormap = colormap
         self.bitdepth = int(bitdepth)
         self.compression = compression
+        self.compression_strategy = compression_strategy
+        self.compression_mem_level = compression_mem_level
+        self.adaptive_filter = bool(adaptive_filter)
         self.chunk_limit = chunk_limit
         self.interlace = bool(interlace)
         self.palette = palette
@@ -723,10 +756,24 @@ class Writer:
         self.write_preamble(outfile)
 
         # http://www.w3.org/TR/PNG/#11IDAT
-        if self.compression is not None:
-            compressor = zlib.compressobj(self.compression)
-        else:
-            compressor = zlib.compressobj()
+        compressor = zlib.compressobj(
+            -1 if self.compression is None else self.compression,
+            zlib.DEFLATED,
+            zlib.MAX_WBITS,
+            zlib.DEF_MEM_LEVEL if self.compression_mem_level is None
+            else self.compression_mem_level,
+            zlib.Z_DEFAULT_STRATEGY if self.compression_strategy is None
+            else self.compression_strategy)
+
+        # Filter types are only chosen for straightlaced images,
+        # see the comment in the loop below, and like the PNG
+        # specification recommends, not for bit depths below 8 and
+        # colour mapped images, where None usually works best.
+        adaptive = (self.adaptive_filter and not self.interlace and
+                    self.bitdepth >= 8 and not self.colormap)
+        # Filter unit, in bytes; see :meth:`Reader.undo_filter`.
+        fu = max(1, self.bitdepth * self.planes // 8)
+        previous = None
 
         # data accumulates bytes to be compressed for the IDAT chunk;
         # it's compressed when sufficiently large.
@@ -736,15 +783,22 @@ class Writer:
         # sets i to 0 on the first pass
         i = -1
         for i, row in enumerate(rows):
-            # Add "None" filter type.
-            # Currently, it's essential that this filter type be used
-            # for every scanline as
-            # we do not mark the first row of a reduced pass image;
-            # that means we could accidentally compute
-            # the wrong filtered scanline if we used
-            # "up", "average", or "paeth" on such a line.
-            data.append(0)
-            data.extend(row)
+            if adaptive:
+                row = bytes(row)
+                filter_type, filtered = choose_filter(fu, row, previous)
+                previous = row
+                data.append(filter_type)
+                data.extend(filtered)
+            else:
+                # Add "None" filter type.
+                # Currently, it's essential that this filter type be used
+                # for every scanline of an interlaced image as
+                # we do not mark the first row of a reduced pass image;
+                # that means we could accidentally compute
+                # the wrong filtered scanline if we used
+                # "up", "average", or "paeth" on such a line.
+                data.append(0)
+                data.extend(row)
             if len(data) > self.chunk_limit:
                 compressed = compressor.compress(data)
                 if len(compressed):
@@ -934,6 +988,113 @@ def write_chunks(out, chunks):
         write_chunk(out, *chunk)
 
 
+# Signed magnitude of a filtered byte, for the filter heuristic.
+signed_abs = bytes(min(x, 256 - x) for x in range(256))
+
+# Masks for bytewise arithmetic on whole rows held in an int,
+# by row length.
+_byte_masks = {}
+
+
+def byte_masks(n):
+    """
+    Return the (high, low) masks for a row of `n` bytes:
+    every byte 0x80, and every byte 0x7f.
+    """
+
+    masks = _byte_masks.get(n)
+    if masks is None:
+        ones = int.from_bytes(b'\x01' * n, 'big')
+        masks = _byte_masks[n] = (ones * 0x80, ones * 0x7f)
+    return masks
+
+
+def bytes_sub(x, y, high, low):
+    """
+    Subtract each byte of `y` from the corresponding byte of `x`,
+    modulo 256, where `x` and `y` are rows of bytes as big-endian ints.
+    """
+
+    return ((x | high) - (y & low)) ^ ((x ^ ~y) & high)
+
+
+def bytes_add(x, y, high, low):
+    """
+    Add the bytes of `x` and `y` modulo 256,
+    where `x` and `y` are rows of bytes as big-endian ints.
+    """
+
+    return ((x & low) + (y & low)) ^ ((x ^ y) & high)
+
+
+def filter_scanline(filter_type, filter_unit, line, previous):
+    """
+    Apply the PNG filter `filter_type` to `line`, which is a row of
+    packed bytes without the filter type byte.
+    `previous` is the previous unfiltered row,
+    or ``None`` for the first row.
+    Return the filtered row as bytes.
+    """
+
+    n = len(line)
+    if filter_type == 0:
+        return bytes(line)
+    if previous is None:
+        previous = bytes(n)
+
+    high, low = byte_masks(n)
+    x = int.from_bytes(line, 'big')
+    # In a big-endian int, shifting right moves every byte
+    # one filter unit further along the row.
+    a = x >> (8 * filter_unit)
+    b = int.from_bytes(previous, 'big')
+
+    if filter_type == 1:
+        predictor = a
+    elif filter_type == 2:
+        predictor = b
+    elif filter_type == 3:
+        # (a + b) >> 1 without carries between bytes.
+        predictor = (a & b) + (((a ^ b) >> 1) & low)
+    elif filter_type == 4:
+        result = bytearray()
+        pad = bytes(min(filter_unit, n))
+        for x, a, b, c in zip(line, pad + line[:n - filter_unit],
+                              previous, pad + previous[:n - filter_unit]):
+            p = a + b - c
+            pa = abs(p - a)
+            pb = abs(p - b)
+            pc = abs(p - c)
+            if pa <= pb and pa <= pc:
+                pr = a
+            elif pb <= pc:
+                pr = b
+            else:
+                pr = c
+            result.append((x - pr) & 0xff)
+        return bytes(result)
+    else:
+        raise ProtocolError("invalid filter type %r" % (filter_type,))
+
+    return bytes_sub(x, predictor, high, low).to_bytes(n, 'big')
+
+
+def choose_filter(filter_unit, line, previous):
+    """
+    Choose the filter for `line` with the smallest sum of
+    absolute differences.
+    Return the filter type and the filtered row.
+    """
+
+    best = None
+    for filter_type in range(5):
+        filtered = filter_scanline(filter_type, filter_unit, line, previous)
+        cost = sum(filtered.translate(signed_abs))
+        if best is None or cost < best[0]:
+            best = (cost, filter_type, filtered)
+    return best[1:]
+
+
 def rescale_rows(rows, rescale):
     """
     Take each row in rows (an iterator) and yield
@@ -942,11 +1103,17 @@ def rescale_rows(rows, rescale):
     Each element of `rescale` is a tuple of
     (source_bitdepth, target_bitdepth),
     with one element per channel.
+    A sample outside the source bit depth raises :class:`ValueError`.
     """
 
     # One factor for each channel
     fs = [float(2 ** s[1] - 1)/float(2 ** s[0] - 1)
           for s in rescale]
+    # and the rescaled value for every source value,
+    # so each sample is a lookup.
+    # Dictionaries, so that negative samples are not taken from the end.
+    tables = [{x: int(round(f * x)) for x in range(2 ** s[0])}
+              for f, s in zip(fs, rescale)]
 
     # Assume all target_bitdepths are the same
     target_bitdepths = set(s[1] for s in rescale)
@@ -957,48 +1124,52 @@ def rescale_rows(rows, rescale):
     # Number of channels
     n_chans = len(rescale)
 
-    for row in rows:
-        rescaled_row = array(typecode, iter(row))
-        for i in range(n_chans):
-            channel = array(
-                typecode,
-                (int(round(fs[i] * x)) for x in row[i::n_chans]))
-            rescaled_row[i::n_chans] = channel
-        yield rescaled_row
+    try:
+        if n_chans == 1:
+            lookup = tables[0].__getitem__
+            for row in rows:
+                yield array(typecode, map(lookup, row))
+            return
+
+        for row in rows:
+            rescaled_row = array(typecode, [0]) * len(row)
+            for i in range(n_chans):
+                rescaled_row[i::n_chans] = array(
+                    typecode, map(tables[i].__getitem__, row[i::n_chans]))
+            yield rescaled_row
+    except KeyError as e:
+        raise ValueError(
+            "sample %r out of range for the bit depth" % e.args[0]) from None
+
+
+# The digit for each sample value, so that a row of samples
+# can be read as a single base 2, 4 or 16 number.
+# 'g' is not a digit in any of these bases.
+_sample_digits = b'0123456789abcdef' + b'g' * 240
 
 
 def pack_rows(rows, bitdepth):
     """Yield packed rows that are a byte array.
     Each byte is packed with the values from several pixels.
+    A sample outside the bit depth raises :class:`ValueError`.
     """
 
     assert bitdepth < 8
     assert 8 % bitdepth == 0
 
-    # samples per byte
-    spb = int(8 / bitdepth)
-
-    def make_byte(block):
-        """Take a block of (2, 4, or 8) values,
-        and pack them into a single byte.
-        """
-
-        res = 0
-        for v in block:
-            res = (res << bitdepth) + v
-        return res
+    base = 2 ** bitdepth
 
     for row in rows:
-        a = bytearray(row)
-        # Adding padding bytes so we can group into a whole
-        # number of spb-tuples.
-        n = float(len(a))
-        extra = math.ceil(n / spb) * spb - n
-        a.extend([0] * int(extra))
-        # Pack into bytes.
-        # Each block is the samples for one byte.
-        blocks = group(a, spb)
-        yield bytearray(make_byte(block) for block in blocks)
+        try:
+            a = bytes(row)
+            # The last byte is padded with zero bits.
+            n = (len(a) * bitdepth + 7) // 8
+            padding = n * 8 - len(a) * bitdepth
+            packed = int(a.translate(_sample_digits), base) << padding
+        except ValueError:
+            raise ValueError(
+                "sample out of range for bit depth %d" % bitdepth) from None
+        yield bytearray(packed.to_bytes(n, 'big'))
 
 
 def unpack_rows(rows):
@@ -1404,6 +1575,15 @@ class Reader:
         checksum = self.file.read(4)
         if len(checksum) != 4:
             raise ChunkError('Chunk %s too short for checksum.' % type)
+        self._verify_checksum(type, data, checksum, lenient)
+        return type, data
+
+    def _verify_checksum(self, type, data, checksum, lenient):
+        """
+        Check the CRC of a chunk against its 4 byte `checksum`.
+        `data` can be any bytes-like object, including a memoryview.
+        """
+
         verify = zlib.crc32(type)
         verify = zlib.crc32(data, verify)
         verify = struct.pack('!I', verify)
@@ -1416,7 +1596,6 @@ class Reader:
                 warnings.warn(message, RuntimeWarning)
             else:
                 raise ChunkError(message)
-        return type, data
 
     def chunks(self):
         """Return an iterator that will yield each chunk as a
@@ -1465,12 +1644,15 @@ class Reader:
         # byte is used instead.
         fu = max(1, self.psize)
 
-        # For the first line of a pass, synthesize a dummy previous
-        # line.  An alternative approach would be to observe that on the
-        # first line 'up' is the same as 'null', 'paeth' is the same
-        # as 'sub', with only 'average' requiring any special case.
+        # For the first line of a pass, observe that
+        # 'up' is the same as 'null' and 'paeth' is the same as 'sub'.
+        # For 'average' synthesize a dummy previous line.
         if not previous:
-            previous = bytearray([0] * len(scanline))
+            if filter_type == 2:
+                return result
+            if filter_type == 4:
+                filter_type = 1
+            previous = bytearray(len(scanline))
 
         # Call appropriate filter algorithm.  Note that 0 has already
         # been dealt with.
@@ -1653,6 +1835,15 @@ class Reader:
         x = self.file.read(8)
         if not x:
             return None
+        return self._unpack_len_type(x)
+
+    def _unpack_len_type(self, x):
+        """
+        Unpack and validate the 8 byte length and type
+        that start a chunk;
+        return a (*length*, *type*) pair.
+        """
+
         if len(x) != 8:
             raise FormatError(
                 'End of file whilst reading chunk length and type.')
@@ -1855,6 +2046,14 @@ class Reader:
             rows = rows_from_interlace()
         else:
             rows = self._iter_bytes_to_values(self._iter_straight_packed(raw))
+        return self.width, self.height, rows, self._info()
+
+    def _info(self):
+        """
+        The info dictionary returned by :meth:`read`,
+        built from the chunks processed so far.
+        """
+
         info = dict()
         for attr in 'greyscale alpha planes bitdepth interlace'.split():
             info[attr] = getattr(self, attr)
@@ -1869,7 +2068,158 @@ class Reader:
                                           self.unit_is_meter)
         if self.plte:
             info['palette'] = self.palette()
-        return self.width, self.height, rows, info
+        return info
+
+    def read_packed(self, lenient=False, buffer_size=2**16):
+        """
+        Read the PNG file and decode it with bounded memory.
+        Returns (`width`, `height`, `rows`, `info`) like :meth:`read`,
+        but each row is in *packed* format
+        (see the module documentation),
+        as a ``memoryview`` of a row buffer that is reused:
+        a row is only valid until the next one is requested,
+        so copy it with ``bytes(row)`` if it has to be kept.
+
+        When the input is a file the rest of it is memory-mapped
+        and the chunks are walked without copying them;
+        ``bytes`` input is used in place.
+        Other inputs, like pipes, are read one chunk at a time.
+        ``IDAT`` data is decompressed `buffer_size` bytes at a time,
+        so the memory used does not depend on the image height.
+
+        Interlaced images cannot be streamed this way,
+        they raise :class:`ProtocolError`.
+
+        If the optional `lenient` argument evaluates to True,
+        checksum failures will raise warnings rather than exceptions.
+        """
+
+        self.preamble(lenient=lenient)
+        if self.interlace:
+            raise ProtocolError(
+                "read_packed() cannot stream an interlaced image.")
+        if self.colormap and not self.plte:
+            warnings.warn("PLTE chunk is required before IDAT chunk")
+        return (self.width, self.height,
+                self._iter_mapped_rows(lenient, buffer_size), self._info())
+
+    def _iter_mapped_rows(self, lenient, buffer_size):
+        """
+        Iterator that decompresses the ``IDAT`` chunks
+        and yields each row, unfiltered, as a view of a row buffer.
+        The previous row is the other one of two buffers,
+        which swap roles for every row.
+        """
+
+        rb = self.row_bytes
+        rows = [bytearray(rb), bytearray(rb)]
+        views = [memoryview(rows[0]), memoryview(rows[1])]
+        chunks = self._iter_mapped_idat(lenient)
+        d = zlib.decompressobj()
+
+        def decompressed():
+            """Yield the decompressed data in blocks of bounded size."""
+            for data in chunks:
+                # Feed the chunk in slices, so that unconsumed_tail
+                # never copies more than `buffer_size` bytes.
+                for i in range(0, len(data), buffer_size):
+                    with data[i: i + buffer_size] as piece:
+                        yield d.decompress(piece, buffer_size)
+                    while d.unconsumed_tail:
+                        yield d.decompress(d.unconsumed_tail, buffer_size)
+            yield d.flush()
+
+        # Decompressed data not yet used.
+        pending = bytearray()
+        previous = None
+        current = 0
+        try:
+            for some_bytes in decompressed():
+                pending += some_bytes
+                start = 0
+                while len(pending) - start > rb:
+                    row = rows[current]
+                    filter_type = pending[start]
+                    with memoryview(pending) as view:
+                        row[:] = view[start + 1: start + rb + 1]
+                    start += rb + 1
+                    self.undo_filter(filter_type, row, previous)
+                    yield views[current]
+                    previous = row
+                    current ^= 1
+                del pending[:start]
+            if len(pending) != 0:
+                # :file:format We get here with a file format error:
+                # when the available bytes (after decompressing) do not
+                # pack into exact rows.
+                raise FormatError('Wrong size for decompressed IDAT chunk.')
+        finally:
+            chunks.close()
+
+    def _iter_mapped_idat(self, lenient):
+        """
+        Iterator that yields the data of each ``IDAT`` chunk
+        as a ``memoryview`` of the mapped input, until ``IEND``.
+        The views are released when the next chunk is requested.
+        The :meth:`preamble` must have been read,
+        with the file positioned in the first ``IDAT`` chunk.
+        """
+
+        buffer, offset = self._map_input()
+        if buffer is None:
+            # Not mappable, read one chunk at a time.
+            while True:
+                type, data = self.chunk(lenient=lenient)
+                if type == b'IEND':
+                    return
+                if type == b'IDAT':
+                    yield memoryview(data)
+
+        length, type = self.atchunk
+        self.atchunk = None
+        try:
+            with memoryview(buffer) as view:
+                while True:
+                    end = offset + length
+                    if end + 4 > len(view):
+                        raise ChunkError(
+                            'Chunk %s too short for required %i octets.'
+                            % (type, length))
+                    with view[offset: end] as data, \
+                            view[end: end + 4] as checksum:
+                        self._verify_checksum(type, data, checksum, lenient)
+                        offset = end + 4
+                        if type == b'IEND':
+                            # http://www.w3.org/TR/PNG/#11IEND
+                            break
+                        if type == b'IDAT':
+                            yield data
+                    if offset == len(view):
+                        raise ChunkError("No more chunks.")
+                    with view[offset: offset + 8] as x:
+                        length, type = self._unpack_len_type(x)
+                    offset += 8
+        finally:
+            self.file.seek(offset)
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+            else:
+                buffer.release()
+
+    def _map_input(self):
+        """
+        Return (*buffer*, *offset*) for the input,
+        where *offset* is the current file position in *buffer*;
+        or (``None``, ``None``) if the input cannot be mapped.
+        """
+
+        if isinstance(self.file, io.BytesIO):
+            return self.file.getbuffer(), self.file.tell()
+        try:
+            buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            return None, None
+        return buffer, self.file.tell()
 
     def read_flat(self):
         """
@@ -2234,61 +2584,67 @@ def is_natural(x):
     return is_integer and x >= 0
 
 
+# Offset of the least significant byte of an 8 byte native integer.
+_low_byte = 0 if sys.byteorder == 'little' else 7
+
+
 def undo_filter_sub(filter_unit, scanline, previous, result):
     """Undo sub filter."""
 
-    ai = 0
-    # Loops starts at index fu.  Observe that the initial part
-    # of the result is already filled in correctly with
-    # scanline.
-    for i in range(filter_unit, len(result)):
-        x = scanline[i]
-        a = result[ai]
-        result[i] = (x + a) & 0xff
-        ai += 1
+    # Every byte adds the reconstructed byte one filter unit before it,
+    # so each of the filter_unit interleaved strides of the scanline
+    # is a running sum, modulo 256.
+    with memoryview(scanline) as view:
+        sums = [array('Q', itertools.accumulate(view[i::filter_unit]))
+                for i in range(filter_unit)]
+    # Written once the view is released, result may be scanline.
+    for i in range(filter_unit):
+        result[i::filter_unit] = sums[i].tobytes()[_low_byte::8]
 
 
 def undo_filter_up(filter_unit, scanline, previous, result):
     """Undo up filter."""
 
-    for i in range(len(result)):
-        x = scanline[i]
-        b = previous[i]
-        result[i] = (x + b) & 0xff
+    n = len(result)
+    high, low = byte_masks(n)
+    x = int.from_bytes(scanline, 'big')
+    b = int.from_bytes(previous, 'big')
+    result[:] = bytes_add(x, b, high, low).to_bytes(n, 'big')
 
 
 def undo_filter_average(filter_unit, scanline, previous, result):
-    """Undo up filter."""
+    """Undo average filter."""
 
-    ai = -filter_unit
-    for i in range(len(result)):
-        x = scanline[i]
-        if ai < 0:
-            a = 0
-        else:
-            a = result[ai]
-        b = previous[i]
-        result[i] = (x + ((a + b) >> 1)) & 0xff
-        ai += 1
+    fu = filter_unit
+    n = len(result)
+    # The first filter unit has no byte to the left.
+    for i in range(min(fu, n)):
+        result[i] = (scanline[i] + (previous[i] >> 1)) & 0xff
+    i = fu
+    for x, b in zip(scanline[fu:], previous[fu:]):
+        result[i] = (x + ((result[i - fu] + b) >> 1)) & 0xff
+        i += 1
 
 
 def undo_filter_paeth(filter_unit, scanline, previous, result):
     """Undo Paeth filter."""
 
-    # Also used for ci.
-    ai = -filter_unit
-    for i in range(len(result)):
-        x = scanline[i]
-        if ai < 0:
-            a = c = 0
-        else:
-            a = result[ai]
-            c = previous[ai]
-        b = previous[i]
-        p = a + b - c
-        pa = abs(p - a)
-        pb = abs(p - b)
-        pc = abs(p - c)
+    fu = filter_unit
+    n = len(result)
+    # The first filter unit has no byte to the left,
+    # so the predictor is always b.
+    for i in range(min(fu, n)):
+        result[i] = (scanline[i] + previous[i]) & 0xff
+    # With p = a + b - c, p - a is b - c, which only depends on
+    # the previous line, p - b is a - c and p - c is their sum.
+    i = fu
+    for x, b, c, pa in zip(scanline[fu:], previous[fu:], previous[:n - fu],
+                           map(operator.sub, previous[fu:], previous[:n - fu])):
+        a = result[i - fu]
+        pb = a - c
+        pc = abs(pa + pb)
+        pa = abs(pa)
+        pb = abs(pb)
         if pa <= pb and pa <= pc:
             pr = a
         elif pb <= pc:
@@ -2296,7 +2652,7 @@ def undo_filter_paeth(filter_unit, scanline, previous, result):
         else:
             pr = c
         result[i] = (x + pr) & 0xff
-        ai += 1
+        i += 1
 
 
 def convert_la_to_rgba(row, result):
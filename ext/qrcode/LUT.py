@@ -24,6 +24,7 @@
 
 # Result. Usage: input: ecCount, output: Polynomial.num
 # e.g. rsPoly = base.Polynomial(LUT.rsPoly_LUT[ecCount], 0)
+# base.rs_table() builds the encoder tables of base.rs_encode() from these.
 rsPoly_LUT = {
     7: [1, 127, 122, 154, 164, 11, 68, 117],
     10: [1, 216, 194, 159, 111, 199, 94, 95, 113, 157, 193],
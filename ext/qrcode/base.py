@@ -1,5 +1,5 @@
-from typing import NamedTuple
-from qrcode import constants
+from typing import Dict, List, NamedTuple
+from qrcode import LUT, constants
 
 EXP_TABLE = list(range(256))
 
@@ -289,6 +289,52 @@ class Polynomial:
         return Polynomial(num, 0) % other
 
 
+# Reed-Solomon encoder tables, built on first use for each error correction
+# codeword count. Entry ``f`` is the generator polynomial (without its leading
+# 1) multiplied by ``f``, packed big-endian into a single int.
+_rs_tables: Dict[int, List[int]] = {}
+
+
+def rs_table(ec_count):
+    table = _rs_tables.get(ec_count)
+    if table is not None:
+        return table
+
+    if ec_count in LUT.rsPoly_LUT:
+        generator = LUT.rsPoly_LUT[ec_count]
+    else:
+        rsPoly = Polynomial([1], 0)
+        for i in range(ec_count):
+            rsPoly = rsPoly * Polynomial([1, gexp(i)], 0)
+        generator = rsPoly.num
+
+    generator_log = [LOG_TABLE[g] for g in generator[1:]]
+    table = [0]
+    for factor in range(1, 256):
+        factor_log = LOG_TABLE[factor]
+        row = bytes(EXP_TABLE[(factor_log + g) % 255] for g in generator_log)
+        table.append(int.from_bytes(row, "big"))
+
+    _rs_tables[ec_count] = table
+    return table
+
+
+def rs_encode(data, ec_count):
+    """
+    Return the ``ec_count`` error correction codewords for the data codewords.
+
+    Runs the polynomial division as a shift register held in a single int, so
+    each data codeword costs one table lookup.
+    """
+    table = rs_table(ec_count)
+    shift = 8 * (ec_count - 1)
+    mask = (1 << (8 * ec_count)) - 1
+    register = 0
+    for codeword in data:
+        register = ((register << 8) & mask) ^ table[(register >> shift) ^ codeword]
+    return register.to_bytes(ec_count, "big")
+
+
 class RSBlock(NamedTuple):
     total_count: int
     data_count: int
@@ -12,6 +12,7 @@ from typing import Dict, Iterable, NoReturn, Optional, Set, Type
 
 import qrcode
 from qrcode.image.base import BaseImage, DrawerAliases
+from qrcode.util import OPTIMIZE_SHORTEST
 
 # The next block is added to get the terminal to display properly on MS platforms
 if sys.platform.startswith(("win", "cygwin")):  # pragma: no cover
@@ -25,6 +26,7 @@ default_factories = {
     "svg": "qrcode.image.svg.SvgImage",
     "svg-fragment": "qrcode.image.svg.SvgFragmentImage",
     "svg-path": "qrcode.image.svg.SvgPathImage",
+    "packed": "qrcode.image.packed.PackedBitmapImage",
     # Keeping for backwards compatibility:
     "pymaging": "qrcode.image.pure.PymagingImage",
 }
@@ -62,10 +64,10 @@ def main(args=None):
     )
     parser.add_option(
         "--optimize",
-        type=int,
         help="Optimize the data by looking for chunks "
         "of at least this many characters that could use a more efficient "
-        "encoding method. Use 0 to turn off chunk optimization.",
+        "encoding method. Use 0 to turn off chunk optimization, or "
+        f"{OPTIMIZE_SHORTEST} to find the chunks with the shortest encoding.",
     )
     parser.add_option(
         "--error-correction",
@@ -107,8 +109,17 @@ def main(args=None):
         data = sys.stdin.buffer.read()
     if opts.optimize is None:
         qr.add_data(data)
+    elif opts.optimize == OPTIMIZE_SHORTEST:
+        qr.add_data(data, optimize=OPTIMIZE_SHORTEST)
     else:
-        qr.add_data(data, optimize=opts.optimize)
+        try:
+            optimize = int(opts.optimize)
+        except ValueError:
+            raise_error(
+                f"Invalid optimize value (was {opts.optimize}, expected a number "
+                f"or {OPTIMIZE_SHORTEST})"
+            )
+        qr.add_data(data, optimize=optimize)
 
     if opts.output:
         img = qr.make_image()
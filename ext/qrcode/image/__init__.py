@@ -0,0 +1,22 @@
+import importlib
+from typing import TYPE_CHECKING, Type
+
+if TYPE_CHECKING:
+    from qrcode.image.base import BaseImage
+
+# Image factories that need nothing but the standard library and the bundled
+# pure Python png module. Unlike the default of QRCode.make_image() they never
+# try to import PIL, which cannot load without its compiled _imaging extension.
+lightweight_factories = {
+    "png": "qrcode.image.pure.PyPNGImage",
+    "svg-path": "qrcode.image.svg.SvgPathImage",
+    "packed": "qrcode.image.packed.PackedBitmapImage",
+}
+
+
+def get_lightweight_factory(name: str) -> "Type[BaseImage]":
+    """
+    Import and return one of the lightweight_factories by its short name.
+    """
+    module, cls = lightweight_factories[name].rsplit(".", 1)
+    return getattr(importlib.import_module(module), cls)
@@ -0,0 +1,50 @@
+import qrcode.image.base
+
+
+class PackedBitmapImage(qrcode.image.base.BaseImage):
+    """
+    Raw bitmap with one bit per module, dark modules are set.
+
+    Each row of ``size`` modules, border included, starts on a new byte with
+    the most significant bit first. The box size is ignored, so the bitmap is
+    small enough to be published as a D-Bus byte array along with its size.
+    """
+
+    kind = "RAW"
+    allowed_kinds = ("RAW",)
+    needs_drawrect = False
+
+    def new_image(self, **kwargs):
+        self.size = self.width + self.border * 2
+        self.row_bytes = (self.size + 7) // 8
+        shift = self.row_bytes * 8 - self.size + self.border
+        border_rows = [bytes(self.row_bytes)] * self.border
+
+        rows = border_rows[:]
+        for module_row in self.modules:
+            bits = int("".join("1" if module else "0" for module in module_row), 2)
+            rows.append((bits << shift).to_bytes(self.row_bytes, "big"))
+        rows.extend(border_rows)
+        return b"".join(rows)
+
+    def drawrect(self, row, col):
+        """
+        Not used.
+        """
+
+    def save(self, stream, kind=None):
+        self.check_kind(kind=kind)
+        if isinstance(stream, str):
+            with open(stream, "wb") as f:
+                f.write(self._img)
+        else:
+            stream.write(self._img)
+
+    def to_bytes(self) -> bytes:
+        return self._img
+
+    def is_dark(self, row: int, col: int) -> bool:
+        """
+        Read back a module of the bitmap, border included.
+        """
+        return bool(self._img[row * self.row_bytes + col // 8] & (0x80 >> (col % 8)))
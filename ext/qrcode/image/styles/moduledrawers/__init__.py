@@ -1,10 +1,22 @@
-# For backwards compatibility, importing the PIL drawers here.
-try:
-    from .pil import CircleModuleDrawer  # noqa: F401
-    from .pil import GappedSquareModuleDrawer  # noqa: F401
-    from .pil import HorizontalBarsDrawer  # noqa: F401
-    from .pil import RoundedModuleDrawer  # noqa: F401
-    from .pil import SquareModuleDrawer  # noqa: F401
-    from .pil import VerticalBarsDrawer  # noqa: F401
-except ImportError:
-    pass
+# For backwards compatibility, the PIL drawers can be imported from here. They
+# are only loaded on first access, so importing a submodule such as .svg or
+# .base does not try to import PIL.
+_PIL_DRAWERS = (
+    "CircleModuleDrawer",
+    "GappedSquareModuleDrawer",
+    "HorizontalBarsDrawer",
+    "RoundedModuleDrawer",
+    "SquareModuleDrawer",
+    "VerticalBarsDrawer",
+)
+
+
+def __getattr__(name):
+    if name in _PIL_DRAWERS:
+        try:
+            from . import pil
+        except ImportError:
+            pass
+        else:
+            return getattr(pil, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,6 @@
 import abc
 from decimal import Decimal
-from typing import TYPE_CHECKING, NamedTuple
+from typing import TYPE_CHECKING, List, NamedTuple, Optional
 
 from qrcode.image.styles.moduledrawers.base import QRModuleDrawer
 from qrcode.compat.etree import ET
@@ -11,6 +11,15 @@ if TYPE_CHECKING:
 ANTIALIASING_FACTOR = 4
 
 
+def plain_units(pixels: int) -> str:
+    """
+    The text of SvgFragmentImage.units(pixels, text=False) for whole pixels,
+    without going through Decimal.
+    """
+    whole, tenths = divmod(pixels, 10)
+    return f"{whole}.{tenths}" if tenths else str(whole)
+
+
 class Coords(NamedTuple):
     x0: Decimal
     y0: Decimal
@@ -105,12 +114,53 @@ class SvgPathQRModuleDrawer(BaseSvgQRModuleDrawer):
             return
         self.img._subpaths.append(self.subpath(box))
 
+    def flush(self) -> None:
+        """
+        Append any subpath the drawer is still holding back.
+        """
+
     @abc.abstractmethod
     def subpath(self, box) -> str:
         ...
 
 
 class SvgPathSquareDrawer(SvgPathQRModuleDrawer):
+    """
+    Draws squares, merging each horizontal run of adjacent dark modules into a
+    single subpath when there is no gap between modules.
+    """
+
+    def initialize(self, *args, **kwargs) -> None:
+        super().initialize(*args, **kwargs)
+        self.merge_runs = self.size_ratio == 1 and isinstance(self.img.box_size, int)
+        self._run: Optional[List[int]] = None
+
+    def drawrect(self, box, is_active: bool):
+        if not self.merge_runs:
+            return super().drawrect(box, is_active)
+        if not is_active:
+            return
+        # Modules arrive row by row, so a module continues the run if it
+        # starts where the run ends.
+        x, y = box[0]
+        run = self._run
+        if run is not None and run[2] == x and run[1] == y:
+            run[2] = x + self.img.box_size
+            return
+        self.flush()
+        self._run = [x, y, x + self.img.box_size]
+
+    def flush(self) -> None:
+        if self._run is None:
+            return
+        x0, y, x1 = self._run
+        self._run = None
+        width = plain_units(x1 - x0)
+        self.img._subpaths.append(
+            f"M{plain_units(x0)},{plain_units(y)}"
+            f"h{width}v{plain_units(self.img.box_size)}h-{width}z"
+        )
+
     def subpath(self, box) -> str:
         coords = self.coords(box)
         x0 = self.img.units(coords.x0, text=False)
@@ -2,7 +2,10 @@ import decimal
 from decimal import Decimal
 from typing import List, Optional, Type, Union, overload
 
-from typing_extensions import Literal
+try:
+    from typing import Literal
+except ImportError:  # pragma: no cover
+    from typing_extensions import Literal  # type: ignore
 
 import qrcode.image.base
 from qrcode.compat.etree import ET
@@ -151,6 +154,9 @@ class SvgPathImage(SvgImage):
         return super()._svg(viewBox=viewBox, **kwargs)
 
     def process(self):
+        for drawer in (self.module_drawer, self.eye_drawer):
+            if isinstance(drawer, svg_drawers.SvgPathQRModuleDrawer):
+                drawer.flush()
         # Store the path just in case someone wants to use it again or in some
         # unique way.
         self.path = ET.Element(
@@ -1,5 +1,6 @@
 import sys
 from bisect import bisect_left
+from operator import itemgetter
 from typing import (
     Dict,
     Generic,
@@ -12,15 +13,16 @@ from typing import (
     overload,
 )
 
-from typing_extensions import Literal
+try:
+    from typing import Literal
+except ImportError:  # pragma: no cover
+    from typing_extensions import Literal  # type: ignore
 
 from qrcode import constants, exceptions, util
 from qrcode.image.base import BaseImage
 from qrcode.image.pure import PyPNGImage
 
 ModulesType = List[List[Optional[bool]]]
-# Cache modules generated just based on the QR Code version
-precomputed_qr_blanks: Dict[int, ModulesType] = {}
 
 
 def make(data=None, **kwargs):
@@ -52,8 +54,77 @@ def _check_mask_pattern(mask_pattern):
         raise ValueError(f"Mask pattern should be in range(8) (got {mask_pattern})")
 
 
-def copy_2d_array(x):
-    return [row[:] for row in x]
+class ModuleTemplate:
+    """
+    The module layout of a QR Code version, independent of the data.
+
+    Built from the modules with all function patterns and the (cleared) type
+    information in place. Holds the data module positions in the order
+    ``QRCode.map_data`` fills them, and for each mask pattern the bits to flip
+    in that same order, so a mask trial is a single XOR over the data bits.
+    """
+
+    def __init__(self, modules: ModulesType):
+        count = len(modules)
+        self.modules_count = count
+
+        positions = []
+        inc = -1
+        row = count - 1
+        for col in range(count - 1, 0, -2):
+            if col <= 6:
+                col -= 1
+            while 0 <= row < count:
+                for c in (col, col - 1):
+                    if modules[row][c] is None:
+                        positions.append((row, c))
+                row += inc
+            row -= inc
+            inc = -inc
+        self.positions = positions
+        self.data_count = len(positions)
+
+        # Index of each module into the data bits, followed by "0" and "1"
+        # for the modules that are not data.
+        indices = [
+            self.data_count + 1 if module else self.data_count
+            for row in modules
+            for module in row
+        ]
+        for i, (row, col) in enumerate(positions):
+            indices[row * count + col] = i
+        self._layout = itemgetter(*indices)
+        self._masks: List[Optional[int]] = [None] * 8
+
+    def mask(self, pattern: int) -> int:
+        mask = self._masks[pattern]
+        if mask is None:
+            mask_func = util.mask_func(pattern)
+            bits = "".join(
+                "1" if mask_func(row, col) else "0" for row, col in self.positions
+            )
+            mask = self._masks[pattern] = int(bits, 2)
+        return mask
+
+    def data_bits(self, data) -> int:
+        """
+        Return the codewords as one int, first bit first, with the unused
+        remainder modules as 0 bits.
+        """
+        return int.from_bytes(bytes(data), "big") << (self.data_count - 8 * len(data))
+
+    def make_modules(self, data_bits: int, pattern: int) -> ModulesType:
+        bits = f"{data_bits ^ self.mask(pattern):0{self.data_count}b}01"
+        flat = "".join(self._layout(bits))
+        count = self.modules_count
+        return [
+            list(map("1".__eq__, flat[i : i + count]))
+            for i in range(0, count * count, count)
+        ]
+
+
+# Cache the module templates, they only depend on the QR Code version
+precomputed_qr_templates: Dict[int, ModuleTemplate] = {}
 
 
 class ActiveWithNeighbors(NamedTuple):
@@ -139,16 +210,40 @@ class QRCode(Generic[GenericImage]):
 
         :param optimize: Data will be split into multiple chunks to optimize
             the QR size by finding to more compressed modes of at least this
-            length. Set to ``0`` to avoid optimizing at all.
+            length. Set to ``0`` to avoid optimizing at all. Set to
+            ``util.OPTIMIZE_SHORTEST`` to split it into the chunks with the
+            shortest total encoding.
         """
         if isinstance(data, util.QRData):
             self.data_list.append(data)
+        elif optimize == util.OPTIMIZE_SHORTEST:
+            self.data_list.extend(self._shortest_data_chunks(data))
         elif optimize:
             self.data_list.extend(util.optimal_data_chunks(data, minimum=optimize))
         else:
             self.data_list.append(util.QRData(data))
         self.data_cache = None
 
+    def _shortest_data_chunks(self, data):
+        """
+        Split the data for the mode length fields of the version it will fit,
+        trying the smallest range of versions with the same length fields first.
+        """
+        if self._version is not None:
+            return util.shortest_data_chunks(data, self._version)
+
+        bit_limits = util.BIT_LIMIT_TABLE[self.error_correction]
+        for first, last in ((1, 9), (10, 26), (27, 40)):
+            chunks = util.shortest_data_chunks(data, first)
+            mode_sizes = util.mode_sizes_for_version(first)
+            needed_bits = sum(
+                4 + mode_sizes[chunk.mode] + chunk.encoded()[1]
+                for chunk in self.data_list + chunks
+            )
+            if needed_bits <= bit_limits[last]:
+                break
+        return chunks
+
     def make(self, fit=True):
         """
         Compile the data into a QR Code array.
@@ -166,30 +261,41 @@ class QRCode(Generic[GenericImage]):
     def makeImpl(self, test, mask_pattern):
         self.modules_count = self.version * 4 + 17
 
-        if self.version in precomputed_qr_blanks:
-            self.modules = copy_2d_array(precomputed_qr_blanks[self.version])
-        else:
-            self.modules = [
-                [None] * self.modules_count for i in range(self.modules_count)
-            ]
-            self.setup_position_probe_pattern(0, 0)
-            self.setup_position_probe_pattern(self.modules_count - 7, 0)
-            self.setup_position_probe_pattern(0, self.modules_count - 7)
-            self.setup_position_adjust_pattern()
-            self.setup_timing_pattern()
+        template = precomputed_qr_templates.get(self.version)
+        if template is None:
+            template = precomputed_qr_templates[self.version] = self.make_template()
 
-            precomputed_qr_blanks[self.version] = copy_2d_array(self.modules)
+        if self.data_cache is None:
+            self.data_cache = util.create_data(
+                self.version, self.error_correction, self.data_list
+            )
+        self.modules = template.make_modules(
+            template.data_bits(self.data_cache), mask_pattern
+        )
 
         self.setup_type_info(test, mask_pattern)
 
         if self.version >= 7:
             self.setup_type_number(test)
 
-        if self.data_cache is None:
-            self.data_cache = util.create_data(
-                self.version, self.error_correction, self.data_list
-            )
-        self.map_data(self.data_cache, mask_pattern)
+    def make_template(self) -> ModuleTemplate:
+        """
+        Build the module template for the current version.
+        """
+        self.modules_count = self.version * 4 + 17
+        self.modules = [[None] * self.modules_count for i in range(self.modules_count)]
+        self.setup_position_probe_pattern(0, 0)
+        self.setup_position_probe_pattern(self.modules_count - 7, 0)
+        self.setup_position_probe_pattern(0, self.modules_count - 7)
+        self.setup_position_adjust_pattern()
+        self.setup_timing_pattern()
+
+        # Reserve the type information areas
+        self.setup_type_info(True, 0)
+        if self.version >= 7:
+            self.setup_type_number(True)
+
+        return ModuleTemplate(self.modules)
 
     def setup_position_probe_pattern(self, row, col):
         for r in range(-1, 8):
@@ -347,6 +453,9 @@ class QRCode(Generic[GenericImage]):
         Make an image from the QR Code data.
 
         If the data has not been compiled yet, make it first.
+
+        Without an image factory PIL is tried first. Use one of
+        ``qrcode.image.get_lightweight_factory()`` to never import it.
         """
         _check_box_size(self.box_size)
         if self.data_cache is None:
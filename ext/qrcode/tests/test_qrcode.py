@@ -11,7 +11,9 @@ import qrcode
 import qrcode.util
 from qrcode.compat.pil import Image as pil_Image
 from qrcode.exceptions import DataOverflowError
+from qrcode.image import get_lightweight_factory
 from qrcode.image.base import BaseImage
+from qrcode.image.packed import PackedBitmapImage
 from qrcode.image.pure import PyPNGImage
 from qrcode.image.styledpil import StyledPilImage
 from qrcode.image.styles import colormasks, moduledrawers
@@ -196,6 +198,32 @@ class QRCodeTests(unittest.TestCase):
         mock_open.assert_called_once_with("test_file.png", "wb")
         mock_open("test_file.png", "wb").write.assert_called()
 
+    def test_render_packed(self):
+        qr = qrcode.QRCode(border=3)
+        qr.add_data(UNICODE_TEXT)
+        img = qr.make_image(image_factory=PackedBitmapImage)
+        size = qr.modules_count + 6
+        self.assertEqual(img.size, size)
+        self.assertEqual(len(img.to_bytes()), size * ((size + 7) // 8))
+        for r in range(size):
+            for c in range(size):
+                inside = 3 <= r < size - 3 and 3 <= c < size - 3
+                dark = inside and bool(qr.modules[r - 3][c - 3])
+                self.assertEqual(img.is_dark(r, c), dark)
+
+        stream = io.BytesIO()
+        img.save(stream)
+        self.assertEqual(stream.getvalue(), img.to_bytes())
+        self.assertRaises(ValueError, img.save, io.BytesIO(), kind="PNG")
+
+    def test_lightweight_factories(self):
+        self.assertIs(get_lightweight_factory("png"), PyPNGImage)
+        self.assertIs(get_lightweight_factory("packed"), PackedBitmapImage)
+        for name in ("png", "svg-path", "packed"):
+            qr = qrcode.QRCode(image_factory=get_lightweight_factory(name))
+            qr.add_data(UNICODE_TEXT)
+            qr.make_image().save(io.BytesIO())
+
     @unittest.skipIf(not pil_Image, "Requires PIL")
     def test_render_styled_Image(self):
         qr = qrcode.QRCode(error_correction=qrcode.ERROR_CORRECT_L)
@@ -407,6 +435,53 @@ class QRCodeTests(unittest.TestCase):
         qr.make()
         self.assertEqual(qr.version, 11)
 
+    def test_optimize_shortest(self):
+        text = "HTTPS://LOGIN.TAILSCALE.COM/A/0123456789012345678"
+        qr = qrcode.QRCode()
+        qr.add_data(text, optimize=qrcode.util.OPTIMIZE_SHORTEST)
+        qr.make()
+        self.assertEqual(
+            [d.mode for d in qr.data_list], [MODE_ALPHA_NUM, MODE_NUMBER]
+        )
+        self.assertEqual(b"".join(d.data for d in qr.data_list), text.encode())
+
+    def test_optimize_shortest_size(self):
+        text = "A1abc12345123451234512345def1HELLOHELLOHELLOHELLOa" * 5
+        for minimum in (0, 4, 20):
+            qr = qrcode.QRCode()
+            qr.add_data(text, optimize=minimum)
+            qr.make()
+            shortest = qrcode.QRCode()
+            shortest.add_data(text, optimize=qrcode.util.OPTIMIZE_SHORTEST)
+            shortest.make()
+            self.assertLessEqual(shortest.version, qr.version)
+
+    def test_optimize_shortest_version_range(self):
+        # Only fits with the longer length fields of version 10 and up
+        qr = qrcode.QRCode()
+        qr.add_data("1" * 700 + "a", optimize=qrcode.util.OPTIMIZE_SHORTEST)
+        qr.make()
+        self.assertGreaterEqual(qr.version, 10)
+        self.assertEqual(
+            [d.mode for d in qr.data_list], [MODE_NUMBER, MODE_8BIT_BYTE]
+        )
+
+    def test_template_matches_map_data(self):
+        for version in (1, 7, 22, 40):
+            qr = qrcode.QRCode(version=version)
+            qr.add_data("tailscale")
+            qr.make(fit=False)
+            for pattern in range(8):
+                qr.makeImpl(False, pattern)
+                modules = qr.modules
+
+                qr.make_template()
+                qr.setup_type_info(False, pattern)
+                if version >= 7:
+                    qr.setup_type_number(False)
+                qr.map_data(qr.data_cache, pattern)
+                self.assertEqual(modules, qr.modules)
+
     def test_qrdata_repr(self):
         data = b"hello"
         data_obj = qrcode.util.QRData(data)
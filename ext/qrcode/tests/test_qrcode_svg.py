@@ -1,10 +1,13 @@
 import io
 import os
+import re
 import unittest
+from decimal import Decimal
 from tempfile import mkdtemp
 
 import qrcode
 from qrcode.image import svg
+from qrcode.image.styles.moduledrawers import svg as svg_drawers
 
 UNICODE_TEXT = "\u03b1\u03b2\u03b3"
 
@@ -13,6 +16,45 @@ class SvgImageWhite(svg.SvgImage):
     background = "white"
 
 
+def rasterize_path(d, box_size, width):
+    """
+    Rasterize a path of axis-aligned rectangle subpaths to a grid of
+    box_size / 10 sized cells.
+    """
+    raster = [[0] * width for _ in range(width)]
+    for subpath in re.findall(r"M[^M]*", d):
+        x = y = Decimal(0)
+        xs, ys = [], []
+        for cmd, args in re.findall(r"([MHVhvz])([^MHVhvz]*)", subpath):
+            if cmd == "M":
+                x, y = (Decimal(n) for n in args.split(","))
+            elif cmd == "H":
+                x = Decimal(args)
+            elif cmd == "V":
+                y = Decimal(args)
+            elif cmd == "h":
+                x += Decimal(args)
+            elif cmd == "v":
+                y += Decimal(args)
+            xs.append(x)
+            ys.append(y)
+        unit = Decimal(box_size) / 10
+        for row in range(int(min(ys) / unit), int(max(ys) / unit)):
+            for col in range(int(min(xs) / unit), int(max(xs) / unit)):
+                raster[row][col] += 1
+    return raster
+
+
+def rasterize_rects(img, box_size, width):
+    raster = [[0] * width for _ in range(width)]
+    unit = Decimal(box_size) / 10
+    for rect in img._img:
+        col = int(Decimal(rect.get("x")[:-2]) / unit)
+        row = int(Decimal(rect.get("y")[:-2]) / unit)
+        raster[row][col] += 1
+    return raster
+
+
 class QRCodeSvgTests(unittest.TestCase):
     def setUp(self):
         self.tmpdir = mkdtemp()
@@ -58,3 +100,33 @@ class QRCodeSvgTests(unittest.TestCase):
         qr.add_data(UNICODE_TEXT)
         img = qr.make_image(image_factory=svg.SvgPathImage, module_drawer="circle")
         img.save(io.BytesIO())
+
+    def test_svg_path_runs_raster(self):
+        for box_size, border in ((10, 4), (7, 1)):
+            qr = qrcode.QRCode(version=10, box_size=box_size, border=border)
+            qr.add_data(UNICODE_TEXT)
+            qr.make(fit=False)
+            width = qr.modules_count + border * 2
+            expected = [[0] * width for _ in range(width)]
+            for r in range(qr.modules_count):
+                for c in range(qr.modules_count):
+                    expected[r + border][c + border] = int(qr.modules[r][c])
+
+            img = qr.make_image(image_factory=svg.SvgPathImage)
+            d = img.path.get("d")
+            self.assertEqual(rasterize_path(d, box_size, width), expected)
+            rects = qr.make_image(image_factory=svg.SvgImage)
+            self.assertEqual(rasterize_rects(rects, box_size, width), expected)
+            # far fewer subpaths than dark modules
+            self.assertLess(d.count("M"), sum(map(sum, expected)) * 2 // 3)
+
+    def test_svg_path_gapped_square(self):
+        qr = qrcode.QRCode()
+        qr.add_data(UNICODE_TEXT)
+        img = qr.make_image(
+            image_factory=svg.SvgPathImage,
+            module_drawer=svg_drawers.SvgPathSquareDrawer(size_ratio=Decimal(0.8)),
+            eye_drawer=svg_drawers.SvgPathSquareDrawer(size_ratio=Decimal(0.8)),
+        )
+        dark = sum(map(sum, qr.modules))
+        self.assertEqual(img.path.get("d").count("M"), dark)
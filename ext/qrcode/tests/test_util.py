@@ -1,6 +1,6 @@
 import unittest
 
-from qrcode import util
+from qrcode import LUT, base, util
 
 
 class UtilTests(unittest.TestCase):
@@ -10,3 +10,39 @@ class UtilTests(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             util.check_version(41)
+
+    def test_rs_encode_matches_polynomial(self):
+        data = [(i * 73 + 11) % 256 for i in range(60)]
+        for ec_count in LUT.rsPoly_LUT:
+            rsPoly = base.Polynomial(LUT.rsPoly_LUT[ec_count], 0)
+            modPoly = base.Polynomial(data, len(rsPoly) - 1) % rsPoly
+            expected = [0] * (ec_count - len(modPoly)) + modPoly.num[-ec_count:]
+            self.assertEqual(list(base.rs_encode(data, ec_count)), expected)
+
+    def test_rs_encode_zero_block(self):
+        self.assertEqual(base.rs_encode(bytes(16), 10), bytes(10))
+
+    def test_bit_buffer(self):
+        buffer = util.BitBuffer()
+        buffer.put(0b101, 3)
+        buffer.put_bit(True)
+        buffer.put(0xFFFF, 4)
+        buffer.put(0xAB, 8)
+        self.assertEqual(len(buffer), 16)
+        self.assertEqual(buffer.buffer, [0b10111111, 0xAB])
+        self.assertTrue(buffer.get(0))
+        self.assertFalse(buffer.get(1))
+        buffer.put_bit(True)
+        self.assertEqual(buffer.to_bytes(), bytes((0b10111111, 0xAB, 0x80)))
+
+    def test_encode_number(self):
+        data = util.QRData("01234567", mode=util.MODE_NUMBER)
+        self.assertEqual(data.encoded(), (0b0000001100_0101011001_1000011, 27))
+
+    def test_encode_alpha_num(self):
+        data = util.QRData("AC-42", mode=util.MODE_ALPHA_NUM)
+        self.assertEqual(data.encoded(), (0b00111001110_11100111001_000010, 28))
+
+    def test_encode_8bit(self):
+        data = util.QRData(b"\x01\xff", mode=util.MODE_8BIT_BYTE)
+        self.assertEqual(data.encoded(), (0x01FF, 16))
@@ -2,7 +2,7 @@ import math
 import re
 from typing import List
 
-from qrcode import LUT, base, exceptions
+from qrcode import base, exceptions
 from qrcode.base import RSBlock
 
 # QR encoding modes.
@@ -33,6 +33,12 @@ MODE_SIZE_LARGE = {
 
 ALPHA_NUM = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
 RE_ALPHA_NUM = re.compile(b"^[" + re.escape(ALPHA_NUM) + rb"]*\Z")
+_ALPHA_NUM_CHARS = frozenset(ALPHA_NUM)
+_NUMBER_CHARS = frozenset(b"0123456789")
+
+# Value for the ``optimize`` argument of ``QRCode.add_data`` to split the data
+# into the chunks with the shortest total encoding.
+OPTIMIZE_SHORTEST = "shortest"
 
 # The number of bits for numeric delimited data lengths.
 NUMBER_LENGTH = {3: 10, 2: 7, 1: 4}
@@ -378,6 +384,80 @@ def optimal_data_chunks(data, minimum=4):
                 yield QRData(sub_chunk, mode=mode, check_data=False)
 
 
+def shortest_data_chunks(data, version):
+    """
+    Return the QRData chunks that encode the data in the least number of bits,
+    given the mode length fields of ``version``.
+
+    Single pass over the data, keeping the cheapest encoding so far for every
+    state a chunk can end in: its mode, and for numeric and alphanumeric
+    chunks the number of characters modulo the group size, since e.g. the
+    first digit of a group costs 4 bits and the next two 3 bits each.
+    """
+    data = to_bytestring(data)
+    if not data:
+        return []
+
+    mode_sizes = mode_sizes_for_version(version)
+    # (mode, characters allowed, bits added by the n-th character of a group)
+    modes = (
+        (MODE_NUMBER, _NUMBER_CHARS, (4, 3, 3)),
+        (MODE_ALPHA_NUM, _ALPHA_NUM_CHARS, (6, 5)),
+        (MODE_8BIT_BYTE, None, (8,)),
+    )
+    states = [
+        (m, phase) for m, (_, _, group) in enumerate(modes) for phase in range(len(group))
+    ]
+    start_states = [states.index((m, 1 % len(group))) for m, (_, _, group) in enumerate(modes)]
+    continue_from = [
+        states.index((m, (phase - 1) % len(modes[m][2]))) for m, phase in states
+    ]
+    unreachable = float("inf")
+
+    costs = [unreachable] * len(states)
+    cheapest, cheapest_state = 0, None
+    previous_states = []
+    for c in data:
+        new_costs = []
+        previous = []
+        for s, (m, phase) in enumerate(states):
+            mode, chars, group = modes[m]
+            if chars is not None and c not in chars:
+                new_costs.append(unreachable)
+                previous.append(None)
+                continue
+            # Either continue the chunk, or start a new one after the cheapest
+            # encoding so far.
+            p = continue_from[s]
+            cost = costs[p] + group[(phase - 1) % len(group)]
+            if s == start_states[m]:
+                start_cost = cheapest + 4 + mode_sizes[mode] + group[0]
+                if start_cost < cost:
+                    cost, p = start_cost, cheapest_state
+            new_costs.append(cost)
+            previous.append(p)
+        costs = new_costs
+        cheapest = min(costs)
+        cheapest_state = costs.index(cheapest)
+        previous_states.append(previous)
+
+    # Walk back to find the mode of every character, a new chunk starts
+    # wherever the previous state is not the one continuing this state.
+    s = cheapest_state
+    chunks = []
+    end = len(data)
+    for i in range(len(data) - 1, -1, -1):
+        p = previous_states[i][s]
+        if p is None or p != continue_from[s] or i == 0:
+            chunks.append(
+                QRData(data[i:end], mode=modes[states[s][0]][0], check_data=False)
+            )
+            end = i
+        s = p
+    chunks.reverse()
+    return chunks
+
+
 def _optimal_split(data, pattern):
     while data:
         match = re.search(pattern, data)
@@ -438,62 +518,83 @@ class QRData:
                 raise ValueError(f"Provided data can not be represented in mode {mode}")
 
         self.data = data
+        self._encoded = None
 
     def __len__(self):
         return len(self.data)
 
-    def write(self, buffer):
+    def encoded(self):
+        """
+        Return the data encoded in its mode as ``(bits, bit_length)``, with the
+        bits packed into a single int. Encoded once, then cached.
+        """
+        if self._encoded is None:
+            self._encoded = self._encode()
+        return self._encoded
+
+    def _encode(self):
+        data = self.data
+        if not data:
+            return 0, 0
         if self.mode == MODE_NUMBER:
-            for i in range(0, len(self.data), 3):
-                chars = self.data[i : i + 3]
-                bit_length = NUMBER_LENGTH[len(chars)]
-                buffer.put(int(chars), bit_length)
+            bits = "".join(
+                f"{int(data[i : i + 3]):0{NUMBER_LENGTH[len(data[i : i + 3])]}b}"
+                for i in range(0, len(data), 3)
+            )
         elif self.mode == MODE_ALPHA_NUM:
-            for i in range(0, len(self.data), 2):
-                chars = self.data[i : i + 2]
-                if len(chars) > 1:
-                    buffer.put(
-                        ALPHA_NUM.find(chars[0]) * 45 + ALPHA_NUM.find(chars[1]), 11
-                    )
-                else:
-                    buffer.put(ALPHA_NUM.find(chars), 6)
+            find = ALPHA_NUM.find
+            bits = "".join(
+                f"{(find(data[i]) * 45 + find(data[i + 1])) & 0x7FF:011b}"
+                for i in range(0, len(data) - 1, 2)
+            )
+            if len(data) % 2:
+                bits += f"{find(data[-1]) & 0x3F:06b}"
         else:
-            # Iterating a bytestring in Python 3 returns an integer,
-            # no need to ord().
-            data = self.data
-            for c in data:
-                buffer.put(c, 8)
+            return int.from_bytes(data, "big"), len(data) * 8
+        return int(bits, 2), len(bits)
+
+    def write(self, buffer):
+        buffer.put(*self.encoded())
 
     def __repr__(self):
         return repr(self.data)
 
 
 class BitBuffer:
+    """
+    Bits accumulated most significant first into a single int.
+    """
+
     def __init__(self):
-        self.buffer: List[int] = []
+        self.bits = 0
         self.length = 0
 
+    @property
+    def buffer(self) -> List[int]:
+        return list(self.to_bytes())
+
     def __repr__(self):
         return ".".join([str(n) for n in self.buffer])
 
+    def to_bytes(self):
+        """
+        Return the bits as bytes, padding the last byte with 0 bits.
+        """
+        byte_count = (self.length + 7) // 8
+        return (self.bits << (byte_count * 8 - self.length)).to_bytes(byte_count, "big")
+
     def get(self, index):
-        buf_index = math.floor(index / 8)
-        return ((self.buffer[buf_index] >> (7 - index % 8)) & 1) == 1
+        return ((self.bits >> (self.length - index - 1)) & 1) == 1
 
     def put(self, num, length):
-        for i in range(length):
-            self.put_bit(((num >> (length - i - 1)) & 1) == 1)
+        self.bits = (self.bits << length) | (num & ((1 << length) - 1))
+        self.length += length
 
     def __len__(self):
         return self.length
 
     def put_bit(self, bit):
-        buf_index = self.length // 8
-        if len(self.buffer) <= buf_index:
-            self.buffer.append(0)
-        if bit:
-            self.buffer[buf_index] |= 0x80 >> (self.length % 8)
-        self.length += 1
+        self.put(1 if bit else 0, 1)
 
 
 def create_bytes(buffer: BitBuffer, rs_blocks: List[RSBlock]):
@@ -502,8 +603,10 @@ def create_bytes(buffer: BitBuffer, rs_blocks: List[RSBlock]):
     maxDcCount = 0
     maxEcCount = 0
 
-    dcdata: List[List[int]] = []
-    ecdata: List[List[int]] = []
+    dcdata: List[bytes] = []
+    ecdata: List[bytes] = []
+
+    data_codewords = buffer.to_bytes()
 
     for rs_block in rs_blocks:
         dcCount = rs_block.data_count
@@ -512,28 +615,11 @@ def create_bytes(buffer: BitBuffer, rs_blocks: List[RSBlock]):
         maxDcCount = max(maxDcCount, dcCount)
         maxEcCount = max(maxEcCount, ecCount)
 
-        current_dc = [0xFF & buffer.buffer[i + offset] for i in range(dcCount)]
+        current_dc = data_codewords[offset : offset + dcCount]
         offset += dcCount
 
-        # Get error correction polynomial.
-        if ecCount in LUT.rsPoly_LUT:
-            rsPoly = base.Polynomial(LUT.rsPoly_LUT[ecCount], 0)
-        else:
-            rsPoly = base.Polynomial([1], 0)
-            for i in range(ecCount):
-                rsPoly = rsPoly * base.Polynomial([1, base.gexp(i)], 0)
-
-        rawPoly = base.Polynomial(current_dc, len(rsPoly) - 1)
-
-        modPoly = rawPoly % rsPoly
-        current_ec = []
-        mod_offset = len(modPoly) - ecCount
-        for i in range(ecCount):
-            modIndex = i + mod_offset
-            current_ec.append(modPoly[modIndex] if (modIndex >= 0) else 0)
-
         dcdata.append(current_dc)
-        ecdata.append(current_ec)
+        ecdata.append(base.rs_encode(current_dc, ecCount))
 
     data = []
     for i in range(maxDcCount):
@@ -566,21 +652,16 @@ def create_data(version, error_correction, data_list):
         )
 
     # Terminate the bits (add up to four 0s).
-    for _ in range(min(bit_limit - len(buffer), 4)):
-        buffer.put_bit(False)
+    buffer.put(0, min(bit_limit - len(buffer), 4))
 
     # Delimit the string into 8-bit words, padding with 0s if necessary.
     delimit = len(buffer) % 8
     if delimit:
-        for _ in range(8 - delimit):
-            buffer.put_bit(False)
+        buffer.put(0, 8 - delimit)
 
     # Add special alternating padding bitstrings until buffer is full.
     bytes_to_fill = (bit_limit - len(buffer)) // 8
-    for i in range(bytes_to_fill):
-        if i % 2 == 0:
-            buffer.put(PAD0, 8)
-        else:
-            buffer.put(PAD1, 8)
+    padding = bytes((PAD0, PAD1)) * ((bytes_to_fill + 1) // 2)
+    buffer.put(int.from_bytes(padding[:bytes_to_fill], "big"), bytes_to_fill * 8)
 
     return create_bytes(buffer, rs_blocks)
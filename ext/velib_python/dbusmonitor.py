@@ -25,7 +25,7 @@ import argparse
 import pprint
 import traceback
 import os
-from collections import defaultdict
+from collections import defaultdict, deque
 from functools import partial
 
 # our own packages
@@ -82,13 +82,29 @@ class Service(object):
 class DbusMonitor(object):
 	## Constructor
 	def __init__(self, dbusTree, valueChangedCallback=None, deviceAddedCallback=None,
-					deviceRemovedCallback=None, namespace="com.victronenergy", ignoreServices=[]):
+					deviceRemovedCallback=None, namespace="com.victronenergy", ignoreServices=[],
+					asyncScan=False, maxConcurrentScans=8, scanCompleteCallback=None,
+					batchValueChanges=False):
 		# valueChangedCallback is the callback that we call when something has changed.
 		# def value_changed_on_dbus(dbusServiceName, dbusPath, options, changes, deviceInstance):
 		# in which changes is a tuple with GetText() and GetValue()
+		# With batchValueChanges, changes are collected and delivered from a single
+		# idle callback, only the latest value per service and path is kept:
+		# def values_changed_on_dbus(batch):
+		# in which batch is a list of (dbusServiceName, dbusPath, options, changes, deviceInstance)
+		# tuples, in the order the paths first changed.
 		self.valueChangedCallback = valueChangedCallback
+		self.batchValueChanges = batchValueChanges
 		self.deviceAddedCallback = deviceAddedCallback
 		self.deviceRemovedCallback = deviceRemovedCallback
+		# scanCompleteCallback is called without arguments once the initial scan of
+		# the bus is done. With asyncScan the constructor returns right away and the
+		# services are scanned with at most maxConcurrentScans GetItems calls in
+		# flight. That needs a running mainloop, the replies are handled there.
+		if asyncScan and maxConcurrentScans < 1:
+			# no GetItems call would be made and the scan would never complete
+			raise ValueError("maxConcurrentScans must be at least 1, not %r" % (maxConcurrentScans,))
+		self.scanCompleteCallback = scanCompleteCallback
 		self.dbusTree = dbusTree
 		self.ignoreServices = ignoreServices
 
@@ -105,6 +121,22 @@ class DbusMonitor(object):
 		# Keep track of any additional watches placed on items
 		self.serviceWatches = defaultdict(list)
 
+		# Callbacks of the paths watched with track_value, indexed by service name and
+		# path. Shared by the single ItemsChanged receiver of each service.
+		self._trackedPaths = {}
+
+		# Asynchronous scan state: services still to be scanned, the owner each
+		# GetItems call in flight was made for, indexed by service name, and the
+		# number of calls in flight.
+		self._scanQueue = deque()
+		self._pendingScans = {}
+		self._scansInFlight = 0
+		self._maxConcurrentScans = maxConcurrentScans
+		self._scanning = False
+
+		# Changes waiting for the batched idle callback, indexed by (service name, path)
+		self._pendingChanges = {}
+
 		# For a PC, connect to the SessionBus
 		# For a CCGX, connect to the SystemBus
 		self.dbusConn = SessionBus() if 'DBUS_SESSION_BUS_ADDRESS' in os.environ else SystemBus()
@@ -130,10 +162,72 @@ class DbusMonitor(object):
 
 		logger.info('===== Search on dbus for services that we will monitor starting... =====')
 		serviceNames = self.dbusConn.list_names()
+		if asyncScan:
+			self._scanning = True
+			self._scanQueue.extend(str(n) for n in serviceNames if self._get_tree_paths(str(n)) is not None)
+			self._scan_next()
+			return
+
 		for serviceName in serviceNames:
 			self.scan_dbus_service(serviceName)
 
+		self._scan_finished()
+
+	def _scan_finished(self):
 		logger.info('===== Search on dbus for services that we will monitor finished =====')
+		if self.scanCompleteCallback is not None:
+			self.scanCompleteCallback()
+
+	# Start GetItems calls for queued services until the limit is reached. Once the
+	# queue is empty and the last reply came in, the initial scan is complete.
+	def _scan_next(self):
+		while self._scanQueue and self._scansInFlight < self._maxConcurrentScans:
+			serviceName = self._scanQueue.popleft()
+			if serviceName in self.servicesByName:
+				continue # Already picked up through NameOwnerChanged
+			try:
+				serviceId = self.dbusConn.get_name_owner(serviceName)
+			except dbus.exceptions.DBusException:
+				continue # Gone again
+
+			logger.info("Found: %s, scanning and storing items" % serviceName)
+			self._pendingScans[serviceName] = serviceId
+			self._scansInFlight += 1
+			self.dbusConn.call_async(serviceName, '/', None, 'GetItems', '', [],
+				reply_handler=partial(self._scan_reply, serviceName, serviceId),
+				error_handler=partial(self._scan_error, serviceName, serviceId))
+
+		if self._scanning and not self._scanQueue and self._scansInFlight == 0:
+			self._scanning = False
+			self._scan_finished()
+
+	def _scan_taken(self, serviceName, serviceId):
+		# A NameOwnerChanged for this service since the call was made means the
+		# result is stale: the service either left, or was scanned again.
+		self._scansInFlight -= 1
+		if self._pendingScans.get(serviceName) != serviceId:
+			return False
+		del self._pendingScans[serviceName]
+		return True
+
+	def _scan_reply(self, serviceName, serviceId, values):
+		if self._scan_taken(serviceName, serviceId):
+			try:
+				self.scan_dbus_service_getitems_done(serviceName, serviceId, values)
+			except:
+				logger.error("Ignoring %s because of error while scanning:" % (serviceName))
+				traceback.print_exc()
+		self._scan_next()
+
+	def _scan_error(self, serviceName, serviceId, e):
+		if self._scan_taken(serviceName, serviceId):
+			logger.info("GetItems failed, trying legacy methods")
+			try:
+				self.scan_dbus_service_legacy(serviceName, serviceId, self._get_tree_paths(serviceName))
+			except:
+				logger.error("Ignoring %s because of error while scanning:" % (serviceName))
+				traceback.print_exc()
+		self._scan_next()
 
 	@staticmethod
 	def make_service(serviceId, serviceName, deviceInstance):
@@ -152,6 +246,9 @@ class DbusMonitor(object):
 		GLib.idle_add(exit_on_error, self._process_name_owner_changed, name, oldowner, newowner)
 
 	def _process_name_owner_changed(self, name, oldowner, newowner):
+		# Drop the result of an asynchronous scan that is still in flight
+		self._pendingScans.pop(name, None)
+
 		if newowner != '':
 			# so we found some new service. Check if we can do something with it.
 			newdeviceadded = self.scan_dbus_service(name)
@@ -167,6 +264,7 @@ class DbusMonitor(object):
 			for watch in self.serviceWatches[name]:
 				watch.remove()
 			del self.serviceWatches[name]
+			self._trackedPaths.pop(name, None)
 			self.servicesByClass[service.service_class].remove(service)
 			if self.deviceRemovedCallback is not None:
 				self.deviceRemovedCallback(name, service.deviceInstance)
@@ -184,6 +282,18 @@ class DbusMonitor(object):
 			# disappears while its being scanned. Which might happen, but is not really
 			# normal either, so letting them go into the logs.
 
+	# Returns the paths from the tree to monitor for the given service, or None when the
+	# service is of no interest to us.
+	def _get_tree_paths(self, serviceName):
+		if (len(self.ignoreServices) != 0 and any(serviceName.startswith(x) for x in self.ignoreServices)):
+			logger.debug("Ignoring service %s" % serviceName)
+			return None
+
+		paths = self.dbusTree.get('.'.join(serviceName.split('.')[0:3]), None)
+		if paths is None:
+			logger.debug("Ignoring service %s, not in the tree" % serviceName)
+		return paths
+
 	# Scans the given dbus service to see if it contains anything interesting for us. If it does, add
 	# it to our list of monitored D-Bus services.
 	def scan_dbus_service_inner(self, serviceName):
@@ -191,13 +301,8 @@ class DbusMonitor(object):
 		# make it a normal string instead of dbus string
 		serviceName = str(serviceName)
 
-		if (len(self.ignoreServices) != 0 and any(serviceName.startswith(x) for x in self.ignoreServices)):
-			logger.debug("Ignoring service %s" % serviceName)
-			return False
-
-		paths = self.dbusTree.get('.'.join(serviceName.split('.')[0:3]), None)
+		paths = self._get_tree_paths(serviceName)
 		if paths is None:
-			logger.debug("Ignoring service %s, not in the tree" % serviceName)
 			return False
 
 		logger.info("Found: %s, scanning and storing items" % serviceName)
@@ -217,6 +322,11 @@ class DbusMonitor(object):
 		else:
 			return self.scan_dbus_service_getitems_done(serviceName, serviceId, values)
 
+		return self.scan_dbus_service_legacy(serviceName, serviceId, paths)
+
+	# Scans the given dbus service using GetValue and GetText, for services that do
+	# not implement GetItems.
+	def scan_dbus_service_legacy(self, serviceName, serviceId, paths):
 		if serviceName == 'com.victronenergy.settings':
 			di = 0
 		elif serviceName.startswith('com.victronenergy.vecan.'):
@@ -375,7 +485,15 @@ class DbusMonitor(object):
 		a.text = text
 
 		# And do the rest of the processing in on the mainloop
-		if self.valueChangedCallback is not None:
+		if self.valueChangedCallback is None:
+			return
+
+		if self.batchValueChanges:
+			if not self._pendingChanges:
+				GLib.idle_add(exit_on_error, self._execute_batched_value_changes)
+			self._pendingChanges[(service.name, path)] = ({
+				'Value': value, 'Text': text}, a.options)
+		else:
 			GLib.idle_add(exit_on_error, self._execute_value_changes, service.name, path, {
 				'Value': value, 'Text': text}, a.options)
 
@@ -388,6 +506,20 @@ class DbusMonitor(object):
 		self.valueChangedCallback(serviceName, objectPath,
 			options, changes, self.get_device_instance(serviceName))
 
+	def _execute_batched_value_changes(self):
+		pending = self._pendingChanges
+		self._pendingChanges = {}
+
+		batch = []
+		for (serviceName, objectPath), (changes, options) in pending.items():
+			# As above, skip services that disappeared in the meantime
+			service = self.servicesByName.get(serviceName)
+			if service is not None:
+				batch.append((serviceName, objectPath, options, changes, service.deviceInstance))
+
+		if batch:
+			self.valueChangedCallback(batch)
+
 	# Gets the value for a certain servicename and path
 	# The default_value is returned when:
 	# 1. When the service doesn't exist.
@@ -486,32 +618,47 @@ class DbusMonitor(object):
 		    the service disappears from dbus. """
 		cb = partial(callback, *args, **kwargs)
 
-		def root_tracker(items):
-			# Check if objectPath in dict
+		# Track changes on the path
+		self.serviceWatches[serviceName].append(
+			self.dbusConn.add_signal_receiver(cb,
+				dbus_interface='com.victronenergy.BusItem',
+				signal_name='PropertiesChanged',
+				path=objectPath, bus_name=serviceName))
+
+		# And also on root, with one receiver for all tracked paths of the service
+		tracked = self._trackedPaths.get(serviceName)
+		if tracked is None:
+			tracked = self._trackedPaths[serviceName] = defaultdict(list)
+			self.serviceWatches[serviceName].append(
+				self.dbusConn.add_signal_receiver(
+					partial(self._tracked_items_changed, tracked),
+					dbus_interface='com.victronenergy.BusItem',
+					signal_name='ItemsChanged',
+					path="/", bus_name=serviceName))
+		tracked[objectPath].append(cb)
+
+	def _tracked_items_changed(self, tracked, items):
+		if not isinstance(items, dict):
+			return
+
+		for path, v in items.items():
+			callbacks = tracked.get(path)
+			if not callbacks:
+				continue # not tracked
+
 			try:
-				v = items[objectPath]
 				_v = unwrap_dbus_value(v['Value'])
 			except (KeyError, TypeError):
-				return # not in this dict
+				continue
 
 			try:
 				t = v['Text']
 			except KeyError:
-				cb({'Value': _v })
+				for cb in callbacks:
+					cb({'Value': _v })
 			else:
-				cb({'Value': _v, 'Text': t})
-
-		# Track changes on the path, and also on root
-		self.serviceWatches[serviceName].extend((
-			self.dbusConn.add_signal_receiver(cb,
-				dbus_interface='com.victronenergy.BusItem',
-				signal_name='PropertiesChanged',
-				path=objectPath, bus_name=serviceName),
-			self.dbusConn.add_signal_receiver(root_tracker,
-				dbus_interface='com.victronenergy.BusItem',
-				signal_name='ItemsChanged',
-				path="/", bus_name=serviceName),
-		))
+				for cb in callbacks:
+					cb({'Value': _v, 'Text': t})
 
 
 # ====== ALL CODE BELOW THIS LINE IS PURELY FOR DEVELOPING THIS CLASS ======
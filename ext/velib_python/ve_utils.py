@@ -201,7 +201,7 @@ def read_file(path):
 	return content
 
 
-def wrap_dbus_value(value):
+def _wrap_dbus_value_chain(value):
 	if value is None:
 		return VEDBUS_INVALID
 	if isinstance(value, float):
@@ -216,35 +216,89 @@ def wrap_dbus_value(value):
 	if isinstance(value, str):
 		return dbus.String(value, variant_level=1)
 	if isinstance(value, list):
-		if len(value) == 0:
-			# If the list is empty we cannot infer the type of the contents. So assume unsigned integer.
-			# A (signed) integer is dangerous, because an empty list of signed integers is used to encode
-			# an invalid value.
-			return dbus.Array([], signature=dbus.Signature('u'), variant_level=1)
-		return dbus.Array([wrap_dbus_value(x) for x in value], variant_level=1)
+		return _wrap_list(value)
 	if isinstance(value, dict):
-		# Wrapping the keys of the dictionary causes D-Bus errors like:
-		# 'arguments to dbus_message_iter_open_container() were incorrect,
-		# assertion "(type == DBUS_TYPE_ARRAY && contained_signature &&
-		# *contained_signature == DBUS_DICT_ENTRY_BEGIN_CHAR) || (contained_signature == NULL ||
-		# _dbus_check_is_valid_signature (contained_signature))" failed in file ...'
-		return dbus.Dictionary({(k, wrap_dbus_value(v)) for k, v in value.items()}, variant_level=1)
+		return _wrap_dict(value)
 	return value
 
 
+def _wrap_list(value):
+	if len(value) == 0:
+		# If the list is empty we cannot infer the type of the contents. So assume unsigned integer.
+		# A (signed) integer is dangerous, because an empty list of signed integers is used to encode
+		# an invalid value.
+		return dbus.Array([], signature=dbus.Signature('u'), variant_level=1)
+	return dbus.Array([wrap_dbus_value(x) for x in value], variant_level=1)
+
+
+def _wrap_dict(value):
+	# Wrapping the keys of the dictionary causes D-Bus errors like:
+	# 'arguments to dbus_message_iter_open_container() were incorrect,
+	# assertion "(type == DBUS_TYPE_ARRAY && contained_signature &&
+	# *contained_signature == DBUS_DICT_ENTRY_BEGIN_CHAR) || (contained_signature == NULL ||
+	# _dbus_check_is_valid_signature (contained_signature))" failed in file ...'
+	return dbus.Dictionary({(k, wrap_dbus_value(v)) for k, v in value.items()}, variant_level=1)
+
+
+# Wrapped values for the most common immutable values, so they are only created once.
+_WRAPPED_INTS = {
+	0: dbus.Int32(0, variant_level=1),
+	1: dbus.Int32(1, variant_level=1),
+}
+_WRAPPED_BOOLS = {
+	False: dbus.Boolean(False, variant_level=1),
+	True: dbus.Boolean(True, variant_level=1),
+}
+_WRAPPED_EMPTY_STRING = dbus.String('', variant_level=1)
+
+
+def _wrap_int(value):
+	w = _WRAPPED_INTS.get(value)
+	if w is not None:
+		return w
+	try:
+		return dbus.Int32(value, variant_level=1)
+	except OverflowError:
+		return dbus.Int64(value, variant_level=1)
+
+
+def _wrap_str(value):
+	if not value:
+		return _WRAPPED_EMPTY_STRING
+	return dbus.String(value, variant_level=1)
+
+
+# Fast path for the exact builtin types, keyed on type(value). Everything else,
+# including subclasses such as the dbus types themselves, goes through the
+# isinstance chain.
+_wrap_dispatch = {
+	type(None): lambda value: VEDBUS_INVALID,
+	float: lambda value: dbus.Double(value, variant_level=1),
+	bool: _WRAPPED_BOOLS.__getitem__,
+	int: _wrap_int,
+	str: _wrap_str,
+	list: _wrap_list,
+	dict: _wrap_dict,
+}
+
+
+def wrap_dbus_value(value):
+	f = _wrap_dispatch.get(type(value))
+	if f is not None:
+		return f(value)
+	return _wrap_dbus_value_chain(value)
+
+
 dbus_int_types = (dbus.Int32, dbus.UInt32, dbus.Byte, dbus.Int16, dbus.UInt16, dbus.UInt32, dbus.Int64, dbus.UInt64)
 
 
-def unwrap_dbus_value(val):
-	"""Converts D-Bus values back to the original type. For example if val is of type DBus.Double,
-	a float will be returned."""
+def _unwrap_dbus_value_chain(val):
 	if isinstance(val, dbus_int_types):
 		return int(val)
 	if isinstance(val, dbus.Double):
 		return float(val)
 	if isinstance(val, dbus.Array):
-		v = [unwrap_dbus_value(x) for x in val]
-		return None if len(v) == 0 else v
+		return _unwrap_array(val)
 	if isinstance(val, (dbus.Signature, dbus.String)):
 		return str(val)
 	# Python has no byte type, so we convert to an integer.
@@ -253,14 +307,61 @@ def unwrap_dbus_value(val):
 	if isinstance(val, dbus.ByteArray):
 		return "".join([bytes(x) for x in val])
 	if isinstance(val, (list, tuple)):
-		return [unwrap_dbus_value(x) for x in val]
+		return _unwrap_list(val)
 	if isinstance(val, (dbus.Dictionary, dict)):
-		# Do not unwrap the keys, see comment in wrap_dbus_value
-		return dict([(x, unwrap_dbus_value(y)) for x, y in val.items()])
+		return _unwrap_dict(val)
 	if isinstance(val, dbus.Boolean):
 		return bool(val)
 	return val
 
+
+def _unwrap_array(val):
+	v = [unwrap_dbus_value(x) for x in val]
+	return None if len(v) == 0 else v
+
+
+def _unwrap_list(val):
+	return [unwrap_dbus_value(x) for x in val]
+
+
+def _unwrap_dict(val):
+	# Do not unwrap the keys, see comment in wrap_dbus_value
+	return dict([(x, unwrap_dbus_value(y)) for x, y in val.items()])
+
+
+def _unwrap_identity(val):
+	return val
+
+
+# Same idea as _wrap_dispatch: exact types only, anything else (for example
+# dbus.Struct or dbus.ObjectPath) takes the isinstance chain.
+_unwrap_dispatch = dict.fromkeys(dbus_int_types, int)
+_unwrap_dispatch.update({
+	dbus.Double: float,
+	dbus.Array: _unwrap_array,
+	dbus.String: str,
+	dbus.Signature: str,
+	dbus.Boolean: bool,
+	dbus.Dictionary: _unwrap_dict,
+	list: _unwrap_list,
+	tuple: _unwrap_list,
+	dict: _unwrap_dict,
+	int: _unwrap_identity,
+	float: _unwrap_identity,
+	str: _unwrap_identity,
+	bool: _unwrap_identity,
+	type(None): _unwrap_identity,
+})
+
+
+def unwrap_dbus_value(val):
+	"""Converts D-Bus values back to the original type. For example if val is of type DBus.Double,
+	a float will be returned."""
+	f = _unwrap_dispatch.get(type(val))
+	if f is not None:
+		return f(val)
+	return _unwrap_dbus_value_chain(val)
+
 # When supported, only name owner changes for the the given namespace are reported. This
 # prevents spending cpu time at irrelevant changes, like scripts accessing the bus temporarily.
 def add_name_owner_changed_receiver(dbus, name_owner_changed, namespace="com.victronenergy"):
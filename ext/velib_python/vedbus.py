@@ -119,6 +119,9 @@ class VeDbusService(object):
 		itemtype = itemtype or VeDbusItemExport
 		item = itemtype(self._dbusconn, path, value, description, writeable,
 				self._value_changed, gettextcallback, deletecallback=self._item_deleted, valuetype=valuetype)
+		# Let the root keep its GetItems snapshot up to date
+		self._dbusnodes['/']._add_item(path, item)
+		item._itemchangedcallback = self._dbusnodes['/']._item_changed
 
 		spl = path.split('/')
 		for i in range(2, len(spl)):
@@ -154,6 +157,9 @@ class VeDbusService(object):
 
 	def _item_deleted(self, path):
 		self._dbusobjects.pop(path)
+		root = self._dbusnodes.get('/')
+		if root is not None:
+			root._remove_item(path)
 		for np in list(self._dbusnodes.keys()):
 			if np != '/':
 				for ip in self._dbusobjects:
@@ -215,10 +221,8 @@ class ServiceContext(object):
 
 	def add_path(self, path, value, *args, **kwargs):
 		self.parent.add_path(path, value, *args, **kwargs)
-		self.changes[path] = {
-			'Value': wrap_dbus_value(value),
-			'Text': self.parent._dbusobjects[path].GetText()
-		}
+		# The root already wrapped the initial value for its GetItems snapshot
+		self.changes[path] = self.parent._dbusnodes['/']._items[path]
 
 	def del_tree(self, root):
 		root = root.rstrip('/')
@@ -474,18 +478,55 @@ class VeDbusTreeExport(dbus.service.Object):
 		return self._get_value_handler(self.path)
 
 class VeDbusRootExport(VeDbusTreeExport):
+	def __init__(self, bus, objectPath, service):
+		VeDbusTreeExport.__init__(self, bus, objectPath, service)
+		# Wire-format entries for GetItems, indexed by path. Entries are
+		# replaced whenever an item changes, so only changed values are ever
+		# wrapped again. The dictionary handed out by GetItems is rebuilt
+		# from these entries only when the version moved on.
+		self._items = {}
+		# Items with a gettextcallback, indexed by path. Their text may depend
+		# on other state than their value, so GetItems asks them every time.
+		self._text_items = {}
+		self._version = 0
+		self._snapshot = None
+		self._snapshot_version = -1
+
+	def _add_item(self, path, item):
+		if item._gettextcallback is None:
+			self._text_items.pop(path, None)
+		else:
+			self._text_items[path] = item
+		self._item_changed(path, {
+			'Value': wrap_dbus_value(item.local_get_value()),
+			'Text': item.GetText() })
+
+	def _item_changed(self, path, changes):
+		self._items[path] = changes
+		self._version += 1
+
+	def _remove_item(self, path):
+		self._text_items.pop(path, None)
+		if self._items.pop(path, None) is not None:
+			self._version += 1
+
 	@dbus.service.signal('com.victronenergy.BusItem', signature='a{sa{sv}}')
 	def ItemsChanged(self, changes):
 		pass
 
 	@dbus.service.method('com.victronenergy.BusItem', out_signature='a{sa{sv}}')
 	def GetItems(self):
-		return {
-			path: {
-				'Value': wrap_dbus_value(item.local_get_value()),
-				'Text': item.GetText() }
-			for path, item in self._service._dbusobjects.items()
-		}
+		if self._snapshot_version != self._version:
+			self._snapshot = dbus.Dictionary(self._items, signature=dbus.Signature('sa{sv}'))
+			self._snapshot_version = self._version
+		if not self._text_items:
+			return self._snapshot
+
+		# Fetch the text of these items now, as GetText does; their values come from the cache
+		items = dbus.Dictionary(self._snapshot, signature=dbus.Signature('sa{sv}'))
+		for path, item in self._text_items.items():
+			items[path] = {'Value': self._items[path]['Value'], 'Text': item.GetText()}
+		return items
 
 
 class VeDbusItemExport(dbus.service.Object):
@@ -512,6 +553,9 @@ class VeDbusItemExport(dbus.service.Object):
 		self._writeable = writeable
 		self._deletecallback = deletecallback
 		self._type = valuetype
+		# Set by VeDbusService, called with the path and the wire-format
+		# changes whenever the value changes.
+		self._itemchangedcallback = None
 
 	# To force immediate deregistering of this dbus object, explicitly call __del__().
 	def __del__(self):
@@ -544,10 +588,13 @@ class VeDbusItemExport(dbus.service.Object):
 			return None
 
 		self._value = newvalue
-		return {
+		changes = {
 			'Value': wrap_dbus_value(newvalue),
 			'Text': self.GetText()
 		}
+		if self._itemchangedcallback is not None:
+			self._itemchangedcallback(self.__dbus_object_path__, changes)
+		return changes
 
 	def local_get_value(self):
 		return self._value
@@ -129,6 +129,12 @@ if [ ! -d "/opt/victronenergy/tailscale" ]; then
     mkdir /opt/victronenergy/tailscale
 fi
 cp -f /data/venus-os_TailscaleGX/tailscale-control.py /opt/victronenergy/tailscale/tailscale-control.py
+cp -f /data/venus-os_TailscaleGX/connection_journal.py /opt/victronenergy/tailscale/connection_journal.py
+cp -f /data/venus-os_TailscaleGX/log_filter.py /opt/victronenergy/tailscale/log_filter.py
+cp -f /data/venus-os_TailscaleGX/metrics.py /opt/victronenergy/tailscale/metrics.py
+cp -f /data/venus-os_TailscaleGX/path_monitor.py /opt/victronenergy/tailscale/path_monitor.py
+cp -f /data/venus-os_TailscaleGX/tailscale_status.py /opt/victronenergy/tailscale/tailscale_status.py
+cp -f /data/venus-os_TailscaleGX/traffic.py /opt/victronenergy/tailscale/traffic.py
 cp -rf /data/venus-os_TailscaleGX/ext /opt/victronenergy/tailscale/ext
 
 # copy files in order that the initscript copies the service at startup
@@ -148,6 +154,8 @@ dbus -y com.victronenergy.settings /Settings AddSetting Services/Tailscale Custo
 dbus -y com.victronenergy.settings /Settings AddSetting Services/Tailscale CustomServerUrl "" s 0 0 > /dev/null
 dbus -y com.victronenergy.settings /Settings AddSetting Services/Tailscale Enabled 0 i 0 1 > /dev/null
 dbus -y com.victronenergy.settings /Settings AddSetting Services/Tailscale MachineName "" s 0 0 > /dev/null
+dbus -y com.victronenergy.settings /Settings AddSetting Services/Tailscale MetricsPort 0 i 0 65535 > /dev/null
+dbus -y com.victronenergy.settings /Settings AddSetting Services/Tailscale TrafficInterval 5 i 0 3600 > /dev/null
 echo ""
 
 # restore original datalist.py
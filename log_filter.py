@@ -0,0 +1,124 @@
+#
+# Logging filter against log floods, which fill /data/log and wear the flash
+#
+# Every message (logger, level and text) has a token bucket: LOG_BURST records
+# pass at once, then one every LOG_REFILL_SECONDS. The records dropped meanwhile
+# are counted and logged as one "repeated N times" summary by flush().
+
+
+import logging
+import time
+
+LOG_BURST = 5
+LOG_REFILL_SECONDS = 60
+# messages with a bucket, idle buckets are removed by flush() or when it is reached
+LOG_MAX_KEYS = 512
+# seconds between the summaries of the dropped records
+LOG_SUMMARY_INTERVAL = 60
+
+
+class RepeatBucket:
+    """
+    token bucket and drop count of one message
+    """
+
+    __slots__ = ("tokens", "updated", "dropped", "firstDropped", "logger", "level", "message")
+
+    def __init__(self, tokens: float, now: float, logger: str, level: int, message: str):
+        self.tokens = tokens
+        self.updated = now
+        self.dropped = 0
+        self.firstDropped = now
+        self.logger = logger
+        self.level = level
+        self.message = message
+
+
+class RepeatFilter(logging.Filter):
+    """
+    rate limits repeated identical log records, add it to the handlers
+    """
+
+    def __init__(
+        self,
+        burst: int = LOG_BURST,
+        refillSeconds: float = LOG_REFILL_SECONDS,
+        maxKeys: int = LOG_MAX_KEYS,
+        clock=time.monotonic,
+    ):
+        super().__init__()
+        self.burst = burst
+        self.refillSeconds = refillSeconds
+        self.maxKeys = maxKeys
+        self.clock = clock
+        self._buckets = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # the summaries of flush()
+        if getattr(record, "repeatSummary", False):
+            return True
+
+        now = self.clock()
+        message = record.getMessage()
+        key = (record.name, record.levelno, message)
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            if len(self._buckets) >= self.maxKeys:
+                self._prune(now)
+                # all messages are repeating, new ones are not limited
+                if len(self._buckets) >= self.maxKeys:
+                    return True
+
+            bucket = self._buckets[key] = RepeatBucket(
+                self.burst, now, record.name, record.levelno, message
+            )
+        else:
+            bucket.tokens = min(
+                self.burst, bucket.tokens + (now - bucket.updated) / self.refillSeconds
+            )
+            bucket.updated = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return True
+
+        if bucket.dropped == 0:
+            bucket.firstDropped = now
+        bucket.dropped += 1
+
+        return False
+
+    def _prune(self, now: float) -> None:
+        """
+        removes the buckets that are full again and have no dropped records
+        """
+        for key in [
+            key
+            for key, bucket in self._buckets.items()
+            if bucket.dropped == 0
+            and bucket.tokens + (now - bucket.updated) / self.refillSeconds >= self.burst
+        ]:
+            del self._buckets[key]
+
+    def flush(self) -> None:
+        """
+        logs a summary for every message with dropped records, then removes idle buckets
+        """
+        now = self.clock()
+
+        for bucket in self._buckets.values():
+            if bucket.dropped == 0:
+                continue
+
+            logging.getLogger(bucket.logger).log(
+                bucket.level,
+                '"%s" repeated %d times in the last %d s',
+                bucket.message,
+                bucket.dropped,
+                round(now - bucket.firstDropped),
+                extra={"repeatSummary": True},
+            )
+            bucket.dropped = 0
+
+        self._prune(now)
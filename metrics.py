@@ -0,0 +1,265 @@
+#
+# Metrics of tailscale-control in the Prometheus text format
+#
+# Metrics collects the counters while tailscale-control runs, renderMetrics()
+# turns them together with the current values into the text of one scrape.
+# Scrapes are answered with the last rendered text, so they never run commands.
+
+
+import os
+from typing import List, NamedTuple
+
+METRICS_PREFIX = "tailscale_control"
+# cgroup created for tailscaled by services/tailscale/run
+CGROUP_PATH = "/sys/fs/cgroup/tailscaled"
+
+
+class PeerSample(NamedTuple):
+    """
+    values of a peer, as published on /Peers/<n>
+    """
+
+    ipAddress: str
+    name: str
+    connected: bool
+    rxBytes: int
+    txBytes: int
+
+
+class CgroupSample(NamedTuple):
+    """
+    usage of the tailscaled cgroup, None if not available
+    """
+
+    cpuSeconds: float = None
+    throttledSeconds: float = None
+    throttledPeriods: int = None
+    memoryBytes: int = None
+
+
+class CommandStats:
+    """
+    number and duration of the runs of a command
+    """
+
+    __slots__ = ("count", "seconds", "maxSeconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.maxSeconds = 0.0
+
+
+def commandLabel(command: list) -> str:
+    """
+    # returns the label of a command, the program and its subcommand,
+    # e.g. "tailscale status" for ["/usr/bin/tailscale", "status", "--json"]
+    #
+    # :param command: list of command and arguments, as passed to sendCommand()
+    """
+    # commands run in a shell are passed as one string
+    arguments = " ".join(command).split()
+    if not arguments:
+        return ""
+
+    label = os.path.basename(arguments[0])
+    if len(arguments) > 1 and arguments[1].isalpha():
+        label += " " + arguments[1]
+
+    return label
+
+
+class Metrics:
+    """
+    counters of tailscale-control
+    """
+
+    def __init__(self):
+        # (from state, to state) -> count
+        self.stateTransitions = {}
+        # command label -> CommandStats
+        self.commands = {}
+
+    def stateChanged(self, previous: int, current: int) -> None:
+        key = (previous, current)
+        self.stateTransitions[key] = self.stateTransitions.get(key, 0) + 1
+
+    def commandFinished(self, command: list, seconds: float) -> None:
+        label = commandLabel(command)
+        stats = self.commands.get(label)
+        if stats is None:
+            stats = self.commands[label] = CommandStats()
+
+        stats.count += 1
+        stats.seconds += seconds
+        stats.maxSeconds = max(stats.maxSeconds, seconds)
+
+
+def _readNumber(path: str):
+    try:
+        with open(path) as file:
+            return int(file.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def readCgroup(path: str = CGROUP_PATH) -> CgroupSample:
+    """
+    # reads the CPU and memory usage of the cgroup of tailscaled from the cgroup v1
+    # cpu,cpuacct hierarchy; the memory controller is not mounted on Venus OS,
+    # then the memory is the resident size of the processes in the cgroup
+    #
+    # :param path: directory of the cgroup
+    """
+    cpuNanoseconds = _readNumber(os.path.join(path, "cpuacct.usage"))
+
+    throttledSeconds = None
+    throttledPeriods = None
+    try:
+        with open(os.path.join(path, "cpu.stat")) as file:
+            stat = dict(line.split() for line in file if len(line.split()) == 2)
+        throttledSeconds = int(stat["throttled_time"]) / 1e9
+        throttledPeriods = int(stat["nr_throttled"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    memoryBytes = _readNumber(os.path.join(path, "memory.usage_in_bytes"))
+    if memoryBytes is None:
+        try:
+            with open(os.path.join(path, "tasks")) as file:
+                tasks = file.read().split()
+        except OSError:
+            tasks = []
+
+        for task in tasks:
+            try:
+                with open(f"/proc/{task}/status") as file:
+                    for line in file:
+                        if line.startswith("VmRSS:"):
+                            memoryBytes = (memoryBytes or 0) + int(line.split()[1]) * 1024
+                            break
+            except (OSError, ValueError, IndexError):
+                continue
+
+    return CgroupSample(
+        None if cpuNanoseconds is None else cpuNanoseconds / 1e9,
+        throttledSeconds,
+        throttledPeriods,
+        memoryBytes,
+    )
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value) -> str:
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def renderMetrics(
+    metrics: Metrics,
+    state: int,
+    peers: List[PeerSample],
+    cgroup: CgroupSample,
+) -> bytes:
+    """
+    # returns the metrics in the Prometheus text format
+    #
+    # :param metrics: counters of tailscale-control
+    # :param state: state as published on /State
+    # :param peers: the peers as published on /Peers
+    # :param cgroup: usage of the tailscaled cgroup
+    """
+    lines = []
+
+    def family(name: str, kind: str, help: str, samples: list) -> None:
+        """
+        adds a metric with samples as list of (name suffix and labels, value),
+        samples without value are left out
+        """
+        samples = [(suffix, value) for suffix, value in samples if value is not None]
+        if not samples:
+            return
+
+        lines.append(f"# HELP {METRICS_PREFIX}_{name} {help}")
+        lines.append(f"# TYPE {METRICS_PREFIX}_{name} {kind}")
+        for suffix, value in samples:
+            lines.append(f"{METRICS_PREFIX}_{name}{suffix} {_number(value)}")
+
+    family("state", "gauge", "State published on /State, see enum_states.txt.", [("", state)])
+    family(
+        "state_transitions_total",
+        "counter",
+        "State changes since tailscale-control started.",
+        [
+            (_labels(**{"from": previous, "to": current}), count)
+            for (previous, current), count in sorted(metrics.stateTransitions.items())
+        ],
+    )
+
+    commands = sorted(metrics.commands.items())
+    family(
+        "command_duration_seconds",
+        "summary",
+        "Duration of the commands run by tailscale-control.",
+        [("_sum" + _labels(command=label), stats.seconds) for label, stats in commands]
+        + [("_count" + _labels(command=label), stats.count) for label, stats in commands],
+    )
+    family(
+        "command_duration_max_seconds",
+        "gauge",
+        "Longest run of the commands run by tailscale-control.",
+        [(_labels(command=label), stats.maxSeconds) for label, stats in commands],
+    )
+
+    family("peers", "gauge", "Peers listed by tailscale status.", [("", len(peers))])
+    family(
+        "peers_connected",
+        "gauge",
+        "Peers with an active connection.",
+        [("", sum(1 for peer in peers if peer.connected))],
+    )
+    family(
+        "peer_rx_bytes_total",
+        "counter",
+        "Bytes received from the peer, reset when tailscaled restarts.",
+        [(_labels(ip=peer.ipAddress, name=peer.name), peer.rxBytes) for peer in peers],
+    )
+    family(
+        "peer_tx_bytes_total",
+        "counter",
+        "Bytes sent to the peer, reset when tailscaled restarts.",
+        [(_labels(ip=peer.ipAddress, name=peer.name), peer.txBytes) for peer in peers],
+    )
+
+    family(
+        "tailscaled_cpu_seconds_total",
+        "counter",
+        "CPU time used by the tailscaled cgroup.",
+        [("", cgroup.cpuSeconds)],
+    )
+    family(
+        "tailscaled_cpu_throttled_seconds_total",
+        "counter",
+        "Time the tailscaled cgroup was throttled by its CPU quota.",
+        [("", cgroup.throttledSeconds)],
+    )
+    family(
+        "tailscaled_cpu_throttled_periods_total",
+        "counter",
+        "Periods the tailscaled cgroup was throttled by its CPU quota.",
+        [("", cgroup.throttledPeriods)],
+    )
+    family(
+        "tailscaled_memory_bytes",
+        "gauge",
+        "Memory used by the tailscaled cgroup.",
+        [("", cgroup.memoryBytes)],
+    )
+
+    return ("\n".join(lines) + "\n").encode("utf-8")
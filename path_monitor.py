@@ -0,0 +1,175 @@
+#
+# Monitor of the path to the connected peers, direct or relayed by DERP, and its round trip time
+#
+# Every connected peer is pinged once every PATH_PROBE_INTERVAL seconds with
+# `tailscale ping --c 1`, the results are kept in a window of the last
+# PATH_WINDOW_SAMPLES pings. When a direct path is lost, the peer is probed again
+# PATH_REPROBES times every PATH_REPROBE_INTERVAL seconds, to see if it comes back.
+
+
+import re
+from collections import deque
+from typing import List, NamedTuple, Optional, Set
+
+PATH_DIRECT = "direct"
+PATH_RELAYED = "relayed"
+
+PATH_WINDOW_SAMPLES = 5
+PATH_PROBE_INTERVAL = 60
+PATH_REPROBE_INTERVAL = 5
+PATH_REPROBES = 3
+
+# "pong from laptop (100.88.12.7) via 192.168.1.23:41641 in 23ms"
+# "pong from laptop (100.88.12.7) via DERP(fra) in 45ms"
+PONG = re.compile(
+    r"^pong from \S+ \([^)]*\) via (?:DERP\((?P<relay>[^)]*)\)|\S+) in (?P<rtt>[\d.]+)ms",
+    re.M,
+)
+
+
+class PingResult(NamedTuple):
+    """
+    result of a ping, path and rttMs are None if there was no reply
+    """
+
+    path: Optional[str]
+    rttMs: Optional[float]
+    # name of the DERP region, if relayed
+    relay: str = ""
+
+
+NO_REPLY = PingResult(None, None)
+
+
+def parsePing(stdout: str) -> PingResult:
+    """
+    # returns the result of `tailscale ping`, from its last reply
+    #
+    # :param stdout: standard output of `tailscale ping`
+    """
+    matches = list(PONG.finditer(stdout or ""))
+    if not matches:
+        return NO_REPLY
+
+    match = matches[-1]
+    if match.group("relay") is not None:
+        return PingResult(PATH_RELAYED, float(match.group("rtt")), match.group("relay"))
+
+    return PingResult(PATH_DIRECT, float(match.group("rtt")))
+
+
+class PathWindow:
+    """
+    the last ping results of a peer and when it is probed next
+    """
+
+    __slots__ = ("results", "due", "reprobes")
+
+    def __init__(self, due: float, size: int = PATH_WINDOW_SAMPLES):
+        self.results = deque(maxlen=size)
+        self.due = due
+        # probes left at PATH_REPROBE_INTERVAL
+        self.reprobes = 0
+
+    def path(self) -> Optional[str]:
+        """
+        returns the path of the newest reply in the window, None if there was none
+        """
+        for result in reversed(self.results):
+            if result.path is not None:
+                return result.path
+
+        return None
+
+    def rttMs(self) -> Optional[float]:
+        """
+        returns the median round trip time of the replies over the current path
+        """
+        path = self.path()
+        if path is None:
+            return None
+
+        rtts = sorted(result.rttMs for result in self.results if result.path == path)
+        middle = len(rtts) // 2
+        return rtts[middle] if len(rtts) % 2 else (rtts[middle - 1] + rtts[middle]) / 2
+
+
+class PathMonitor:
+    """
+    decides which peer is pinged next and keeps the results of the peers
+    """
+
+    def __init__(
+        self,
+        interval: float = PATH_PROBE_INTERVAL,
+        reprobeInterval: float = PATH_REPROBE_INTERVAL,
+        reprobes: int = PATH_REPROBES,
+    ):
+        self.interval = interval
+        self.reprobeInterval = reprobeInterval
+        self.reprobes = reprobes
+        # PathWindow by tailscale IP address
+        self.windows = {}
+
+    def update(self, ipAddresses: Set[str], now: float) -> List[str]:
+        """
+        # sets the peers to monitor, new peers are probed right away
+        #
+        # :param ipAddresses: tailscale IP addresses of the connected peers
+        # :param now: monotonic time
+        # :return: IP addresses of the peers that are no longer monitored
+        """
+        removed = [ipAddress for ipAddress in self.windows if ipAddress not in ipAddresses]
+        for ipAddress in removed:
+            del self.windows[ipAddress]
+
+        for ipAddress in ipAddresses:
+            if ipAddress not in self.windows:
+                self.windows[ipAddress] = PathWindow(now)
+
+        return removed
+
+    def next(self, now: float) -> Optional[str]:
+        """
+        returns the IP address of the peer to ping now, the one overdue the longest
+        """
+        ipAddress = min(self.windows, key=lambda ip: self.windows[ip].due, default=None)
+        if ipAddress is None or self.windows[ipAddress].due > now:
+            return None
+
+        return ipAddress
+
+    def directLost(self, ipAddress: str, now: float) -> None:
+        """
+        probes the peer again, e.g. when tailscale status shows it is relayed now
+        """
+        window = self.windows.get(ipAddress)
+        if window is not None:
+            window.reprobes = self.reprobes
+            window.due = now
+
+    def record(self, ipAddress: str, result: PingResult, now: float) -> bool:
+        """
+        # adds the result of a ping and schedules the next one
+        #
+        # :return: True if the path changed
+        """
+        window = self.windows.get(ipAddress)
+        if window is None:
+            return False
+
+        path = window.path()
+        window.results.append(result)
+
+        if result.path == PATH_DIRECT:
+            window.reprobes = 0
+        elif path == PATH_DIRECT:
+            window.reprobes = self.reprobes
+
+        if window.reprobes > 0:
+            window.reprobes -= 1
+            window.due = now + self.reprobeInterval
+        else:
+            window.due = now + self.interval
+
+        return window.path() != path
@@ -9,11 +9,15 @@
 # 	    to connect to the GX device.
 
 
+import json
 import logging
 import os
 import re
+import signal
+import socket
 import subprocess
 import sys
+import time
 from socket import gethostname
 
 import dbus
@@ -21,9 +25,23 @@ from dbus.mainloop.glib import DBusGMainLoop
 from gi.repository import GLib
 
 # Victron packages
+# only what is needed to publish /State and the cached peers, everything else is
+# imported at its first use after the service is registered
 sys.path.insert(1, os.path.join(os.path.dirname(__file__), "ext/velib_python"))
 from vedbus import VeDbusService  # noqa: E402
-from settingsdevice import SettingsDevice  # noqa: E402
+
+from tailscale_status import (  # noqa: E402
+    STATE_BACKEND_STARTING,
+    STATE_BACKEND_STOPPED,
+    STATE_CONNECTION_OK,
+    STATE_INITIALIZING,
+    STATE_LOGGED_OUT,
+    STATE_NO_STATE,
+    STATE_STOPPED,
+    STATE_WAIT_FOR_RESPONSE,
+    PeerTable,
+    classifyStatus,
+)
 
 
 def sendCommand(command: list = None, shell: bool = False) -> tuple:
@@ -39,6 +57,8 @@ def sendCommand(command: list = None, shell: bool = False) -> tuple:
         logging.error("sendCommand(): no command specified")
         return None, None, None
 
+    start = time.monotonic()
+
     try:
         proc = subprocess.Popen(
             command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=shell
@@ -55,11 +75,48 @@ def sendCommand(command: list = None, shell: bool = False) -> tuple:
         return None, None, None
     else:
         out, err = proc.communicate()
+        if metrics is not None:
+            metrics.commandFinished(command, time.monotonic() - start)
         stdout = out.decode().strip()
         stderr = err.decode().strip()
         return stdout, stderr, proc.returncode
 
 
+def logInstalledVersion() -> None:
+    """
+    Starts `tailscale version` without waiting for it and logs the installed
+    binary version from the main loop once the command has finished
+    """
+    try:
+        proc = subprocess.Popen(
+            ["/usr/bin/tailscale", "version"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except Exception:
+        logging.info("Tailscale binary version unknown")
+        return
+
+    def versionReceived(source, condition) -> bool:
+        out, err = proc.communicate()
+        lines = out.decode().strip().splitlines()
+
+        if proc.returncode == 0 and len(lines) > 0:
+            installedVersion = lines[0]
+        else:
+            installedVersion = "unknown"
+
+        # log the tailscale binary version
+        logging.info(f"Tailscale binary version {installedVersion}")
+
+        return False
+
+    # stdout is closed when the command exits
+    GLib.io_add_watch(
+        proc.stdout, GLib.PRIORITY_DEFAULT, GLib.IO_HUP | GLib.IO_ERR, versionReceived
+    )
+
+
 def cleanupErrorMessage(errorMessage: str) -> str:
     """
     cleanup error message
@@ -138,103 +195,745 @@ def checkDeviceNetwork(device: str) -> str:
     return ""
 
 
-def checkDeviceConnectionAndLog() -> None:
+def checkDeviceConnectionAndLog(stdout: str) -> None:
     """
     Checks which devices are connected to this GX device
     and logs, if a device connects and then disconnects
+
+    :param stdout: output of tailscale status
     """
-    global tailscaleDevices
+    global peersPublished
 
-    stdout, stderr, exitCode = sendCommand(["/usr/bin/tailscale", "status"])
+    now = time.time()
 
-    if exitCode == 0:
-        # Split the stdout string into lines
-        lines = stdout.strip().split("\n")
-
-        # Initialize an empty list
-        devicesList = {}
-
-        # Iterate over each line
-        for line in lines:
-            # Split the line into components
-            components = line.split()
-            # Ensure the line has at least 5 components
-            if len(components) <= 5:
+    for peer in tailscaleDevices.update(stdout):
+        logging.info(
+            "Tailscale VPN connection log <-->: "
+            + f"{peer.name} (VPN IP: {peer.ipAddress}) "
+            + ("connected" if peer.connected else "disconnected")
+        )
+
+        if connectionJournal is not None:
+            from connection_journal import EVENT_CONNECTED, EVENT_DISCONNECTED
+
+            connectionJournal.append(
+                now,
+                peer.ipAddress,
+                peer.name,
+                EVENT_CONNECTED if peer.connected else EVENT_DISCONNECTED,
+            )
+
+    # ping the peers that are relayed now again, see pathLoop()
+    for peer in tailscaleDevices.directLost:
+        logging.info(f"direct path to {peer.name} (VPN IP: {peer.ipAddress}) lost")
+        pathMonitor.directLost(peer.ipAddress, time.monotonic())
+
+    # the peers are removed from dbus while not connected, publish them again then
+    if tailscaleDevices.changes != peersPublished or len(peerIndexes) != len(
+        tailscaleDevices.peers
+    ):
+        updatePeers(tailscaleDevices.peers)
+        peersPublished = tailscaleDevices.changes
+
+
+def updatePeers(devicesList: dict) -> None:
+    """
+    Exports the devices as /Peers/<n>/{Name,User,Os,IPv4,Connected,LastSeen}.
+    Only changed values are sent, all together in one ItemsChanged signal
+
+    :param devicesList: Peer records by IP address, see PeerTable
+    """
+    now = int(time.time())
+
+    with DbusService as context:
+        # remove devices that are gone, their index is reused
+        for ipAddress in list(peerIndexes):
+            if ipAddress not in devicesList:
+                context.del_tree(f"/Peers/{peerIndexes.pop(ipAddress)}")
+
+        for ipAddress, peer in devicesList.items():
+            connected = 1 if peer.connected else 0
+
+            if ipAddress not in peerIndexes:
+                index = min(set(range(len(peerIndexes) + 1)) - set(peerIndexes.values()))
+                peerIndexes[ipAddress] = index
+                path = f"/Peers/{index}"
+
+                context.add_path(path + "/Name", peer.name)
+                context.add_path(path + "/User", peer.user)
+                context.add_path(path + "/Os", peer.os)
+                context.add_path(path + "/IPv4", ipAddress)
+                context.add_path(path + "/Connected", connected)
+                # unix timestamp, updated when the device connects and disconnects
+                context.add_path(path + "/LastSeen", now if connected else None)
+                # set by updateTraffic()
+                context.add_path(path + "/LastHandshake", None)
+                context.add_path(path + "/RxBytes", None)
+                context.add_path(path + "/TxBytes", None)
+                context.add_path(path + "/RxRate", None)
+                context.add_path(path + "/TxRate", None)
+                # set by pathLoop()
+                context.add_path(path + "/Path", None)
+                context.add_path(path + "/RttMs", None)
                 continue
-            # Extract the IP address, device name, user name, OS, and state
-            ipAddress = components[0]
-            deviceName = components[1]
-            userName = components[2]
-            os = components[3]
-            state = " ".join(components[4:])
-            # Create a dictionary with the extracted information
-            devicesList[ipAddress] = {
-                "deviceName": deviceName,
-                "userName": userName,
-                "os": os,
-                "connected": True if "active" in state else False,
-            }
-
-        # check if a device connected or if a device disconnected after being connected
-        for ipAddress, properties in devicesList.items():
-            # check if ip address already exists in last status
-            if ipAddress in tailscaleDevices:
-                # check if device was connected and now is disconnected
-                if (
-                    not tailscaleDevices[ipAddress]["connected"]
-                    and properties["connected"]
-                ):
-                    logging.info(
-                        "Tailscale VPN connection log <-->: "
-                        + f'{properties["deviceName"]} (VPN IP: {ipAddress}) connected'
-                    )
-                # check if d was disconnected and now is connected
-                elif (
-                    tailscaleDevices[ipAddress]["connected"]
-                    and not properties["connected"]
-                ):
-                    logging.info(
-                        "Tailscale VPN connection log <-->: "
-                        + f'{properties["deviceName"]} (VPN IP: {ipAddress}) disconnected'
-                    )
-            else:
-                # check if new device is connected
-                if properties["connected"]:
-                    logging.info(
-                        "Tailscale VPN connection log <-->: "
-                        + f'{properties["deviceName"]} (VPN IP: {ipAddress}) connected'
-                    )
 
-        tailscaleDevices = devicesList
+            path = f"/Peers/{peerIndexes[ipAddress]}"
 
-    else:
-        pass
+            if context[path + "/Connected"] != connected:
+                context[path + "/LastSeen"] = now
+
+            context[path + "/Name"] = peer.name
+            context[path + "/User"] = peer.user
+            context[path + "/Os"] = peer.os
+            context[path + "/Connected"] = connected
 
 
 # static variables for main and mainLoop
 DbusSettings = None
 DbusService = None
 
-# define states
-STATE_INITIALIZING = 0
-STATE_BACKEND_STARTING = 1
-STATE_BACKEND_STOPPED = 2
-STATE_CONNECTION_FAILED = 3
-STATE_STOPPED = 4
-STATE_LOGGED_OUT = 5
-STATE_WAIT_FOR_RESPONSE = 6
-STATE_WAIT_FOR_LOGIN = 7
-STATE_NO_STATE = 8
-STATE_CONNECTION_OK = 100
-
 # define global variables
 stateCurrent = STATE_INITIALIZING
 statePrevious = STATE_INITIALIZING
 systemNameObject = None
 systemNameCurrent = ""
 systemNamePrevious = ""
-tailscaleDevices = {}
+tailscaleDevices = PeerTable()
+# PeerTable.changes when the peers were last published by updatePeers()
+peersPublished = None
+peerIndexes = {}
 autoUpdateDisabled = False
+advertisedRoutes = []
+
+# last known state, published on startup until tailscale confirms the state
+STATE_CACHE_FILE = "/data/conf/tailscale-control/state.json"
+# the values of the file without the peers, and PeerTable.peerChanges when it was written
+stateCache = {}
+stateCachePeers = None
+stateStale = False
+
+
+def loadStateCache() -> None:
+    """
+    Loads the last known state from the cache file and publishes it on dbus,
+    marked as stale until mainLoop gets a state from tailscale
+    """
+    global stateCache, stateCachePeers, stateStale
+    global tailscaleDevices, advertisedRoutes
+
+    try:
+        with open(STATE_CACHE_FILE, "r") as file:
+            cache = json.load(file)
+
+        state = int(cache["state"])
+        ipV4 = str(cache["ipV4"])
+        ipV6 = str(cache["ipV6"])
+        devices = PeerTable.fromCache(cache["devices"])
+        routes = [str(route) for route in cache["advertisedRoutes"]]
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        logging.warning(f"ignoring state cache {STATE_CACHE_FILE}: {repr(e)}")
+        return
+
+    stateCache = {"state": state, "ipV4": ipV4, "ipV6": ipV6, "advertisedRoutes": routes}
+    stateCachePeers = devices.peerChanges
+    stateStale = True
+    tailscaleDevices = devices
+    advertisedRoutes = routes
+
+    DbusService["/State"] = state
+    DbusService["/IPv4"] = ipV4
+    DbusService["/IPv6"] = ipV6
+    DbusService["/AdvertisedRoutes"] = ",".join(routes)
+    DbusService["/Stale"] = 1
+    updatePeers(devices.peers)
+
+    logging.info(f"published cached state {state} until it is confirmed")
+
+
+def saveStateCache() -> None:
+    """
+    Writes the current state to the cache file, if it changed since the last write.
+    The file is replaced atomically, so a power loss leaves either the old or the new one
+    """
+    global stateCache, stateCachePeers
+
+    state = {
+        "state": DbusService["/State"],
+        "ipV4": DbusService["/IPv4"],
+        "ipV6": DbusService["/IPv6"],
+        "advertisedRoutes": advertisedRoutes,
+    }
+
+    # limit flash wear, write only on changes. Peers going idle or active are not
+    # a change of their own, they are written together with the next one
+    if state == stateCache and tailscaleDevices.peerChanges == stateCachePeers:
+        return
+
+    cache = dict(state, devices=tailscaleDevices.toCache())
+
+    tempFile = STATE_CACHE_FILE + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(STATE_CACHE_FILE), exist_ok=True)
+        with open(tempFile, "w") as file:
+            json.dump(cache, file, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tempFile, STATE_CACHE_FILE)
+    except Exception as e:
+        logging.warning(f"writing state cache {STATE_CACHE_FILE} failed: {repr(e)}")
+        return
+
+    stateCache = state
+    stateCachePeers = tailscaleDevices.peerChanges
+
+
+def confirmState() -> None:
+    """
+    Called when tailscale reported a state, from then on the values published
+    on dbus are current and no longer the ones from the cache
+    """
+    global stateStale
+
+    if stateStale:
+        stateStale = False
+        DbusService["/Stale"] = 0
+
+
+# seconds to check again, if the traffic counters are disabled
+TRAFFIC_DISABLED_CHECK = 10
+# traffic window of every peer by IP address
+peerTraffic = {}
+# source id of the pending trafficLoop() call
+trafficTimeout = None
+
+
+def updateTraffic() -> None:
+    """
+    Reads the byte counters and last handshake of every peer from the tailscale
+    status JSON and publishes them together with the rates
+    """
+    from traffic import TrafficWindow, parsePeerTraffic
+
+    stdout, stderr, exitCode = sendCommand(["/usr/bin/tailscale", "status", "--json"])
+
+    if exitCode != 0:
+        logging.warning(f"tailscale status --json failed {exitCode}: {stderr}")
+        return
+
+    try:
+        peers = parsePeerTraffic(stdout)
+    except ValueError as e:
+        logging.warning(f"tailscale status --json returned invalid JSON: {repr(e)}")
+        return
+
+    now = time.monotonic()
+    rxRateTotal = 0.0
+    txRateTotal = 0.0
+
+    with DbusService as context:
+        for peer in peers:
+            # only peers that are exported by updatePeers()
+            if peer.ipAddress not in peerIndexes:
+                continue
+
+            if peer.ipAddress not in peerTraffic:
+                peerTraffic[peer.ipAddress] = TrafficWindow()
+
+            window = peerTraffic[peer.ipAddress]
+            window.add(now, peer.rxBytes, peer.txBytes)
+            rxRate, txRate = window.rates()
+
+            path = f"/Peers/{peerIndexes[peer.ipAddress]}"
+            context[path + "/LastHandshake"] = peer.lastHandshake
+            context[path + "/RxBytes"] = peer.rxBytes
+            context[path + "/TxBytes"] = peer.txBytes
+            context[path + "/RxRate"] = None if rxRate is None else round(rxRate)
+            context[path + "/TxRate"] = None if txRate is None else round(txRate)
+
+            rxRateTotal += rxRate or 0.0
+            txRateTotal += txRate or 0.0
+
+        # forget the windows of peers that are gone
+        for ipAddress in list(peerTraffic):
+            if ipAddress not in peerIndexes:
+                del peerTraffic[ipAddress]
+
+        context["/Traffic/RxRate"] = round(rxRateTotal)
+        context["/Traffic/TxRate"] = round(txRateTotal)
+
+
+def trafficLoop() -> bool:
+    """
+    Runs every TrafficInterval seconds, independent of mainLoop, and updates the traffic
+    counters and rates while connected
+    """
+    global trafficTimeout
+
+    interval = DbusSettings["TrafficInterval"]
+
+    if interval > 0 and stateCurrent == STATE_CONNECTION_OK:
+        updateTraffic()
+    else:
+        peerTraffic.clear()
+        DbusService["/Traffic/RxRate"] = None
+        DbusService["/Traffic/TxRate"] = None
+
+    # scheduled again every time with the current interval, settingChanged()
+    # reschedules it when the interval is changed
+    trafficTimeout = GLib.timeout_add_seconds(
+        interval if interval > 0 else TRAFFIC_DISABLED_CHECK, trafficLoop
+    )
+
+    return False
+
+
+def settingChanged(setting: str, oldValue, newValue) -> None:
+    """
+    Called by SettingsDevice when a setting changed, a new TrafficInterval
+    is applied right away instead of after the pending interval
+    """
+    global trafficTimeout
+
+    if setting == "TrafficInterval" and trafficTimeout is not None:
+        GLib.source_remove(trafficTimeout)
+        trafficTimeout = GLib.idle_add(trafficLoop)
+
+
+JOURNAL_FILE = "/data/conf/tailscale-control/journal.bin"
+# seconds the connection events are collected before they are written to flash
+JOURNAL_FLUSH_INTERVAL = 60
+connectionJournal = None
+
+
+def openConnectionJournal() -> None:
+    """
+    Opens the connection journal, connection events are only logged if that fails
+    """
+    global connectionJournal
+
+    from connection_journal import ConnectionJournal
+
+    try:
+        connectionJournal = ConnectionJournal(JOURNAL_FILE)
+    except OSError as e:
+        logging.warning(f"connection journal {JOURNAL_FILE} not available: {repr(e)}")
+
+
+def journalLoop() -> bool:
+    """
+    Runs every JOURNAL_FLUSH_INTERVAL seconds and writes the collected connection events
+    """
+    try:
+        connectionJournal.flush()
+    except OSError as e:
+        logging.warning(f"writing connection journal {JOURNAL_FILE} failed: {repr(e)}")
+
+    return True
+
+
+class JournalExport(dbus.service.Object):
+    """
+    Exports the connection journal as /Journal with the methods GetLast(count) and
+    GetSince(timestamp), both return the events oldest first as list of
+    {Timestamp, IPv4, Name, Event}
+    """
+
+    @staticmethod
+    def _wrap(events: list) -> dbus.Array:
+        from connection_journal import EVENT_NAMES
+
+        return dbus.Array(
+            [
+                {
+                    "Timestamp": dbus.Int64(event.timestamp),
+                    "IPv4": dbus.String(event.ipAddress),
+                    "Name": dbus.String(event.name),
+                    "Event": dbus.String(EVENT_NAMES.get(event.event, "")),
+                }
+                for event in events
+            ],
+            signature="a{sv}",
+        )
+
+    @dbus.service.method(
+        "com.victronenergy.tailscale.Journal", in_signature="u", out_signature="aa{sv}"
+    )
+    def GetLast(self, count):
+        if connectionJournal is None:
+            return self._wrap([])
+        return self._wrap(connectionJournal.last(int(count)))
+
+    @dbus.service.method(
+        "com.victronenergy.tailscale.Journal", in_signature="x", out_signature="aa{sv}"
+    )
+    def GetSince(self, timestamp):
+        if connectionJournal is None:
+            return self._wrap([])
+        return self._wrap(connectionJournal.since(int(timestamp)))
+
+
+# rate limits repeated log messages, created and added to the log handlers in main()
+repeatFilter = None
+
+
+def logSummaryLoop() -> bool:
+    """
+    Runs every LOG_SUMMARY_INTERVAL seconds and logs how often the rate limited
+    messages were repeated
+    """
+    repeatFilter.flush()
+
+    return True
+
+
+def publishLogLevel(name: str) -> bool:
+    DbusService["/LogLevel"] = name
+
+    return False
+
+
+def setLogLevel(path: str, value: str) -> bool:
+    """
+    Sets the log level when /LogLevel is written, the value is a level name like DEBUG or WARNING
+    """
+    level = logging.getLevelName(str(value).upper())
+    if not isinstance(level, int):
+        logging.warning(f"invalid log level {value}")
+        return False
+
+    # e.g. WARNING for "warn"
+    name = logging.getLevelName(level)
+
+    # logged before, so the change is visible when raising the level
+    logging.info(f"log level set to {name}")
+    logging.getLogger().setLevel(level)
+
+    # the written value is stored after this returns, replace it by the level name then
+    if value != name:
+        GLib.idle_add(publishLogLevel, name)
+
+    return True
+
+
+# counters for the metrics endpoint, created in main()
+metrics = None
+# seconds between renderings of the metrics, scrapes get the last one
+METRICS_INTERVAL = 10
+# longest request accepted and seconds a scrape may take
+METRICS_REQUEST_BYTES = 4096
+METRICS_TIMEOUT = 10
+METRICS_CONNECTIONS = 4
+METRICS_NOT_FOUND = (
+    b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+)
+# listening socket, its address as (IPv4, port) and its watch
+metricsServer = None
+metricsAddress = None
+metricsWatch = None
+# the last rendered response to GET /metrics
+metricsResponse = b""
+metricsConnections = set()
+
+
+class MetricsConnection:
+    """
+    One scrape of the metrics endpoint, reads the request and sends the last rendered
+    response from GLib watches, so the main loop is never blocked
+    """
+
+    def __init__(self, connection: socket.socket):
+        self.connection = connection
+        self.request = b""
+        self.response = None
+        self.sent = 0
+
+        connection.setblocking(False)
+        self.watch = GLib.io_add_watch(
+            connection.fileno(),
+            GLib.PRIORITY_DEFAULT,
+            GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR,
+            self.received,
+        )
+        self.timeout = GLib.timeout_add_seconds(METRICS_TIMEOUT, self.timedOut)
+        metricsConnections.add(self)
+
+    def received(self, source, condition) -> bool:
+        try:
+            data = self.connection.recv(METRICS_REQUEST_BYTES)
+        except BlockingIOError:
+            return True
+        except OSError:
+            data = b""
+
+        self.request += data
+
+        if data == b"" or len(self.request) > METRICS_REQUEST_BYTES:
+            self.watch = None
+            self.close()
+            return False
+
+        # wait for the end of the headers
+        if b"\r\n\r\n" not in self.request and b"\n\n" not in self.request:
+            return True
+
+        if self.request.startswith(b"GET /metrics ") or self.request.startswith(
+            b"GET /metrics?"
+        ):
+            self.response = memoryview(metricsResponse)
+        else:
+            self.response = memoryview(METRICS_NOT_FOUND)
+
+        self.watch = GLib.io_add_watch(
+            self.connection.fileno(),
+            GLib.PRIORITY_DEFAULT,
+            GLib.IO_OUT | GLib.IO_HUP | GLib.IO_ERR,
+            self.writable,
+        )
+        return False
+
+    def writable(self, source, condition) -> bool:
+        try:
+            self.sent += self.connection.send(self.response[self.sent :])
+        except BlockingIOError:
+            return True
+        except OSError:
+            self.sent = len(self.response)
+
+        if self.sent < len(self.response):
+            return True
+
+        self.watch = None
+        self.close()
+        return False
+
+    def timedOut(self) -> bool:
+        self.timeout = None
+        self.close()
+        return False
+
+    def close(self) -> None:
+        if self.watch is not None:
+            GLib.source_remove(self.watch)
+            self.watch = None
+        if self.timeout is not None:
+            GLib.source_remove(self.timeout)
+            self.timeout = None
+
+        self.connection.close()
+        metricsConnections.discard(self)
+
+
+def metricsAccept(source, condition) -> bool:
+    """
+    Accepts a scrape on the metrics endpoint
+    """
+    try:
+        connection, address = metricsServer.accept()
+    except OSError:
+        return True
+
+    if len(metricsConnections) >= METRICS_CONNECTIONS:
+        connection.close()
+    else:
+        MetricsConnection(connection)
+
+    return True
+
+
+def closeMetricsServer() -> None:
+    global metricsServer, metricsAddress, metricsWatch
+
+    if metricsServer is not None:
+        logging.info(f"metrics endpoint on {metricsAddress[0]}:{metricsAddress[1]} closed")
+        GLib.source_remove(metricsWatch)
+        metricsServer.close()
+
+    metricsServer = None
+    metricsAddress = None
+    metricsWatch = None
+
+
+def openMetricsServer(address: tuple) -> None:
+    """
+    Listens for scrapes on address, logs a warning if that fails and is tried again
+    by the next metricsLoop
+    """
+    global metricsServer, metricsAddress, metricsWatch
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(address)
+        server.listen(METRICS_CONNECTIONS)
+        server.setblocking(False)
+    except OSError as e:
+        server.close()
+        logging.warning(f"metrics endpoint on {address[0]}:{address[1]} failed: {repr(e)}")
+        return
+
+    metricsServer = server
+    metricsAddress = address
+    metricsWatch = GLib.io_add_watch(
+        server.fileno(), GLib.PRIORITY_DEFAULT, GLib.IO_IN, metricsAccept
+    )
+    logging.info(f"metrics endpoint on {address[0]}:{address[1]}")
+
+
+def renderMetricsResponse() -> bytes:
+    """
+    Renders the response to GET /metrics from the values published on dbus
+    """
+    from metrics import PeerSample, readCgroup, renderMetrics
+
+    peers = []
+    for ipAddress, peer in tailscaleDevices.peers.items():
+        if ipAddress not in peerIndexes:
+            continue
+        path = f"/Peers/{peerIndexes[ipAddress]}"
+        peers.append(
+            PeerSample(
+                ipAddress,
+                peer.name,
+                peer.connected,
+                DbusService[path + "/RxBytes"],
+                DbusService[path + "/TxBytes"],
+            )
+        )
+
+    body = renderMetrics(metrics, stateCurrent, peers, readCgroup())
+
+    return (
+        b"HTTP/1.1 200 OK\r\n"
+        + b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+        + b"Content-Length: %d\r\n" % len(body)
+        + b"Connection: close\r\n\r\n"
+        + body
+    )
+
+
+def metricsLoop() -> bool:
+    """
+    Runs every METRICS_INTERVAL seconds, listens on the Tailscale IPv4 and the MetricsPort
+    setting while connected and renders the metrics for the next scrapes
+    """
+    global metricsResponse
+
+    port = DbusSettings["MetricsPort"]
+    ipV4 = DbusService["/IPv4"]
+    address = None
+
+    if port > 0 and stateCurrent == STATE_CONNECTION_OK:
+        try:
+            socket.inet_aton(ipV4)
+            address = (ipV4, port)
+        except OSError:
+            pass
+
+    if address != metricsAddress:
+        closeMetricsServer()
+        if address is not None:
+            openMetricsServer(address)
+
+    if metricsServer is not None:
+        metricsResponse = renderMetricsResponse()
+
+    return True
+
+
+# seconds between the checks for a peer to ping
+PATH_LOOP_INTERVAL = 2
+PATH_PING_COMMAND = ["/usr/bin/tailscale", "ping", "--c", "1", "--timeout", "5s"]
+# created in main()
+pathMonitor = None
+# True while a ping started by pathLoop() runs
+pathPingRunning = False
+
+
+def pathLoop() -> bool:
+    """
+    Runs every PATH_LOOP_INTERVAL seconds and starts a ping of the next connected peer
+    that is due, without waiting for it. The result is published as /Peers/<n>/Path and
+    /Peers/<n>/RttMs by pingFinished()
+    """
+    global pathPingRunning
+
+    if stateCurrent == STATE_CONNECTION_OK:
+        ipAddresses = {
+            ipAddress
+            for ipAddress, peer in tailscaleDevices.peers.items()
+            if peer.connected and ipAddress in peerIndexes
+        }
+    else:
+        ipAddresses = set()
+
+    now = time.monotonic()
+
+    # peers that disconnected have no path
+    removed = [
+        ipAddress for ipAddress in pathMonitor.update(ipAddresses, now) if ipAddress in peerIndexes
+    ]
+    if removed:
+        with DbusService as context:
+            for ipAddress in removed:
+                path = f"/Peers/{peerIndexes[ipAddress]}"
+                context[path + "/Path"] = None
+                context[path + "/RttMs"] = None
+
+    if pathPingRunning:
+        return True
+
+    ipAddress = pathMonitor.next(now)
+    if ipAddress is None:
+        return True
+
+    command = PATH_PING_COMMAND + [ipAddress]
+    try:
+        proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except Exception as e:
+        logging.warning(f"tailscale ping failed: {repr(e)}")
+        return True
+
+    def pingFinished(source, condition) -> bool:
+        global pathPingRunning
+
+        out, err = proc.communicate()
+        metrics.commandFinished(command, time.monotonic() - now)
+        pathPingRunning = False
+
+        from path_monitor import parsePing
+
+        result = parsePing(out.decode())
+        window = pathMonitor.windows.get(ipAddress)
+
+        if pathMonitor.record(ipAddress, result, time.monotonic()):
+            peer = tailscaleDevices.peers.get(ipAddress)
+            logging.info(
+                f"path to {peer.name if peer else ipAddress} (VPN IP: {ipAddress}) "
+                + f"is {window.path()}"
+                + (f" by DERP {result.relay}" if result.relay else "")
+            )
+
+        # the peer disconnected while it was pinged
+        if window is None or ipAddress not in peerIndexes:
+            return False
+
+        rttMs = window.rttMs()
+        path = f"/Peers/{peerIndexes[ipAddress]}"
+        with DbusService as context:
+            context[path + "/Path"] = window.path()
+            context[path + "/RttMs"] = None if rttMs is None else round(rttMs)
+
+        return False
+
+    # stdout is closed when the command exits
+    GLib.io_add_watch(
+        proc.stdout, GLib.PRIORITY_DEFAULT, GLib.IO_HUP | GLib.IO_ERR, pingFinished
+    )
+    pathPingRunning = True
+
+    return True
 
 
 def mainLoop():
@@ -244,7 +943,7 @@ def mainLoop():
     global DbusSettings, DbusService
     global stateCurrent, statePrevious
     global systemNameCurrent, systemNamePrevious
-    global autoUpdateDisabled
+    global autoUpdateDisabled, advertisedRoutes
 
     backendRunning = None
     tailscaleEnabled = False
@@ -385,46 +1084,34 @@ def mainLoop():
         # get current status from tailscale and update state
         stdout, stderr, exitCode = sendCommand(["/usr/bin/tailscale", "status"])
 
-        # don't update state if we don't get a response
-        if stdout is None or stderr is None:
+        status = classifyStatus(stdout, stderr, exitCode)
+        statusOutput = stdout
+        loginInfo = status.loginLink
+
+        # don't update state if we don't get a response or don't recognize it
+        if status.state is None:
             pass
-        elif "Failed to connect" in stderr:
-            stateCurrent = STATE_CONNECTION_FAILED
-        elif "Tailscale is stopped" in stdout:
-            stateCurrent = STATE_STOPPED
-        elif "Log in at" in stdout:
-            stateCurrent = STATE_WAIT_FOR_LOGIN
-            lines = stdout.splitlines()
-            loginInfo = lines[1].replace("Log in at: ", "")
-        elif "Logged out" in stdout:
+        elif status.state == STATE_LOGGED_OUT:
             # can get back to this condition while loggin in
             # so wait for another condition to update state
             if statePrevious != STATE_WAIT_FOR_RESPONSE:
                 stateCurrent = STATE_LOGGED_OUT
-        elif "NoState" in stdout:
-            # When Tailscale is already logged in, but has no internet connection
-            # the state is "unexpected state: NoState"
-            # If logged out, the status only shows "Logged out"
-            stateCurrent = STATE_NO_STATE
-        elif exitCode == 0:
-            stateCurrent = STATE_CONNECTION_OK
-
-            # extract this host's name from status message
-            # this allows to show the hostname, if it was changed in the Tailscale admin panel
-            if DbusService["/IPv4"] != "":
-                for line in stdout.splitlines():
-                    if DbusService["/IPv4"] in line:
-                        hostname = line.split()[1]
-
-                        if hostname != DbusSettings["MachineName"]:
-                            logging.info(
-                                f'Machine name changed from "{DbusSettings["MachineName"]}" to'
-                                + f' "{hostname}" from status message'
-                            )
-                            DbusSettings["MachineName"] = hostname
-        # don't update state if we don't recognize the response
         else:
-            pass
+            stateCurrent = status.state
+
+        # extract this host's name from status message
+        # this allows to show the hostname, if it was changed in the Tailscale admin panel
+        if status.state == STATE_CONNECTION_OK and DbusService["/IPv4"] != "":
+            for line in stdout.splitlines():
+                if DbusService["/IPv4"] in line:
+                    hostname = line.split()[1]
+
+                    if hostname != DbusSettings["MachineName"]:
+                        logging.info(
+                            f'Machine name changed from "{DbusSettings["MachineName"]}" to'
+                            + f' "{hostname}" from status message'
+                        )
+                        DbusSettings["MachineName"] = hostname
 
         # make changes necessary to bring connection up
         # 	up will fully connect if login had succeeded
@@ -438,6 +1125,7 @@ def mainLoop():
 
         if stateCurrent != statePrevious:
             logging.info(f"state change from {statePrevious} to {stateCurrent}")
+            metrics.stateChanged(statePrevious, stateCurrent)
 
             if (
                 stateCurrent == STATE_STOPPED
@@ -490,6 +1178,9 @@ def mainLoop():
                         "--advertise-routes=" + ",".join(advertiseRoutes)
                     )
 
+                advertisedRoutes = sorted(advertiseRoutes)
+                DbusService["/AdvertisedRoutes"] = ",".join(advertisedRoutes)
+
                 # set hostname
                 if DbusSettings["MachineName"] != "":
                     # cleanup hostname
@@ -634,6 +1325,10 @@ def mainLoop():
                     DbusService["/ErrorMessage"] = ""
                     stateCurrent = STATE_WAIT_FOR_RESPONSE
 
+        # the cached state stays published until tailscale reports one
+        if stateCurrent != STATE_INITIALIZING:
+            confirmState()
+
         # show IP addresses only if connected
         if stateCurrent == STATE_CONNECTION_OK:
             if statePrevious != STATE_CONNECTION_OK:
@@ -653,18 +1348,25 @@ def mainLoop():
                 DbusService["/IPv4"] = "unknown"
                 DbusService["/IPv6"] = "unknown"
 
-            # check device connection and log
-            checkDeviceConnectionAndLog()
-        else:
+            # check device connection and log, with the peer table of this status
+            if status.state == STATE_CONNECTION_OK:
+                checkDeviceConnectionAndLog(statusOutput)
+        elif not stateStale:
             DbusService["/IPv4"] = ""
             DbusService["/IPv6"] = ""
+            updatePeers({})
 
     else:
         stateCurrent = STATE_BACKEND_STOPPED
+        confirmState()
+        updatePeers({})
 
     # update dbus values regardless of state of the link
-    DbusService["/State"] = stateCurrent
-    DbusService["/LoginLink"] = loginInfo
+    if not stateStale:
+        DbusService["/State"] = stateCurrent
+        DbusService["/LoginLink"] = loginInfo
+
+        saveStateCache()
 
     statePrevious = stateCurrent
 
@@ -672,30 +1374,61 @@ def mainLoop():
 
 
 def main():
-    global DbusSettings, DbusService
+    global DbusSettings, DbusService, trafficTimeout
     global systemNameObject
+    global metrics, pathMonitor, repeatFilter
 
     # set logging level to include info level entries
     logging.basicConfig(level=logging.INFO)
 
-    # get installed binary version
-    try:
-        # get the version by asking the tailscale binary
-        stdout, stderr, exitCode = sendCommand(["/usr/bin/tailscale", "version"])
+    # set up dbus main loop to get async calls
+    DBusGMainLoop(set_as_default=True)
 
-        if exitCode != 0:
-            raise Exception("tailscale version command failed")
+    # create the system bus object
+    dbusSystemBus = dbus.SystemBus()
 
-        installedVersion = stdout.splitlines()[0]
+    # create the dbus service first, so the GUI gets a /State as soon as possible
+    DbusService = VeDbusService(
+        "com.victronenergy.tailscale", bus=dbusSystemBus, register=False
+    )
 
-    except Exception:
-        installedVersion = "unknown"
+    # add paths
+    # routes of the last tailscale up, comma separated
+    DbusService.add_path("/AdvertisedRoutes", "")
+    DbusService.add_path("/ErrorMessage", "")
+    DbusService.add_path("/GuiCommand", "", writeable=True)
+    DbusService.add_path("/IPv4", "")
+    DbusService.add_path("/IPv6", "")
+    DbusService.add_path("/LoginLink", "")
+    DbusService.add_path("/LoginLinkQrCode", "")
+    DbusService.add_path("/LogLevel", "INFO", writeable=True, onchangecallback=setLogLevel)
+    DbusService.add_path("/ProductName", "Tailscale (remote VPN access)")
+    DbusService.add_path("/Stale", 0)
+    DbusService.add_path("/State", STATE_INITIALIZING)
+    DbusService.add_path("/Traffic/RxRate", None)
+    DbusService.add_path("/Traffic/TxRate", None)
 
-    # log the tailscale binary version
-    logging.info(f"Tailscale binary version {installedVersion}")
+    # publish the last known state right away
+    loadStateCache()
 
-    # set up dbus main loop to get async calls
-    DBusGMainLoop(set_as_default=True)
+    # register VeDbusService after all paths where added
+    DbusService.register()
+
+    # get installed binary version, logged as soon as the main loop runs
+    logInstalledVersion()
+
+    # imported only now, so they are not on the way to the first /State publish
+    from log_filter import LOG_SUMMARY_INTERVAL, RepeatFilter
+    from metrics import Metrics
+    from path_monitor import PathMonitor
+    from settingsdevice import SettingsDevice
+
+    repeatFilter = RepeatFilter()
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(repeatFilter)
+
+    metrics = Metrics()
+    pathMonitor = PathMonitor()
 
     # create the settings object
     settingsList = {
@@ -711,36 +1444,22 @@ def main():
         "CustomServerUrl": ["/Settings/Services/Tailscale/CustomServerUrl", "", 0, 0],
         "Enabled": ["/Settings/Services/Tailscale/Enabled", 0, 0, 1],
         "MachineName": ["/Settings/Services/Tailscale/MachineName", "", 0, 0],
+        "TrafficInterval": ["/Settings/Services/Tailscale/TrafficInterval", 5, 0, 3600],
+        # port of the metrics endpoint on the Tailscale IPv4, 0 disables it
+        "MetricsPort": ["/Settings/Services/Tailscale/MetricsPort", 0, 0, 65535],
     }
 
-    # create the system bus object
-    dbusSystemBus = dbus.SystemBus()
-
     # create the dbus settings object
     DbusSettings = SettingsDevice(
         bus=dbusSystemBus,
         supportedSettings=settingsList,
         timeout=30,
-        eventCallback=None,
-    )
-
-    # create the dbus service
-    DbusService = VeDbusService(
-        "com.victronenergy.tailscale", bus=dbus.SystemBus(), register=False
+        eventCallback=settingChanged,
     )
 
-    # add paths
-    DbusService.add_path("/ErrorMessage", "")
-    DbusService.add_path("/GuiCommand", "", writeable=True)
-    DbusService.add_path("/IPv4", "")
-    DbusService.add_path("/IPv6", "")
-    DbusService.add_path("/LoginLink", "")
-    DbusService.add_path("/LoginLinkQrCode", "")
-    DbusService.add_path("/ProductName", "Tailscale (remote VPN access)")
-    DbusService.add_path("/State", STATE_INITIALIZING)
-
-    # register VeDbusService after all paths where added
-    DbusService.register()
+    # journal of the connection events, queried on /Journal
+    openConnectionJournal()
+    JournalExport(dbusSystemBus, "/Journal")
 
     # set system name object
     systemNameObject = dbusSystemBus.get_object(
@@ -750,9 +1469,30 @@ def main():
     # call the main loop - every 1 second
     # this section of code loops until mainloop quits
     GLib.timeout_add(1000, mainLoop)
+    # update the traffic counters and rates, the interval is set by the TrafficInterval setting
+    trafficTimeout = GLib.timeout_add_seconds(1, trafficLoop)
+    if connectionJournal is not None:
+        GLib.timeout_add_seconds(JOURNAL_FLUSH_INTERVAL, journalLoop)
+    # ping the connected peers to find out if they are relayed
+    GLib.timeout_add_seconds(PATH_LOOP_INTERVAL, pathLoop)
+    # serve the metrics endpoint, if enabled
+    GLib.timeout_add_seconds(METRICS_INTERVAL, metricsLoop)
+    # log the summaries of the repeated messages
+    GLib.timeout_add_seconds(LOG_SUMMARY_INTERVAL, logSummaryLoop)
     mainloop = GLib.MainLoop()
+
+    # stop the main loop on svc -d, so the collected connection events are written
+    GLib.unix_signal_add(GLib.PRIORITY_HIGH, signal.SIGTERM, mainloop.quit)
+
     mainloop.run()
 
+    if connectionJournal is not None:
+        try:
+            connectionJournal.close()
+        except OSError as e:
+            logging.warning(f"writing connection journal {JOURNAL_FILE} failed: {repr(e)}")
+
+    repeatFilter.flush()
     logging.critical("tailscale-control exiting")
 
 
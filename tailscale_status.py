@@ -0,0 +1,261 @@
+#
+# Parses the output of `tailscale status`: classifyStatus() maps it to the states
+# published on /State, PeerTable keeps the peers of the peer table
+#
+# The CLI wording changed between tailscale versions, so every state is matched
+# by a compiled pattern from STATUS_PATTERNS, checked in order. The patterns are
+# tested against tests/fixtures/tailscale_status_synthetic.json, outputs written
+# after the message formats of the CLI versions, not captured from devices.
+
+
+import re
+from typing import NamedTuple, Optional
+
+# states published on com.victronenergy.tailscale/State, see enum_states.txt
+STATE_INITIALIZING = 0
+STATE_BACKEND_STARTING = 1
+STATE_BACKEND_STOPPED = 2
+STATE_CONNECTION_FAILED = 3
+STATE_STOPPED = 4
+STATE_LOGGED_OUT = 5
+STATE_WAIT_FOR_RESPONSE = 6
+STATE_WAIT_FOR_LOGIN = 7
+STATE_NO_STATE = 8
+STATE_CONNECTION_OK = 100
+
+# the messages are printed before the peer table, only the start of the output
+# is searched so the time doesn't depend on the number of peers
+STATUS_HEAD_LENGTH = 512
+
+# [stream, pattern, state], the first matching pattern wins
+# stdout is matched at the start of a line, so a peer named like a message
+# can't be mistaken for it
+STATUS_PATTERNS = [
+    # "Failed to connect to local Tailscale daemon for /localapi/v0/status; ..."
+    # "failed to connect to local tailscaled; it doesn't appear to be running ..."
+    [
+        "stderr",
+        re.compile(r"failed to connect to local tailscale", re.I),
+        STATE_CONNECTION_FAILED,
+    ],
+    ["stdout", re.compile(r"^Tailscale is stopped", re.M), STATE_STOPPED],
+    # "Log in at: <url>", with or without an empty line after "Logged out."
+    [
+        "stdout",
+        re.compile(r"^\s*Log in at:\s*(?P<loginLink>\S+)", re.M),
+        STATE_WAIT_FOR_LOGIN,
+    ],
+    ["stdout", re.compile(r"^Logged out", re.M), STATE_LOGGED_OUT],
+    # tailscale is logged in, but has no internet connection
+    # the message moved from stdout to stderr in newer versions
+    ["stdout", re.compile(r"^unexpected state: NoState", re.M), STATE_NO_STATE],
+    ["stderr", re.compile(r"^unexpected state: NoState", re.M), STATE_NO_STATE],
+]
+
+
+class TailscaleStatus(NamedTuple):
+    """
+    result of classifyStatus()
+
+    state is one of the STATE_* values, or None if the output was not
+    recognized and the current state should be kept
+    """
+
+    state: Optional[int]
+    loginLink: str = ""
+
+
+UNRECOGNIZED = TailscaleStatus(None)
+
+
+def classifyStatus(stdout: str, stderr: str, exitCode: int) -> TailscaleStatus:
+    """
+    # classifies the output of `tailscale status` as returned by sendCommand()
+    #
+    # :param stdout: standard output, None if the command could not be run
+    # :param stderr: standard error, None if the command could not be run
+    # :param exitCode: exit code of the command
+    # :return: TailscaleStatus
+    """
+    if stdout is None or stderr is None:
+        return UNRECOGNIZED
+
+    streams = {"stdout": stdout, "stderr": stderr}
+
+    for stream, pattern, state in STATUS_PATTERNS:
+        match = pattern.search(streams[stream], 0, STATUS_HEAD_LENGTH)
+        if match is not None:
+            return TailscaleStatus(state, match.groupdict().get("loginLink", ""))
+
+    # the peer table, only printed when connected
+    if exitCode == 0:
+        return TailscaleStatus(STATE_CONNECTION_OK)
+
+    return UNRECOGNIZED
+
+
+# marks a status line that was not seen before
+NEW_LINE = object()
+
+
+class Peer:
+    """
+    a peer of the tailscale status table, updated in place by PeerTable.update()
+    """
+
+    __slots__ = ("ipAddress", "name", "user", "os", "connected", "direct", "line", "generation")
+
+    def __init__(self, ipAddress: str, name: str, user: str, os: str, connected: bool):
+        self.ipAddress = ipAddress
+        self.name = name
+        self.user = user
+        self.os = os
+        self.connected = connected
+        # connected over a direct path, not relayed by DERP
+        self.direct = False
+        # the status line the peer was parsed from
+        self.line = None
+        self.generation = 0
+
+
+class PeerTable:
+    """
+    peers by tailscale IP address, which stays the same for the lifetime of a node
+
+    changes is incremented for every added, removed or changed peer, so users can
+    tell if anything changed since they last looked; peerChanges likewise, but not
+    when a peer only connected or disconnected
+    """
+
+    def __init__(self):
+        self.peers = {}
+        self.changes = 0
+        self.peerChanges = 0
+        self.generation = 0
+        # connected peers that lost their direct path in the last update()
+        self.directLost = []
+        # status lines seen before, with their Peer or None if they are not a peer
+        self._lines = {}
+        self._cache = {}
+        self._cacheChanges = 0
+
+    def update(self, stdout: str) -> list:
+        """
+        # updates the peers from the output of `tailscale status` in one pass
+        #
+        # :param stdout: standard output of `tailscale status`
+        # :return: peers that connected or disconnected, new peers only if connected
+        """
+        self.generation += 1
+        generation = self.generation
+        peers = self.peers
+        lines = self._lines
+        transitions = []
+        self.directLost = []
+        seen = 0
+        statusLines = stdout.split("\n")
+
+        for line in statusLines:
+            # most lines don't change from one call to the next
+            peer = lines.get(line, NEW_LINE)
+            if peer is None:
+                continue
+            if peer is not NEW_LINE:
+                peer.generation = generation
+                seen += 1
+                continue
+
+            # "<IP> <name> <user> <OS> <status>", lines with a single word status are
+            # skipped, that is this device, peers without traffic ("-") and offline
+            # peers ("offline"), as well as the health check comments
+            components = line.split(None, 5)
+            if len(components) != 6 or line.startswith("#"):
+                lines[line] = None
+                continue
+
+            ipAddress, name, user, os, status = components[:5]
+            connected = status.startswith("active")
+            # "active; direct 192.168.1.23:41641, tx ..." or "active; relay "fra", tx ..."
+            direct = connected and components[5].startswith("direct")
+            peer = peers.get(ipAddress)
+
+            if peer is None:
+                peer = peers[ipAddress] = Peer(ipAddress, name, user, os, connected)
+                self.changes += 1
+                self.peerChanges += 1
+                if connected:
+                    transitions.append(peer)
+            else:
+                lines.pop(peer.line, None)
+                if peer.connected != connected:
+                    peer.connected = connected
+                    self.changes += 1
+                    transitions.append(peer)
+                if peer.direct and not direct and connected:
+                    self.directLost.append(peer)
+                if peer.name != name or peer.user != user or peer.os != os:
+                    peer.name = name
+                    peer.user = user
+                    peer.os = os
+                    self.changes += 1
+                    self.peerChanges += 1
+
+            peer.direct = direct
+            peer.line = line
+            lines[line] = peer
+            peer.generation = generation
+            seen += 1
+
+        # remove the peers that are gone
+        if seen != len(peers):
+            for ipAddress in [
+                ipAddress
+                for ipAddress, peer in peers.items()
+                if peer.generation != generation
+            ]:
+                lines.pop(peers.pop(ipAddress).line, None)
+                self.changes += 1
+                self.peerChanges += 1
+
+        # forget old lines that are not peers, they are parsed again if they show up
+        if len(lines) > 2 * len(statusLines):
+            lines.clear()
+
+        return transitions
+
+    def toCache(self) -> dict:
+        """
+        returns the peers as JSON serializable dict, rebuilt only after changes
+        """
+        if self._cacheChanges != self.changes:
+            self._cache = {
+                ipAddress: {
+                    "deviceName": peer.name,
+                    "userName": peer.user,
+                    "os": peer.os,
+                    "connected": peer.connected,
+                }
+                for ipAddress, peer in self.peers.items()
+            }
+            self._cacheChanges = self.changes
+
+        return self._cache
+
+    @classmethod
+    def fromCache(cls, devices: dict) -> "PeerTable":
+        """
+        creates a table from the dict returned by toCache()
+        """
+        table = cls()
+        for ipAddress, properties in devices.items():
+            table.peers[ipAddress] = Peer(
+                str(ipAddress),
+                str(properties["deviceName"]),
+                str(properties["userName"]),
+                str(properties["os"]),
+                bool(properties.get("connected", False)),
+            )
+        table.changes = 1
+        table.peerChanges = 1
+
+        return table
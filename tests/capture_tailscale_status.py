@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+#
+# Capture the output of `tailscale status` on a GX device and add it to
+# tests/fixtures/tailscale_status_captured.json, with the version of the
+# tailscale binary and the exit code.
+#
+# The expected state and login link are given by the person capturing, who
+# knows what the device is doing, they are not taken from classifyStatus().
+# Bring the device into the state first, e.g. stop tailscaled for
+# "daemon not running", then run on the device:
+#
+#   python3 capture_tailscale_status.py --name "daemon not running" --state 3
+#
+# and copy the entry printed into the fixture file, or pass --fixtures to add
+# it there directly. The peer table holds the names and IPs of the tailnet,
+# replace them before committing.
+
+
+import argparse
+import json
+import subprocess
+
+TAILSCALE = "/usr/bin/tailscale"
+
+
+def run(command: list) -> tuple:
+    """
+    runs the command like sendCommand() of tailscale-control.py
+    """
+    proc = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return proc.stdout.decode().strip(), proc.stderr.decode().strip(), proc.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="capture tailscale status as a fixture")
+    parser.add_argument("--name", required=True, help="what the device was doing")
+    parser.add_argument("--state", required=True, type=int, help="expected STATE_* value")
+    parser.add_argument("--login-link", default="", help="expected login link")
+    parser.add_argument("--fixtures", help="fixture file to add the entry to")
+    args = parser.parse_args()
+
+    version, _, _ = run([TAILSCALE, "version"])
+    stdout, stderr, exitCode = run([TAILSCALE, "status"])
+
+    case = {
+        "name": args.name,
+        # first line of `tailscale version`, e.g. 1.58.2
+        "tailscaleVersion": version.splitlines()[0] if version else "unknown",
+        "exitCode": exitCode,
+        "stdout": stdout.splitlines(),
+        "stderr": stderr.splitlines(),
+        "state": args.state,
+        "loginLink": args.login_link,
+    }
+
+    if args.fixtures is None:
+        print(json.dumps(case, indent=4))
+        return
+
+    with open(args.fixtures) as file:
+        cases = json.load(file)
+    cases.append(case)
+    with open(args.fixtures, "w") as file:
+        json.dump(cases, file, indent=4)
+        file.write("\n")
+
+
+if __name__ == "__main__":
+    main()
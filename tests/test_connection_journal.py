@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+from connection_journal import (
+    EVENT_CONNECTED,
+    EVENT_DISCONNECTED,
+    RECORD,
+    ConnectionJournal,
+    JournalEvent,
+)
+
+
+class ConnectionJournalTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "tailscale-control", "journal.bin")
+
+    def openJournal(self, capacity=8):
+        return ConnectionJournal(self.path, capacity=capacity, flushRecords=1000)
+
+    def fill(self, journal, count, start=0):
+        for i in range(start, start + count):
+            journal.append(1000 + i, f"100.64.0.{i % 256}", f"peer-{i}", i % 2)
+
+    def test_fixed_size(self):
+        journal = self.openJournal()
+        self.fill(journal, 30)
+        journal.close()
+        self.assertEqual(os.path.getsize(self.path), 8 * RECORD.size)
+
+    def test_last_and_since(self):
+        journal = self.openJournal()
+        self.fill(journal, 5)
+        journal.flush()
+        self.fill(journal, 2, start=5)
+
+        # flushed and pending records together
+        self.assertEqual(
+            journal.last(3),
+            [
+                JournalEvent(1004, "100.64.0.4", "peer-4", EVENT_DISCONNECTED),
+                JournalEvent(1005, "100.64.0.5", "peer-5", EVENT_CONNECTED),
+                JournalEvent(1006, "100.64.0.6", "peer-6", EVENT_DISCONNECTED),
+            ],
+        )
+        self.assertEqual(len(journal.last(100)), 7)
+        self.assertEqual([event.timestamp for event in journal.since(1003)], [1003, 1004, 1005, 1006])
+        self.assertEqual(journal.since(2000), [])
+        journal.close()
+
+    def test_wrap_and_reopen(self):
+        journal = self.openJournal()
+        for start in range(0, 21, 3):
+            self.fill(journal, 3, start=start)
+            journal.flush()
+        journal.close()
+
+        journal = self.openJournal()
+        self.assertEqual(journal.sequence, 21)
+        self.assertEqual([event.timestamp for event in journal.last(100)], list(range(1013, 1021)))
+        self.assertEqual([event.timestamp for event in journal.since(1018)], [1018, 1019, 1020])
+
+        self.fill(journal, 1, start=21)
+        journal.close()
+        self.assertEqual(self.openJournal().last(1)[0].name, "peer-21")
+
+    def test_long_name_and_damaged_record(self):
+        journal = self.openJournal()
+        journal.append(1000, "100.64.0.1", "a-very-long-name-of-a-peer-über", EVENT_CONNECTED)
+        self.fill(journal, 2, start=1)
+        journal.close()
+
+        # damage the second record
+        with open(self.path, "r+b") as file:
+            file.seek(RECORD.size + 20)
+            file.write(b"\xff")
+
+        events = self.openJournal().last(3)
+        self.assertEqual([event.timestamp for event in events], [1000, 1002])
+        self.assertEqual(events[0].name, "a-very-long-name-of-a-p")
+
+    def test_capacity_change_starts_empty(self):
+        journal = self.openJournal()
+        self.fill(journal, 3)
+        journal.close()
+
+        self.assertEqual(self.openJournal(capacity=16).last(10), [])
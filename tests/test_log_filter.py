@@ -0,0 +1,83 @@
+import logging
+import unittest
+
+from log_filter import RepeatFilter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class RepeatFilterTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.filter = RepeatFilter(burst=3, refillSeconds=10, maxKeys=4, clock=self.clock)
+        self.handler = ListHandler()
+        self.handler.addFilter(self.filter)
+        self.logger = logging.getLogger("test_log_filter")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def test_burst_and_summary(self):
+        for _ in range(10):
+            self.logger.warning("tailscale up failed %d", 1)
+        self.logger.warning("other")
+
+        self.assertEqual(self.handler.messages, ["tailscale up failed 1"] * 3 + ["other"])
+
+        self.clock.now = 30
+        self.filter.flush()
+        self.assertEqual(
+            self.handler.messages[-1], '"tailscale up failed 1" repeated 7 times in the last 30 s'
+        )
+
+        # reported once only
+        self.filter.flush()
+        self.assertEqual(len(self.handler.messages), 5)
+
+    def test_refill(self):
+        for _ in range(4):
+            self.logger.info("repeated")
+        self.assertEqual(len(self.handler.messages), 3)
+
+        self.clock.now = 10
+        self.logger.info("repeated")
+        self.logger.info("repeated")
+        self.assertEqual(len(self.handler.messages), 4)
+
+    def test_levels_are_separate(self):
+        for _ in range(4):
+            self.logger.info("message")
+            self.logger.error("message")
+        self.assertEqual(len(self.handler.messages), 6)
+
+    def test_idle_keys_are_removed(self):
+        for i in range(4):
+            self.logger.info(f"message {i}")
+        # no key left, new messages are not limited
+        for _ in range(5):
+            self.logger.info("new")
+        self.assertEqual(len(self.handler.messages), 9)
+
+        self.clock.now = 100
+        self.filter.flush()
+        self.assertEqual(len(self.filter._buckets), 0)
+
+        for _ in range(5):
+            self.logger.info("new")
+        self.assertEqual(len(self.handler.messages), 12)
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from metrics import (
+    CgroupSample,
+    Metrics,
+    PeerSample,
+    commandLabel,
+    readCgroup,
+    renderMetrics,
+)
+
+
+class MetricsTests(unittest.TestCase):
+    def test_command_label(self):
+        self.assertEqual(commandLabel(["/usr/bin/tailscale", "status", "--json"]), "tailscale status")
+        self.assertEqual(commandLabel(["svc", "-u", "/service/tailscale"]), "svc")
+        self.assertEqual(commandLabel(["ip link show tailscale0"]), "ip link")
+
+    def test_render(self):
+        metrics = Metrics()
+        metrics.stateChanged(2, 3)
+        metrics.stateChanged(2, 3)
+        metrics.commandFinished(["/usr/bin/tailscale", "status"], 0.25)
+        metrics.commandFinished(["/usr/bin/tailscale", "status", "--json"], 0.5)
+
+        text = renderMetrics(
+            metrics,
+            3,
+            [
+                PeerSample("100.64.0.2", 'laptop "work"', True, 10, 20),
+                PeerSample("100.64.0.3", "phone", False, None, None),
+            ],
+            CgroupSample(cpuSeconds=1.5, memoryBytes=4096),
+        ).decode()
+        lines = text.splitlines()
+
+        self.assertIn("# TYPE tailscale_control_state gauge", lines)
+        self.assertIn("tailscale_control_state 3", lines)
+        self.assertIn('tailscale_control_state_transitions_total{from="2",to="3"} 2', lines)
+        self.assertIn('tailscale_control_command_duration_seconds_sum{command="tailscale status"} 0.75', lines)
+        self.assertIn('tailscale_control_command_duration_seconds_count{command="tailscale status"} 2', lines)
+        self.assertIn('tailscale_control_command_duration_max_seconds{command="tailscale status"} 0.5', lines)
+        self.assertIn("tailscale_control_peers 2", lines)
+        self.assertIn("tailscale_control_peers_connected 1", lines)
+        self.assertIn('tailscale_control_peer_rx_bytes_total{ip="100.64.0.2",name="laptop \\"work\\""} 10', lines)
+        self.assertIn("tailscale_control_tailscaled_cpu_seconds_total 1.5", lines)
+        self.assertIn("tailscale_control_tailscaled_memory_bytes 4096", lines)
+
+        # values not known yet are left out
+        self.assertNotIn("phone", text)
+        self.assertNotIn("throttled", text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_read_cgroup(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.assertEqual(readCgroup(directory.name), CgroupSample())
+
+        files = {
+            "cpuacct.usage": "2500000000\n",
+            "cpu.stat": "nr_periods 100\nnr_throttled 7\nthrottled_time 300000000\n",
+            "tasks": f"{os.getpid()}\n",
+        }
+        for name, content in files.items():
+            with open(os.path.join(directory.name, name), "w") as file:
+                file.write(content)
+
+        sample = readCgroup(directory.name)
+        self.assertEqual(sample.cpuSeconds, 2.5)
+        self.assertEqual(sample.throttledSeconds, 0.3)
+        self.assertEqual(sample.throttledPeriods, 7)
+        # resident size of this process
+        self.assertGreater(sample.memoryBytes, 0)
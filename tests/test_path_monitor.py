@@ -0,0 +1,87 @@
+import unittest
+
+from path_monitor import (
+    NO_REPLY,
+    PATH_DIRECT,
+    PATH_RELAYED,
+    PathMonitor,
+    PingResult,
+    parsePing,
+)
+
+DIRECT = PingResult(PATH_DIRECT, 20.0)
+RELAYED = PingResult(PATH_RELAYED, 80.0, "fra")
+
+
+class ParsePingTests(unittest.TestCase):
+    def test_direct(self):
+        self.assertEqual(
+            parsePing("pong from laptop (100.88.12.7) via 192.168.1.23:41641 in 23ms"),
+            PingResult(PATH_DIRECT, 23.0),
+        )
+
+    def test_relayed(self):
+        # with --c 1 tailscale gives up on a direct path after the first reply
+        stdout = "pong from vps (100.92.210.1) via DERP(fra) in 45ms\n"
+        self.assertEqual(parsePing(stdout), PingResult(PATH_RELAYED, 45.0, "fra"))
+
+    def test_no_reply(self):
+        self.assertEqual(parsePing("timeout waiting for ping reply\n"), NO_REPLY)
+        self.assertEqual(parsePing(""), NO_REPLY)
+        self.assertEqual(parsePing(None), NO_REPLY)
+
+
+class PathMonitorTests(unittest.TestCase):
+    def setUp(self):
+        self.monitor = PathMonitor(interval=60, reprobeInterval=5, reprobes=2)
+
+    def test_schedule(self):
+        self.monitor.update({"a", "b"}, 0)
+        first = self.monitor.next(0)
+        self.monitor.record(first, DIRECT, 1)
+        second = self.monitor.next(1)
+        self.assertNotEqual(first, second)
+        self.monitor.record(second, DIRECT, 2)
+
+        self.assertIsNone(self.monitor.next(60))
+        self.assertEqual(self.monitor.next(61), first)
+
+        self.assertEqual(self.monitor.update({second}, 61), [first])
+        self.assertEqual(list(self.monitor.windows), [second])
+
+    def test_window(self):
+        self.monitor.update({"a"}, 0)
+        window = self.monitor.windows["a"]
+        self.assertIsNone(window.path())
+        self.assertIsNone(window.rttMs())
+
+        self.assertTrue(self.monitor.record("a", PingResult(PATH_DIRECT, 30.0), 0))
+        self.assertFalse(self.monitor.record("a", PingResult(PATH_DIRECT, 10.0), 0))
+        self.assertFalse(self.monitor.record("a", NO_REPLY, 0))
+        self.assertEqual(window.path(), PATH_DIRECT)
+        self.assertEqual(window.rttMs(), 20.0)
+
+        # only the replies over the current path count
+        self.assertTrue(self.monitor.record("a", RELAYED, 0))
+        self.assertEqual(window.rttMs(), 80.0)
+
+    def test_reprobe_when_direct_path_is_lost(self):
+        self.monitor.update({"a"}, 0)
+        self.monitor.record("a", DIRECT, 0)
+
+        self.monitor.record("a", RELAYED, 60)
+        self.assertEqual(self.monitor.windows["a"].due, 65)
+        self.monitor.record("a", RELAYED, 65)
+        self.assertEqual(self.monitor.windows["a"].due, 70)
+        self.monitor.record("a", RELAYED, 70)
+        self.assertEqual(self.monitor.windows["a"].due, 130)
+
+    def test_direct_lost_from_status(self):
+        self.monitor.update({"a"}, 0)
+        self.monitor.record("a", DIRECT, 0)
+        self.assertIsNone(self.monitor.next(10))
+
+        self.monitor.directLost("a", 10)
+        self.assertEqual(self.monitor.next(10), "a")
+        self.monitor.record("a", DIRECT, 11)
+        self.assertEqual(self.monitor.windows["a"].due, 71)
@@ -0,0 +1,420 @@
+import io
+import math
+import os
+import random
+import struct
+import sys
+import tempfile
+import threading
+import unittest
+import warnings
+import zlib
+from array import array
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), "..", "ext"))
+import png  # noqa: E402
+
+WIDTH = 37
+HEIGHT = 23
+
+
+def encode(rows, **options):
+    """
+    writes the rows as PNG, options are passed to png.Writer
+    """
+    options.setdefault("width", WIDTH)
+    options.setdefault("height", HEIGHT)
+    out = io.BytesIO()
+    png.Writer(**options).write(out, rows)
+    return out.getvalue()
+
+
+def randomRows(width, height, channels=1, maxval=255, seed=1):
+    generator = random.Random(seed)
+    return [
+        [generator.randint(0, maxval) for _ in range(width * channels)] for _ in range(height)
+    ]
+
+
+def pngChunk(type, data):
+    return (
+        struct.pack("!I", len(data)) + type + data + struct.pack("!I", zlib.crc32(type + data))
+    )
+
+
+def undoFilterReference(filterType, filterUnit, scanline, previous):
+    """
+    the reconstruction of the PNG specification, byte by byte
+    """
+    if previous is None:
+        previous = bytes(len(scanline))
+
+    result = bytearray(len(scanline))
+    for i, x in enumerate(scanline):
+        a = result[i - filterUnit] if i >= filterUnit else 0
+        b = previous[i]
+        c = previous[i - filterUnit] if i >= filterUnit else 0
+        if filterType == 1:
+            predictor = a
+        elif filterType == 2:
+            predictor = b
+        elif filterType == 3:
+            predictor = (a + b) >> 1
+        else:
+            p = a + b - c
+            pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+            if pa <= pb and pa <= pc:
+                predictor = a
+            elif pb <= pc:
+                predictor = b
+            else:
+                predictor = c
+        result[i] = (x + predictor) & 0xFF
+    return result
+
+
+def packRowsGroup(rows, bitdepth):
+    """
+    pack_rows() packing each group of samples with a loop
+    """
+    spb = int(8 / bitdepth)
+
+    def make_byte(block):
+        res = 0
+        for v in block:
+            res = (res << bitdepth) + v
+        return res
+
+    for row in rows:
+        a = bytearray(row)
+        n = float(len(a))
+        extra = math.ceil(n / spb) * spb - n
+        a.extend([0] * int(extra))
+        blocks = png.group(a, spb)
+        yield bytearray(make_byte(block) for block in blocks)
+
+
+def rescaleRowsFloat(rows, rescale):
+    """
+    rescale_rows() multiplying every sample
+    """
+    fs = [float(2 ** s[1] - 1) / float(2 ** s[0] - 1) for s in rescale]
+    typecode = "BH"[rescale[0][1] > 8]
+    n_chans = len(rescale)
+
+    for row in rows:
+        rescaled_row = array(typecode, iter(row))
+        for i in range(n_chans):
+            channel = array(typecode, (int(round(fs[i] * x)) for x in row[i::n_chans]))
+            rescaled_row[i::n_chans] = channel
+        yield rescaled_row
+
+
+def readWithFilters(data):
+    """
+    reads the PNG, returns the rows as lists and the filter type of every row
+    """
+    reader = png.Reader(bytes=data)
+    filterTypes = []
+    undoFilter = reader.undo_filter
+
+    def recordFilter(filterType, scanline, previous):
+        filterTypes.append(filterType)
+        return undoFilter(filterType, scanline, previous)
+
+    reader.undo_filter = recordFilter
+    width, height, rows, info = reader.read()
+    return [list(row) for row in rows], filterTypes
+
+
+class WriterTests(unittest.TestCase):
+    def test_adaptive_filter(self):
+        for options, channels in (
+            (dict(greyscale=False), 3),
+            (dict(greyscale=False, bitdepth=16), 3),
+            (dict(greyscale=True, bitdepth=16), 1),
+            (dict(greyscale=False, alpha=True), 4),
+            (dict(greyscale=True, alpha=True, bitdepth=16), 2),
+        ):
+            maxval = 2 ** options.get("bitdepth", 8) - 1
+            rows = randomRows(WIDTH, HEIGHT, channels=channels, maxval=maxval)
+            # smooth rows, which Sub and Up predict well
+            rows += [list(range(WIDTH * channels))] * 3
+
+            with self.subTest(**options):
+                data = encode(rows, height=len(rows), adaptive_filter=True, **options)
+                decoded, filterTypes = readWithFilters(data)
+                self.assertEqual(decoded, rows)
+                self.assertNotEqual(set(filterTypes), {0})
+
+    def test_filter_type_0(self):
+        # the PNG specification recommends None for these
+        for options, maxval in (
+            (dict(greyscale=False, interlace=True), 255),
+            (dict(greyscale=True, bitdepth=4), 15),
+            (dict(greyscale=True, bitdepth=2), 3),
+            (dict(palette=[(0, 0, 0), (255, 255, 255), (255, 0, 0)]), 2),
+            (dict(palette=[(0, 0, 0), (255, 255, 255)], bitdepth=1), 1),
+        ):
+            channels = 1 if options.get("greyscale", True) else 3
+            rows = randomRows(WIDTH, HEIGHT, channels=channels, maxval=maxval)
+
+            with self.subTest(**options):
+                data = encode(rows, adaptive_filter=True, **options)
+                decoded, filterTypes = readWithFilters(data)
+                self.assertEqual(decoded, rows)
+                self.assertEqual(set(filterTypes), {0})
+
+    def test_defaults(self):
+        rows = randomRows(WIDTH, HEIGHT, channels=3)
+        raw = b"".join(b"\x00" + bytes(row) for row in rows)
+        # as written before the options were added
+        expected = (
+            png.signature
+            + pngChunk(b"IHDR", struct.pack("!2I5B", WIDTH, HEIGHT, 8, 2, 0, 0, 0))
+            + pngChunk(b"IDAT", zlib.compress(raw))
+            + pngChunk(b"IEND", b"")
+        )
+
+        self.assertEqual(encode(rows, greyscale=False), expected)
+        self.assertEqual(
+            encode(
+                rows,
+                greyscale=False,
+                adaptive_filter=False,
+                compression_strategy=zlib.Z_DEFAULT_STRATEGY,
+                compression_mem_level=zlib.DEF_MEM_LEVEL,
+            ),
+            expected,
+        )
+
+    def test_compression_options(self):
+        rows = randomRows(WIDTH, HEIGHT, channels=3)
+        for options in (
+            dict(compression_strategy=zlib.Z_RLE),
+            dict(compression_strategy=zlib.Z_FILTERED, compression_mem_level=1),
+            dict(compression_mem_level=9, compression=9),
+        ):
+            with self.subTest(**options):
+                data = encode(rows, greyscale=False, **options)
+                self.assertEqual(readWithFilters(data)[0], rows)
+
+        for memLevel in (0, 10, -1):
+            with self.subTest(compression_mem_level=memLevel):
+                with self.assertRaises(png.ProtocolError):
+                    png.Writer(WIDTH, HEIGHT, compression_mem_level=memLevel)
+
+
+class PackRowsTests(unittest.TestCase):
+    def test_pack(self):
+        for bitdepth in (1, 2, 4):
+            # odd widths end in a partial byte
+            for width in (1, 3, 7, 9, 37):
+                rows = randomRows(width, 5, maxval=2**bitdepth - 1, seed=width)
+                with self.subTest(bitdepth=bitdepth, width=width):
+                    self.assertEqual(
+                        list(png.pack_rows(rows, bitdepth)), list(packRowsGroup(rows, bitdepth))
+                    )
+
+    def test_pack_out_of_range(self):
+        for bitdepth, sample in ((1, 2), (2, 4), (4, 16), (4, 256), (4, -1)):
+            with self.subTest(bitdepth=bitdepth, sample=sample):
+                with self.assertRaises(ValueError):
+                    list(png.pack_rows([[0, sample, 1]], bitdepth))
+
+    def test_rescale(self):
+        for rescale in (
+            [(1, 8)],
+            [(3, 4)],
+            [(5, 8)],
+            [(12, 16)],
+            [(5, 8), (6, 8), (5, 8)],
+            [(2, 4), (3, 4)],
+            [(4, 16), (7, 16), (1, 16), (15, 16)],
+        ):
+            maxval = 2 ** min(source for source, target in rescale) - 1
+            for width in (1, 3, 37):
+                rows = randomRows(width, 5, channels=len(rescale), maxval=maxval, seed=width)
+                # the largest sample of each channel
+                rows.append([2**source - 1 for source, target in rescale] * width)
+                with self.subTest(rescale=rescale, width=width):
+                    self.assertEqual(
+                        list(png.rescale_rows(rows, rescale)),
+                        list(rescaleRowsFloat(rows, rescale)),
+                    )
+
+    def test_rescale_out_of_range(self):
+        for rescale, row in (
+            ([(3, 8)], [0, 8]),
+            ([(3, 8)], [-1, 0]),
+            ([(5, 8), (6, 8), (5, 8)], [0, 0, 32]),
+            ([(5, 8), (6, 8), (5, 8)], [0, -1, 0]),
+        ):
+            with self.subTest(rescale=rescale, row=row):
+                with self.assertRaises(ValueError):
+                    list(png.rescale_rows([row], rescale))
+
+    def test_writer(self):
+        # 3 bits are rescaled to 4, then packed
+        rows = randomRows(WIDTH, HEIGHT, maxval=7)
+        data = encode(rows, greyscale=True, bitdepth=3)
+        # scaled back with the sBIT chunk
+        width, height, pixels, info = png.Reader(bytes=data).asDirect()
+        self.assertEqual([list(row) for row in pixels], rows)
+
+        rows[3][5] = 8
+        with self.assertRaises(ValueError):
+            encode(rows, greyscale=True, bitdepth=3)
+
+
+class UndoFilterTests(unittest.TestCase):
+    functions = {
+        1: png.undo_filter_sub,
+        2: png.undo_filter_up,
+        3: png.undo_filter_average,
+        4: png.undo_filter_paeth,
+    }
+
+    def lines(self, filterUnit):
+        generator = random.Random(filterUnit)
+        # shorter than a filter unit, one unit and several with a partial one
+        for length in sorted({1, max(1, filterUnit - 1), filterUnit, 5 * filterUnit + 3}):
+            scanline = bytes(generator.randrange(256) for _ in range(length))
+            previous = bytes(generator.randrange(256) for _ in range(length))
+            yield scanline, previous
+
+    def test_functions(self):
+        for filterType, function in self.functions.items():
+            for filterUnit in range(1, 9):
+                for scanline, previous in self.lines(filterUnit):
+                    expected = undoFilterReference(filterType, filterUnit, scanline, previous)
+                    with self.subTest(
+                        filterType=filterType, filterUnit=filterUnit, length=len(scanline)
+                    ):
+                        result = bytearray(len(scanline))
+                        function(filterUnit, scanline, previous, result)
+                        self.assertEqual(result, expected)
+
+                        # in place
+                        result = bytearray(scanline)
+                        function(filterUnit, result, previous, result)
+                        self.assertEqual(result, expected)
+
+    def test_reader(self):
+        reader = png.Reader(bytes=b"")
+        # below 8 bits the filter unit is one byte
+        for pixelSize in (0.25, 1, 3, 8):
+            reader.psize = pixelSize
+            filterUnit = max(1, pixelSize)
+
+            for filterType in range(5):
+                for scanline, previous in self.lines(filterUnit):
+                    # the first line of a pass has no previous line
+                    for previousLine in (previous, None):
+                        with self.subTest(
+                            filterType=filterType,
+                            pixelSize=pixelSize,
+                            length=len(scanline),
+                            first=previousLine is None,
+                        ):
+                            line = bytearray(scanline)
+                            result = reader.undo_filter(filterType, line, previousLine)
+                            self.assertIs(result, line)
+                            if filterType == 0:
+                                self.assertEqual(result, scanline)
+                            else:
+                                self.assertEqual(
+                                    result,
+                                    undoFilterReference(
+                                        filterType, filterUnit, scanline, previousLine
+                                    ),
+                                )
+
+        with self.assertRaises(png.FormatError):
+            reader.undo_filter(5, bytearray(4), None)
+
+
+class ReadPackedTests(unittest.TestCase):
+    def setUp(self):
+        self.rows = randomRows(WIDTH, HEIGHT, channels=3)
+        # several IDAT chunks, with all filter types
+        self.data = encode(self.rows, greyscale=False, adaptive_filter=True, chunk_limit=64)
+        self.expected = [bytes(row) for row in self.rows]
+
+    def readPacked(self, reader, **options):
+        width, height, rows, info = reader.read_packed(**options)
+        self.assertEqual((width, height), (WIDTH, HEIGHT))
+        self.assertEqual(info["planes"], 3)
+        # the rows are views of reused buffers
+        return [bytes(row) for row in rows]
+
+    def test_mapped_file(self):
+        with tempfile.NamedTemporaryFile(suffix=".png") as file:
+            file.write(self.data)
+            file.flush()
+
+            with open(file.name, "rb") as input:
+                self.assertEqual(self.readPacked(png.Reader(file=input)), self.expected)
+                # left after IEND
+                self.assertEqual(input.tell(), len(self.data))
+
+    def test_bytes(self):
+        self.assertEqual(self.readPacked(png.Reader(bytes=self.data)), self.expected)
+
+    def test_pipe(self):
+        readFd, writeFd = os.pipe()
+
+        def writeData():
+            with os.fdopen(writeFd, "wb") as output:
+                output.write(self.data)
+
+        writer = threading.Thread(target=writeData)
+        writer.start()
+        self.addCleanup(writer.join)
+
+        with os.fdopen(readFd, "rb") as input:
+            self.assertEqual(self.readPacked(png.Reader(file=input)), self.expected)
+
+    def test_small_buffer(self):
+        # slices and rows end in the middle of chunks
+        for bufferSize in (1, 7, 100):
+            with self.subTest(bufferSize=bufferSize):
+                self.assertEqual(
+                    self.readPacked(png.Reader(bytes=self.data), buffer_size=bufferSize),
+                    self.expected,
+                )
+
+    def test_interlaced(self):
+        data = encode(self.rows, greyscale=False, interlace=True)
+        with self.assertRaises(png.ProtocolError):
+            png.Reader(bytes=data).read_packed()
+
+    def test_bad_checksum(self):
+        data = bytearray(self.data)
+        # the checksum of the first IDAT chunk
+        position = data.index(b"IDAT")
+        (length,) = struct.unpack("!I", data[position - 4 : position])
+        data[position + 4 + length] ^= 0xFF
+
+        with self.assertRaises(png.ChunkError):
+            self.readPacked(png.Reader(bytes=bytes(data)))
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            rows = self.readPacked(png.Reader(bytes=bytes(data)), lenient=True)
+        self.assertEqual(rows, self.expected)
+        self.assertEqual([warning.category for warning in caught], [RuntimeWarning])
+
+    def test_truncated_idat(self):
+        # greyscale, one byte short of the last row
+        raw = b"".join(b"\x00" + bytes(WIDTH) for _ in range(HEIGHT))[:-1]
+        data = (
+            png.signature
+            + pngChunk(b"IHDR", struct.pack("!2I5B", WIDTH, HEIGHT, 8, 0, 0, 0, 0))
+            + pngChunk(b"IDAT", zlib.compress(raw))
+            + pngChunk(b"IEND", b"")
+        )
+
+        width, height, rows, info = png.Reader(bytes=data).read_packed()
+        with self.assertRaises(png.FormatError):
+            list(rows)
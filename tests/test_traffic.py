@@ -0,0 +1,103 @@
+import json
+import unittest
+
+from traffic import PeerTraffic, TrafficWindow, parsePeerTraffic, parseTimestamp
+
+
+class TrafficWindowTests(unittest.TestCase):
+    def test_rates(self):
+        window = TrafficWindow(size=4)
+        self.assertEqual(window.rates(), (None, None))
+
+        window.add(0.0, 1000, 500)
+        self.assertEqual(window.rates(), (None, None))
+
+        window.add(5.0, 2000, 1500)
+        self.assertEqual(window.rates(), (200.0, 200.0))
+
+    def test_wraparound(self):
+        window = TrafficWindow(size=4)
+        for second in range(10):
+            window.add(float(second), second * 100, second * 10)
+
+        # the window holds seconds 6 to 9
+        self.assertEqual(window.count, 4)
+        self.assertEqual(window.rates(), (100.0, 10.0))
+
+        window.add(10.0, 1300, 100)
+        # seconds 7 to 10
+        self.assertEqual(window.rates(), ((1300 - 700) / 3, (100 - 70) / 3))
+
+    def test_counter_reset(self):
+        window = TrafficWindow(size=4)
+        window.add(0.0, 5000, 5000)
+        window.add(1.0, 6000, 6000)
+
+        # e.g. tailscaled restarted
+        window.add(2.0, 100, 6500)
+        self.assertEqual(window.count, 1)
+        self.assertEqual(window.rates(), (None, None))
+
+        window.add(4.0, 300, 6700)
+        self.assertEqual(window.rates(), (100.0, 100.0))
+
+    def test_same_time(self):
+        window = TrafficWindow(size=4)
+        window.add(1.0, 0, 0)
+        window.add(1.0, 100, 100)
+        self.assertEqual(window.rates(), (None, None))
+
+
+class ParseTimestampTests(unittest.TestCase):
+    def test_formats(self):
+        # 2024-05-01T08:11:12Z
+        utc = 1714551072
+        self.assertEqual(parseTimestamp("2024-05-01T08:11:12Z"), utc)
+        self.assertEqual(parseTimestamp("2024-05-01T08:11:12.123456789Z"), utc)
+        self.assertEqual(parseTimestamp("2024-05-01T10:11:12.123456789+02:00"), utc)
+        self.assertEqual(parseTimestamp("2024-05-01T03:41:12-04:30"), utc)
+
+    def test_never_and_invalid(self):
+        # Go's zero time
+        self.assertIsNone(parseTimestamp("0001-01-01T00:00:00Z"))
+        self.assertIsNone(parseTimestamp(""))
+        self.assertIsNone(parseTimestamp("2024-05-01 08:11:12"))
+
+
+class ParsePeerTrafficTests(unittest.TestCase):
+    def test_peers(self):
+        stdout = json.dumps(
+            {
+                "Self": {"TailscaleIPs": ["100.64.0.1"]},
+                "Peer": {
+                    "nodekey:1": {
+                        "TailscaleIPs": ["100.88.12.7", "fd7a:115c:a1e0::1"],
+                        "RxBytes": 98620,
+                        "TxBytes": 52344,
+                        "LastHandshake": "2024-05-01T08:11:12.5Z",
+                    },
+                    "nodekey:2": {
+                        "TailscaleIPs": ["fd7a:115c:a1e0::2"],
+                        "RxBytes": 1,
+                        "TxBytes": 2,
+                    },
+                    "nodekey:3": {
+                        "TailscaleIPs": ["100.92.210.1"],
+                        "LastHandshake": "0001-01-01T00:00:00Z",
+                    },
+                },
+            }
+        )
+
+        self.assertEqual(
+            parsePeerTraffic(stdout),
+            [
+                PeerTraffic("100.88.12.7", 98620, 52344, 1714551072),
+                PeerTraffic("100.92.210.1", 0, 0, None),
+            ],
+        )
+
+    def test_no_peers_and_invalid(self):
+        self.assertEqual(parsePeerTraffic('{"Peer": null}'), [])
+        with self.assertRaises(ValueError):
+            parsePeerTraffic("not json")
@@ -0,0 +1,132 @@
+#
+# Traffic counters of the peers, from the output of `tailscale status --json`
+#
+# TrafficWindow keeps the last byte counter samples of a peer in a ring buffer,
+# the rates are calculated over the whole window.
+
+
+import calendar
+import json
+import re
+import time
+from array import array
+from typing import List, NamedTuple, Optional
+
+# number of samples the traffic rates are calculated over, the window covers
+# TRAFFIC_WINDOW_SAMPLES - 1 intervals of the TrafficInterval setting
+TRAFFIC_WINDOW_SAMPLES = 12
+
+
+class TrafficWindow:
+    """
+    Ring buffer of the last rx/tx byte counter samples of a peer,
+    to calculate the rates over a sliding window
+    """
+
+    __slots__ = ("times", "rxBytes", "txBytes", "next", "count")
+
+    def __init__(self, size: int = TRAFFIC_WINDOW_SAMPLES):
+        self.times = array("d", [0.0]) * size
+        self.rxBytes = array("Q", [0]) * size
+        self.txBytes = array("Q", [0]) * size
+        self.next = 0
+        self.count = 0
+
+    def add(self, timestamp: float, rxBytes: int, txBytes: int) -> None:
+        size = len(self.times)
+
+        # start over if the counters were reset, e.g. by a restart of tailscaled
+        if self.count > 0:
+            newest = (self.next - 1) % size
+            if rxBytes < self.rxBytes[newest] or txBytes < self.txBytes[newest]:
+                self.count = 0
+
+        self.times[self.next] = timestamp
+        self.rxBytes[self.next] = rxBytes
+        self.txBytes[self.next] = txBytes
+        self.next = (self.next + 1) % size
+        self.count = min(self.count + 1, size)
+
+    def rates(self) -> tuple:
+        """
+        :return: rx and tx rate in bytes per second over the window, None if unknown
+        """
+        if self.count < 2:
+            return None, None
+
+        size = len(self.times)
+        newest = (self.next - 1) % size
+        oldest = (self.next - self.count) % size
+        duration = self.times[newest] - self.times[oldest]
+
+        if duration <= 0:
+            return None, None
+
+        return (
+            (self.rxBytes[newest] - self.rxBytes[oldest]) / duration,
+            (self.txBytes[newest] - self.txBytes[oldest]) / duration,
+        )
+
+
+def parseTimestamp(timestamp: str) -> int:
+    """
+    Converts a RFC 3339 timestamp from the tailscale status JSON to a unix timestamp
+
+    :param timestamp: e.g. 2024-05-01T10:11:12.123456789+02:00
+    :return: unix timestamp or None, if the timestamp is not set or invalid
+    """
+    match = re.match(
+        r"(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.\d+)?(Z|([+-])(\d\d):(\d\d))$",
+        timestamp,
+    )
+
+    # Go's zero time is used for "never"
+    if match is None or timestamp.startswith("0001-"):
+        return None
+
+    seconds = calendar.timegm(time.strptime(match.group(1), "%Y-%m-%dT%H:%M:%S"))
+
+    if match.group(3) is not None:
+        offset = int(match.group(4)) * 3600 + int(match.group(5)) * 60
+        seconds -= offset if match.group(3) == "+" else -offset
+
+    return seconds
+
+
+class PeerTraffic(NamedTuple):
+    """
+    traffic counters of a peer from the tailscale status JSON
+    """
+
+    ipAddress: str
+    rxBytes: int
+    txBytes: int
+    # unix timestamp, None if there was no handshake yet
+    lastHandshake: Optional[int]
+
+
+def parsePeerTraffic(stdout: str) -> List[PeerTraffic]:
+    """
+    # returns the traffic counters of the peers with an IPv4 address
+    #
+    # :param stdout: standard output of `tailscale status --json`
+    # :return: PeerTraffic of every peer, ValueError is raised if the JSON is invalid
+    """
+    peers = json.loads(stdout).get("Peer") or {}
+    samples = []
+
+    for peer in peers.values():
+        ipAddress = next((ip for ip in peer.get("TailscaleIPs") or [] if "." in ip), None)
+        if ipAddress is None:
+            continue
+
+        samples.append(
+            PeerTraffic(
+                ipAddress,
+                int(peer.get("RxBytes", 0)),
+                int(peer.get("TxBytes", 0)),
+                parseTimestamp(peer.get("LastHandshake", "")),
+            )
+        )
+
+    return samples
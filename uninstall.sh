@@ -41,6 +41,11 @@ if [ -d "/data/conf/tailscale" ]; then
     echo "Remove \"/data/conf/tailscale\" folder..."
     rm -rf /data/conf/tailscale
 fi
+
+if [ -d "/data/conf/tailscale-control" ]; then
+    echo "Remove \"/data/conf/tailscale-control\" folder..."
+    rm -rf /data/conf/tailscale-control
+fi
 echo ""
 
 # cleanup binaries
@@ -110,7 +115,9 @@ dbus -y com.victronenergy.settings /Settings RemoveSettings '%[ \
     "Services/Tailscale/Enabled", \
     "Services/Tailscale/Hostname", \
     "Services/Tailscale/Machinename", \
-    "Services/Tailscale/MachineName" \
+    "Services/Tailscale/MachineName", \
+    "Services/Tailscale/MetricsPort", \
+    "Services/Tailscale/TrafficInterval" \
 ]' > /dev/null
 echo ""
 